@@ -0,0 +1,63 @@
+"""Compare the python-docx and streaming lxml parser backends.
+
+Each backend runs in its own subprocess, so peak RSS is measured per
+backend and not shared between them. Run from the repository root:
+
+    python -m benchmarks.bench_docx_parsing spec.docx [spec2.docx ...] --repeat 3
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from testplan_to_testrail import PARSER_BACKENDS, build_test_case_index
+
+
+def run_backend(doc_path: str, backend: str, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        index = build_test_case_index(doc_path, milestone_id=0, backend=backend)
+        timings.append(time.perf_counter() - start)
+    return {
+        "backend": backend,
+        "cases": len(index),
+        "best_s": min(timings),
+        "mean_s": sum(timings) / len(timings),
+        # ru_maxrss is in KiB on Linux
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("documents", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=PARSER_BACKENDS,
+                        help="Run a single backend in this process and print JSON")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        for doc_path in args.documents:
+            print(json.dumps(dict(run_backend(doc_path, args.backend, args.repeat), document=doc_path)))
+        return 0
+
+    print(f"{'document':40} {'backend':8} {'cases':>6} {'best s':>8} {'mean s':>8} {'RSS MiB':>8}")
+    for doc_path in args.documents:
+        for backend in PARSER_BACKENDS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_docx_parsing", doc_path,
+                 "--repeat", str(args.repeat), "--backend", backend],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{doc_path[-40:]:40} {backend:8} {result['cases']:>6} {result['best_s']:>8.3f} "
+                  f"{result['mean_s']:>8.3f} {result['max_rss_mib']:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Time the parse, fetch, diff and write phases of a sync against a fake TestRail.
+
+Synthetic specs are generated (or given), a local FakeTestRail is seeded so
+that part of the cases already exist and part of those differ, and the
+plan/apply pipeline of testplan_to_testrail runs against it. Every phase is
+repeated on a freshly seeded server. Run from the repository root:
+
+    python -m benchmarks.bench_sync --cases 10 500 5000 --latency 0.02 --json output/bench.json
+    python -m benchmarks.bench_sync --cases 500 --baseline output/bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from benchmarks.fake_testrail import FakeTestRail
+from benchmarks.generate_specs import generate_spec
+
+PHASES = ("parse", "fetch", "diff", "write")
+MILESTONE_ID = 7
+OTHER_MILESTONE_ID = 6
+
+
+def seed_cases(test_case_index: Dict[str, Optional[Dict]], section_ids: Dict[str, int],
+               existing: float, changed: float, moved: float = 0.0) -> List[Dict]:
+    """
+    TestRail copies of the first `existing` share of cases, `changed` of which
+    differ. The last `moved` share of them is filed under another milestone,
+    so the sync has to move them rather than create them again.
+    """
+    doc_cases = [dict(case, section_id=section_ids[case["section"]])
+                 for case in test_case_index.values() if case]
+    present = doc_cases[:int(len(doc_cases) * existing)]
+    stale = int(len(present) * changed)
+    elsewhere = len(present) - int(len(present) * moved)
+    cases = []
+    for idx, doc_case in enumerate(present):
+        case = dict(doc_case)
+        if idx < stale:
+            case["title"] += " (outdated)"
+        if idx >= elsewhere:
+            case["milestone_id"] = OTHER_MILESTONE_ID
+        cases.append(case)
+    return cases
+
+
+def run_sync(server: FakeTestRail, doc_paths: List[str], existing: float, changed: float,
+             jobs: Optional[int] = None, moved: float = 0.0) -> Dict:
+    # Imported late, so the client picks up the fake server from the environment
+    from testplan_to_testrail import (GROUP_SECTIONS, apply_change_set, build_change_set,
+                                      build_multi_document_index)
+    from utils.testrail_client import RailClient
+
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        test_case_index, sources = build_multi_document_index(doc_paths, MILESTONE_ID, max_workers=jobs)
+        timings["parse"] = time.perf_counter() - start
+
+        # Sections get IDs 1, 2, ... in the order they are seeded
+        section_ids = {name: idx for idx, name in enumerate(GROUP_SECTIONS.values(), 1)}
+        server.reset(seed_cases(test_case_index, section_ids, existing, changed, moved), section_ids)
+
+        start = time.perf_counter()
+        with RailClient(use_cache=False) as client:
+            testrail_case_map = client.cases_by_cm_id()
+            timings["fetch"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            change_set = build_change_set(client, test_case_index, MILESTONE_ID, sources,
+                                          testrail_case_map=testrail_case_map)
+            timings["diff"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = apply_change_set(client, change_set)
+            timings["write"] = time.perf_counter() - start
+
+    return {
+        "timings": timings,
+        "cases": len(test_case_index),
+        "creates": len(change_set["creates"]),
+        "updates": len(change_set["updates"]),
+        "failed": sum(1 for result in results if not result.ok),
+        "duplicates": count_duplicates(server),
+        "requests": dict(server.requests)
+    }
+
+
+def count_duplicates(server: FakeTestRail) -> int:
+    """Number of CM IDs held by more than one case of the fake TestRail"""
+    cm_ids = Counter(case.get("custom_cm_id") for case in server.cases.values())
+    return sum(1 for count in cm_ids.values() if count > 1)
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    last = runs[-1]
+    return {
+        "cases": last["cases"],
+        "creates": last["creates"],
+        "updates": last["updates"],
+        "failed": last["failed"],
+        "duplicates": last["duplicates"],
+        "requests": last["requests"],
+        "phases": {
+            phase: {
+                "best_s": min(run["timings"][phase] for run in runs),
+                "mean_s": sum(run["timings"][phase] for run in runs) / len(runs)
+            }
+            for phase in PHASES
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("documents", nargs="*", help="Specs to sync; generated from --cases when omitted")
+    parser.add_argument("--cases", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Sizes of the generated specs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--existing", type=float, default=0.8, help="Share of cases already in TestRail")
+    parser.add_argument("--changed", type=float, default=0.2, help="Share of existing cases that differ")
+    parser.add_argument("--moved", type=float, default=0.1,
+                        help="Share of existing cases filed under another milestone")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--rate-limited", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--rate-limit", type=int, default=1000000,
+                        help="Client-side requests per minute; unlimited by default")
+    parser.add_argument("-j", "--jobs", type=int, help="Parser processes")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    server = FakeTestRail(latency=args.latency, rate_limited=args.rate_limited, retry_after=0.1, seed=0)
+    os.environ["TESTRAIL_URL"] = server.url
+    os.environ["TESTRAIL_RATE_LIMIT"] = str(args.rate_limit)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    with server, tempfile.TemporaryDirectory() as tmp_dir:
+        documents = args.documents or [
+            generate_spec(os.path.join(tmp_dir, f"spec_{cases}.docx"), cases) for cases in args.cases
+        ]
+        print(f"{'document':24} {'phase':6} {'best s':>8} {'mean s':>8} {'baseline':>9}")
+        for doc_path in documents:
+            name = os.path.basename(doc_path)
+            result = summarize([
+                run_sync(server, [doc_path], args.existing, args.changed, args.jobs, args.moved)
+                for _ in range(args.repeat)
+            ])
+            results[name] = result
+            for phase in PHASES:
+                timing = result["phases"][phase]
+                previous = baseline.get(name, {}).get("phases", {}).get(phase)
+                change = f"{timing['best_s'] / previous['best_s'] - 1:+8.0%}" if previous and previous["best_s"] else ""
+                print(f"{name[-24:]:24} {phase:6} {timing['best_s']:>8.3f} {timing['mean_s']:>8.3f} {change:>9}")
+            print(f"{'':24} {result['cases']} cases: {result['creates']} created, {result['updates']} updated, "
+                  f"{result['failed']} failed, {result['duplicates']} duplicated, {sum(result['requests'].values())} requests")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
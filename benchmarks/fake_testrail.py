@@ -0,0 +1,341 @@
+"""Local stand-in for the TestRail API, for benchmarks and manual runs.
+
+Serves the subset of `index.php?/api/v2/` the sync pipeline and the pytest
+reporter use, from memory: get_project, get_suites, get_sections,
+add_section, get_cases (paginated, with the usual filters), get_case,
+add_case, update_case, update_cases, add_run, add_results_for_cases,
+add_attachment_to_case and get_attachment. Latency and 429 responses can be injected
+to see how the clients behave against a slow or rate limited instance.
+
+    with FakeTestRail(latency=0.05, rate_limited=0.02) as server:
+        api = APIClient(server.url)
+
+Run it standalone to point the CLI at it (TESTRAIL_URL=http://127.0.0.1:8080):
+
+    python -m benchmarks.fake_testrail --port 8080 --latency 0.05
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+API_PREFIX = "/index.php?/api/v2/"
+PAGE_SIZE = 250
+# get_cases filters matched against case fields; values may be comma separated
+CASE_FILTERS = ("suite_id", "section_id", "milestone_id", "type_id", "priority_id", "template_id")
+# Filters TestRail only accepts a single ID for
+SINGLE_FILTERS = ("suite_id", "section_id")
+
+
+class FakeTestRail:
+    def __init__(self, project_id: int = 4, suite_ids: Iterable[int] = (1,),
+                 latency: float = 0.0, rate_limited: float = 0.0, retry_after: float = 1.0,
+                 host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None):
+        """
+        Args:
+            project_id: The one project served.
+            suite_ids: Suites of the project; more than one makes it a
+                multi-suite project (suite_mode 3).
+            latency: Seconds added to every response.
+            rate_limited: Fraction of requests answered with 429.
+            retry_after: Retry-After sent with every 429, in seconds.
+            host, port: Address to listen on; port 0 picks a free port.
+            seed: Seed for the 429 injection, for repeatable runs.
+        """
+        self.project_id = project_id
+        self.suite_ids = list(suite_ids)
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.cases = {}
+        self.sections = {}
+        self.results = {}
+        self.attachments = {}
+        self.requests = {}
+        self._next_ids = {"case": 1, "section": 1, "run": 1, "result": 1, "attachment": 1}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTestRail":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def reset(self, cases: Iterable[Dict] = (), sections: Iterable[str] = ()):
+        """Replace every case and section and forget the results and request counts"""
+        with self._lock:
+            self.cases = {}
+            self.sections = {}
+            self.results = {}
+            self.attachments = {}
+            self.requests = {}
+            self._next_ids = {"case": 1, "section": 1, "run": 1, "result": 1, "attachment": 1}
+        for name in sections:
+            self.seed_section(name)
+        for case in cases:
+            self.seed_case(case)
+
+    def seed_section(self, name: str, suite_id: Optional[int] = None) -> Dict:
+        """Store a top-level section as add_section would"""
+        with self._lock:
+            section = {"id": self._next_id("section"), "name": name, "parent_id": None, "depth": 0,
+                       "suite_id": suite_id or self.suite_ids[0]}
+            self.sections[section["id"]] = section
+            return section
+
+    def seed_case(self, fields: Dict, section_id: Optional[int] = None) -> Dict:
+        """Store a case as add_case would, filling in its ID, suite and timestamps"""
+        with self._lock:
+            case = dict(fields)
+            case["id"] = self._next_id("case")
+            case.setdefault("suite_id", self.suite_ids[0])
+            if section_id is not None:
+                case["section_id"] = section_id
+            case["created_on"] = case["updated_on"] = int(time.time())
+            self.cases[case["id"]] = case
+            return case
+
+    def _next_id(self, kind: str) -> int:
+        value = self._next_ids[kind]
+        self._next_ids[kind] += 1
+        return value
+
+    def _count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def _throttle(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.rate_limited
+
+    # API methods: (args, query, body) -> (status, payload)
+
+    def get_project(self, args, query, body):
+        return 200, {"id": self.project_id, "suite_mode": 3 if len(self.suite_ids) > 1 else 1}
+
+    def get_suites(self, args, query, body):
+        return 200, [{"id": suite_id, "project_id": self.project_id} for suite_id in self.suite_ids]
+
+    def get_sections(self, args, query, body):
+        limit = min(int(query.get("limit", PAGE_SIZE)), PAGE_SIZE)
+        offset = int(query.get("offset", 0))
+        with self._lock:
+            sections = [section for section in self.sections.values() if _matches(section, query)]
+        page = sections[offset:offset + limit]
+        next_link = None
+        if offset + limit < len(sections):
+            next_link = f"/api/v2/get_sections/{args[0]}&limit={limit}&offset={offset + limit}"
+        return 200, {"offset": offset, "limit": limit, "size": len(page),
+                     "_links": {"next": next_link, "prev": None}, "sections": page}
+
+    def add_section(self, args, query, body):
+        if not body.get("name"):
+            return 400, {"error": "Field :name is a required field."}
+        return 200, self.seed_section(body["name"], body.get("suite_id"))
+
+    def get_case(self, args, query, body):
+        case = self.cases.get(int(args[0]))
+        if case is None:
+            return 400, {"error": "Field :case_id is not a valid test case."}
+        return 200, case
+
+    def get_cases(self, args, query, body):
+        for field in SINGLE_FILTERS:
+            if "," in query.get(field, ""):
+                return 400, {"error": f"Field :{field} is not a valid ID."}
+        limit = min(int(query.get("limit", PAGE_SIZE)), PAGE_SIZE)
+        offset = int(query.get("offset", 0))
+        with self._lock:
+            cases = [case for case in self.cases.values() if _matches(case, query)]
+        page = cases[offset:offset + limit]
+        next_link = None
+        if offset + limit < len(cases):
+            next_link = f"/api/v2/get_cases/{args[0]}&limit={limit}&offset={offset + limit}"
+        return 200, {
+            "offset": offset,
+            "limit": limit,
+            "size": len(page),
+            "_links": {"next": next_link, "prev": None},
+            "cases": page
+        }
+
+    def add_case(self, args, query, body):
+        return 200, self.seed_case(body, int(args[0]))
+
+    def update_case(self, args, query, body):
+        with self._lock:
+            case = self.cases.get(int(args[0]))
+            if case is None:
+                return 400, {"error": "Field :case_id is not a valid test case."}
+            case.update(body, updated_on=int(time.time()))
+            return 200, dict(case)
+
+    def update_cases(self, args, query, body):
+        fields = dict(body)
+        case_ids = fields.pop("case_ids", [])
+        with self._lock:
+            missing = [case_id for case_id in case_ids if case_id not in self.cases]
+            if missing:
+                return 400, {"error": f"Field :case_ids contains invalid cases: {missing}"}
+            updated = []
+            for case_id in case_ids:
+                self.cases[case_id].update(fields, updated_on=int(time.time()))
+                updated.append(dict(self.cases[case_id]))
+        return 200, {"updated_cases": updated}
+
+    def add_run(self, args, query, body):
+        with self._lock:
+            run_id = self._next_id("run")
+            self.results[run_id] = []
+        return 200, dict(body, id=run_id, project_id=int(args[0]))
+
+    def add_results_for_cases(self, args, query, body):
+        run_id = int(args[0])
+        with self._lock:
+            if run_id not in self.results:
+                return 400, {"error": "Field :run_id is not a valid test run."}
+            added = []
+            for result in body.get("results", []):
+                added.append(dict(result, id=self._next_id("result")))
+            self.results[run_id].extend(added)
+        return 200, added
+
+    def add_attachment_to_case(self, args, query, body):
+        # body is the raw multipart/form-data request holding a single file
+        if int(args[0]) not in self.cases:
+            return 400, {"error": "Field :case_id is not a valid test case."}
+        content = body.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+        with self._lock:
+            attachment_id = self._next_id("attachment")
+            self.attachments[attachment_id] = content
+        return 200, {"attachment_id": attachment_id}
+
+    def get_attachment(self, args, query, body):
+        content = self.attachments.get(int(args[0]))
+        if content is None:
+            return 400, {"error": "Field :attachment_id is not a valid attachment."}
+        return 200, content
+
+    # Endpoints served, by HTTP verb
+    ENDPOINTS = {
+        "GET": ("get_project", "get_suites", "get_sections", "get_case", "get_cases", "get_attachment"),
+        "POST": ("add_section", "add_case", "update_case", "update_cases", "add_run",
+                 "add_results_for_cases", "add_attachment_to_case")
+    }
+
+
+def _matches(case: Dict, query: Dict) -> bool:
+    for field in CASE_FILTERS:
+        if field in query and query[field] not in ("", "None"):
+            allowed = {int(value) for value in query[field].split(",")}
+            if case.get(field) not in allowed:
+                return False
+    if "updated_after" in query and case.get("updated_on", 0) <= int(query["updated_after"]):
+        return False
+    return True
+
+
+def _parse_path(path: str):
+    """Split /index.php?/api/v2/get_cases/4&limit=250 into method, args and filters"""
+    route, *params = unquote(path[len(API_PREFIX):]).split("&")
+    method, *args = route.split("/")
+    query = dict(param.split("=", 1) for param in params if "=" in param)
+    return method, args, query
+
+
+def _handler(fake: FakeTestRail):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def _dispatch(self, verb: str):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if fake.latency:
+                time.sleep(fake.latency)
+            if not self.path.startswith(API_PREFIX):
+                return self._reply(404, {"error": "Not found"})
+
+            method, args, query = _parse_path(self.path)
+            fake._count(method)
+            if method not in FakeTestRail.ENDPOINTS[verb]:
+                return self._reply(400, {"error": f"Unknown method {method}"})
+            if fake._throttle():
+                return self._reply(429, {"error": "API rate limit exceeded"},
+                                   {"Retry-After": str(fake.retry_after)})
+            try:
+                body = raw if method == "add_attachment_to_case" else json.loads(raw) if raw else {}
+            except ValueError:
+                return self._reply(400, {"error": "Invalid JSON"})
+            status, payload = getattr(fake, method)(args, query, body)
+            self._reply(status, payload)
+
+        def _reply(self, status: int, payload, headers: Optional[Dict] = None):
+            binary = isinstance(payload, bytes)
+            data = payload if binary else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/octet-stream" if binary else "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--project-id", type=int, default=4)
+    parser.add_argument("--suites", type=int, default=1, help="Number of suites")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--rate-limited", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args(argv)
+
+    server = FakeTestRail(args.project_id, range(1, args.suites + 1), args.latency,
+                          args.rate_limited, port=args.port)
+    print(f"Fake TestRail listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
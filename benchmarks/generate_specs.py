@@ -0,0 +1,79 @@
+"""Generate synthetic ANG-TCS test specification documents.
+
+The documents follow the layout parse_test_case expects: an ID and title
+line, Summary, Test Case Scenario with a test set and a steps table,
+Acceptance Criteria, Type of Testing and Parent Requirements. Output is
+deterministic for a given size and seed. Run from the repository root:
+
+    python -m benchmarks.generate_specs specs/ --cases 10 500 5000
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+from typing import List, Optional
+
+import docx
+
+GROUPS = ("BUS", "PERF", "RMS", "FNCT", "IS", "LBL")
+TESTING_TYPES = ("Manual", "Automated", "Inspection")
+
+
+def generate_spec(path: str, cases: int, seed: int = 0, steps: int = 4) -> str:
+    """Write a document with `cases` test cases and return its path"""
+    rng = random.Random(seed)
+    doc = docx.Document()
+    doc.add_paragraph("Synthetic test specification")
+    doc.add_paragraph(f"Generated with {cases} test cases.")
+
+    for i in range(cases):
+        group = GROUPS[i % len(GROUPS)]
+        doc.add_paragraph(f"ANG-TCS-{group}-{i + 1:05d} - {_sentence(rng, 6)}")
+        doc.add_paragraph("Summary")
+        doc.add_paragraph(_sentence(rng, 20))
+        doc.add_paragraph("Test Case Scenario")
+        doc.add_paragraph(_sentence(rng, 10))
+        doc.add_paragraph(f"Use Test Set {rng.choice(string.ascii_uppercase[:15])}")
+        doc.add_paragraph("The operator follows the following steps:")
+        table = doc.add_table(rows=steps, cols=1)
+        for row in range(steps):
+            table.cell(row, 0).text = f"Step {row + 1}: {_sentence(rng, 8)}"
+        doc.add_paragraph("Acceptance Criteria")
+        for _ in range(steps):
+            doc.add_paragraph(_sentence(rng, 8))
+        doc.add_paragraph(f"Type of Testing: {rng.choice(TESTING_TYPES)}")
+        doc.add_paragraph("Parent Requirements and Specifications")
+        doc.add_paragraph(f"ANG-PR-{rng.randint(1, 999):03d}")
+        doc.add_paragraph(f"ANG-SRS-{rng.randint(1, 999):03d}")
+
+    doc.save(path)
+    return path
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+        for _ in range(words)
+    ).capitalize() + "."
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--cases", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                        help="Number of test cases of each document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for cases in args.cases:
+        path = os.path.join(args.output_dir, f"spec_{cases}.docx")
+        generate_spec(path, cases, args.seed)
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,21 +10,63 @@ OUTPUT_PATH = PROJECT_ROOT / "output"
 TESTRAIL_URL = os.getenv("TESTRAIL_URL", "https://COMPANY_NAME.testrail.io")
 TESTRAIL_USER = os.getenv("TESTRAIL_USER", "eduardo@COMPANY_NAME.com")
 TESTRAIL_PASSWORD = os.getenv("TESTRAIL_PASSWORD", "API_KEY")
-TESTRAIL_PROJECT_ID = 4
+TESTRAIL_PROJECT_ID = int(os.getenv("TESTRAIL_PROJECT_ID", "4"))  # Project used when none is given
 
+# Project name -> TestRail project ID
+TESTRAIL_PROJECT_MAP = {
+    'project_name': 4,
+}
+
+# TestRail project ID -> {milestone version -> TestRail milestone ID}
 TESTRAIL_MILESTONE_MAP = {
-    'v2.0': 3,
-    'v1.4': 1,
-    'v1.6': 4,
-    'v2.1': 5
+    4: {
+        '1.4': 5,
+        '1.6': 6,
+        '2.0': 7,
+        '2.1': 8
+    }
 }
 
-TESTRAIL_PROJECT_MAP = {
-    'project_name': 1,
+# Test set letter of the preconditions -> ID of the custom_test_set dropdown option
+TESTRAIL_TEST_SET_MAP = {
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5,
+    'F': 6, 'G': 7, 'H': 8, 'I': 9, 'J': 10,
+    'K': 11, 'L': 12, 'M': 13, 'N': 14, 'O': 15
 }
 
 # Test artifacts
 LONG_JSON = OUTPUT_PATH / "long.json"
 SHORT_JSON = OUTPUT_PATH / "short.json"
 TEST_LOG = OUTPUT_PATH / "test.log"
-VIEWS_JSON = OUTPUT_PATH / "views.json" 
\ No newline at end of file
+VIEWS_JSON = OUTPUT_PATH / "views.json" 
+# TestRail connection tuning
+TESTRAIL_PAGE_SIZE = 250  # Maximum page size accepted by the TestRail API
+TESTRAIL_MAX_WORKERS = int(os.getenv("TESTRAIL_MAX_WORKERS", "8"))
+TESTRAIL_POOL_SIZE = max(10, TESTRAIL_MAX_WORKERS)
+TESTRAIL_TIMEOUT = (10, 60)  # Seconds: (connect, read)
+TESTRAIL_ASYNC_CONCURRENCY = int(os.getenv("TESTRAIL_ASYNC_CONCURRENCY", "100"))  # Requests in flight per AsyncAPIClient
+TESTRAIL_RATE_LIMIT = int(os.getenv("TESTRAIL_RATE_LIMIT", "180"))  # Requests per minute
+TESTRAIL_RATE_BURST = 10
+TESTRAIL_MAX_RETRIES = 5
+
+# Local TestRail case cache
+CASE_STORE_PATH = OUTPUT_PATH / "testrail_cases.sqlite3"
+TESTRAIL_OFFLINE = os.getenv("TESTRAIL_OFFLINE", "0") == "1"
+TESTRAIL_SYNC_SKEW = 60  # Seconds of overlap between delta syncs, for clock skew
+TESTRAIL_BULK_CHUNK = 100  # Cases per update_cases request / create batch
+FINGERPRINT_STORE_PATH = OUTPUT_PATH / "fingerprints.sqlite3"
+METRICS_REPORT_PATH = OUTPUT_PATH / "sync_metrics.json"
+SYNC_JOURNAL_PATH = OUTPUT_PATH / "sync_journal.jsonl"
+SYNC_REPORT_PATH = OUTPUT_PATH / "sync_report.json"
+TESTRAIL_MAX_TARGETS = int(os.getenv("TESTRAIL_MAX_TARGETS", "4"))  # Project/milestone targets synced at once
+
+# TestRail result reporting
+TESTRAIL_STATUS_IDS = {
+    'passed': 1,
+    'blocked': 2,
+    'untested': 3,
+    'retest': 4,
+    'failed': 5
+}
+RESULTS_SPILL_PATH = OUTPUT_PATH / "testrail_results_spill.jsonl"
+CASE_SNAPSHOT_PATH = OUTPUT_PATH / "testrail_snapshot.json"
@@ -1,36 +1,56 @@
 import os
+import sys
+import glob
 import json
+import logging
+import argparse
+import time
 import docx
 import re
-from typing import Dict, List
-from utils.testrail_client import RailClient
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from utils.testrail_client import RailClient, TestRailCase, create_api_client
+from utils.case_store import CaseStore
+from utils.batch_writer import BatchWriter, WriteResult, CREATE, UPDATE
+from utils.case_diff import diff_case
+from utils.docx_stream import iter_block_texts
+from utils.fingerprint_store import FingerprintStore, hash_case, hash_file
+from utils.metrics import configure_logging, get_metrics
+from utils.sync_journal import SyncJournal, COMPLETED, STARTED
+from config.constants import (
+    OUTPUT_PATH,
+    TESTRAIL_PROJECT_ID,
+    TESTRAIL_PROJECT_MAP,
+    TESTRAIL_MILESTONE_MAP,
+    TESTRAIL_TEST_SET_MAP,
+    TESTRAIL_MAX_WORKERS,
+    TESTRAIL_MAX_TARGETS,
+    METRICS_REPORT_PATH,
+    SYNC_JOURNAL_PATH,
+    SYNC_REPORT_PATH
+)
 from docx.text.paragraph import Paragraph
 from docx.document import Document
 from docx.table import _Cell, Table
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
 
-GROUP_IDS = {
-    "Business": 784,
-    "Performance": 785,
-    "Risk Management/Safety": 786,
-    "Functional": 787,
-    "Installation and Servicing": 788,
-    "Labeling": 789
-}
+logger = logging.getLogger("testrail_sync.plan")
 
-MILESTONE_MAP = {
-    "1.4": 5,
-    "1.6": 6,
-    "2.0": 7,
-    "2.1": 8
+# Group token of a CM ID (ANG-TCS-BUS-001) -> name of its TestRail section
+GROUP_SECTIONS = {
+    "BUS": "Business",
+    "PERF": "Performance",
+    "RMS": "Risk Management/Safety",
+    "FNCT": "Functional",
+    "IS": "Installation and Servicing",
+    "LBL": "Labeling"
 }
 
-TEST_SET_MAP = {
-    "A": 1, "B": 2, "C": 3, "D": 4, "E": 5,
-    "F": 6, "G": 7, "H": 8, "I": 9, "J": 10,
-    "K": 11, "L": 12, "M": 13, "N": 14, "O": 15
-}
+def milestone_map(project_id: int = TESTRAIL_PROJECT_ID) -> Dict[str, int]:
+    """Milestone versions of a project and their TestRail IDs, from TESTRAIL_MILESTONE_MAP."""
+    return TESTRAIL_MILESTONE_MAP.get(project_id, {})
 
 def find_docx_files() -> List[str]:
     """Find all .docx files in current directory and let user select one."""
@@ -55,24 +75,19 @@ def find_docx_files() -> List[str]:
         except ValueError:
             print("Please enter a valid number")
 
-def extract_test_case_from_docx(doc_path: str, test_id: str, milestone_id: int) -> Dict:
+def split_test_case_blocks(blocks: Iterable[str]) -> List[List[str]]:
     """
-    Extract test case information from Word document.
-    Args:
-        doc_path: Path to the Word document
-        test_id: Test case ID to extract
-        milestone_id: ID of the milestone selected by user
+    Group the block texts of a document into raw test cases.
+    Every test case starts at a block beginning with "ANG-TCS-" and runs until
+    the next one; blocks before the first test case are ignored.
     """
-    doc = docx.Document(doc_path)
     test_cases = []
     test_case = []
     flag = False
-    
-    print(f"\nDebug: Processing test case {test_id}")
-    
-    for block in iter_block_items(doc):
-        text = block.text.strip()
-        
+
+    for text in blocks:
+        text = text.strip()
+
         if text.startswith("ANG-TCS-"):
             if flag:
                 test_cases.append(test_case)
@@ -83,147 +98,233 @@ def extract_test_case_from_docx(doc_path: str, test_id: str, milestone_id: int)
                 test_case.append(text)
         elif flag:
             test_case.append(text)
-    
+
     if test_case:
         test_cases.append(test_case)
-    
-    # Debug: Imprimir todos los test cases encontrados
-    print("\nDebug: Found test cases:")
-    for i, tc in enumerate(test_cases):
-        print(f"\nTest Case {i + 1}:")
-        for j, line in enumerate(tc):
-            print(f"[{j}] '{line}'")
-    
-    # Buscar el test case específico
-    for test_case in test_cases:
-        testrail_cm_id = test_case[0].split(" ")[0].strip()
-        print(f"\nDebug: Comparing '{testrail_cm_id}' with '{test_id}'")
+
+    return test_cases
+
+def parse_test_case(test_case: List[str], milestone_id: int) -> Optional[Dict]:
+    """
+    Parse the blocks of a single test case into a TestRail case payload.
+    The payload names its section; its section_id is None until resolved
+    by with_section_id.
+    Args:
+        test_case: Block texts of the test case, starting with its ID line
+        milestone_id: ID of the milestone selected by user
+    """
+    test_id = test_case[0].split()[0].strip()
+    try:
+        # Extract title
+        title_line = test_case[0]
+        # Buscamos el texto después del ID y el guión
+        title = title_line.split(" - ", 1)[1].strip() if " - " in title_line else title_line
         
-        if testrail_cm_id == test_id:
-            print("\nDebug: Found matching test case. Content:")
-            for i, line in enumerate(test_case):
-                print(f"[{i}] '{line}'")
-                
-            try:
-                # Extract title
-                title_line = test_case[0]
-                # Buscamos el texto después del ID y el guión
-                title = title_line.split(" - ", 1)[1].strip() if " - " in title_line else title_line
-                
-                # Determine group from CM ID
-                group_type = test_id.split("-")[2]  # BUS, PERF, etc.
-                group_map = {
-                    "BUS": "Business",
-                    "PERF": "Performance",
-                    "RMS": "Risk Management/Safety",
-                    "FNCT": "Functional",
-                    "IS": "Installation and Servicing",
-                    "LBL": "Labeling"
-                }
-                section_id = GROUP_IDS[group_map[group_type]]
-                
-                # Encontrar los índices de las secciones
-                sections = {
-                    "summary": next(i for i, text in enumerate(test_case) if text == "Summary"),
-                    "scenario": next(i for i, text in enumerate(test_case) if text == "Test Case Scenario"),
-                    "acceptance": next(i for i, text in enumerate(test_case) if text == "Acceptance Criteria"),
-                    "type": next(i for i, text in enumerate(test_case) if "Type of Testing" in text),
-                    "parent": next(i for i, text in enumerate(test_case) if text == "Parent Requirements and Specifications")
-                }
-                
-                # Process sections
-                summary = test_case[sections["summary"] + 1:sections["scenario"]]
-                summary = '\n'.join(map(str, [i for i in summary if i]))
-                
-                # Extract preconditions and steps
-                scenario = test_case[sections["scenario"] + 1:sections["acceptance"]]
-                preconds = []
-                steps = []
-                
-                # Flag para saber si ya pasamos la línea "The operator follows the following steps:"
-                found_operator_line = False
-                
-                for line in scenario:
-                    line = line.strip()
-                    if not line:
-                        continue
-                        
-                    if "The operator follows the following steps:" in line:
-                        found_operator_line = True
-                        preconds.append(line)
-                    elif not found_operator_line:
-                        # Todo antes de "The operator follows..." va en preconds
-                        preconds.append(line)
-                    else:
-                        # Todo después de "The operator follows..." va en steps
-                        if any(keyword in line.lower() for keyword in ["use test set", "download"]):
-                            preconds.append(line)
-                        else:
-                            steps.append(line)
-                
-                # Extract acceptance criteria
-                acceptance = test_case[sections["acceptance"] + 1:sections["type"]]
-                acceptance = [a for a in acceptance if a.strip()]
-                
-                # Extract testing type (extraer de la misma línea después de los dos puntos)
-                type_line = test_case[sections["type"]]
-                testing_type = type_line.split("Type of Testing:", 1)[1].strip() if "Type of Testing:" in type_line else type_line.split("Type of Testing", 1)[1].strip()
-                
-                # Extract parent requirements
-                parent_reqs = test_case[sections["parent"] + 1:]
-                
-                valid_prefixes = ("ANG-PR-", "ANG-SRS-", "ANG-SDS-")
-                filtered_reqs = [
-                    req.strip() 
-                    for req in parent_reqs 
-                    if req.strip() and req.strip().startswith(valid_prefixes)
-                ]
-                parent_reqs = '\r\n'.join(filtered_reqs)
-                
-                # Create steps with matching expectations
-                tc_steps = []
-                for i, step in enumerate(steps):
-                    if step.strip():  # Solo incluir pasos no vacíos
-                        tc_steps.append({
-                            "content": step,
-                            "expected": acceptance[i] if i < len(acceptance) else "",
-                            "additional_info": "",
-                            "refs": ""
-                        })
+        # Determine group from CM ID; its section ID is resolved by name later
+        group_type = test_id.split("-")[2]  # BUS, PERF, etc.
+        section = GROUP_SECTIONS[group_type]
+        
+        # Encontrar los índices de las secciones
+        sections = {
+            "summary": next(i for i, text in enumerate(test_case) if text == "Summary"),
+            "scenario": next(i for i, text in enumerate(test_case) if text == "Test Case Scenario"),
+            "acceptance": next(i for i, text in enumerate(test_case) if text == "Acceptance Criteria"),
+            "type": next(i for i, text in enumerate(test_case) if "Type of Testing" in text),
+            "parent": next(i for i, text in enumerate(test_case) if text == "Parent Requirements and Specifications")
+        }
+        
+        # Process sections
+        summary = test_case[sections["summary"] + 1:sections["scenario"]]
+        summary = '\n'.join(map(str, [i for i in summary if i]))
+        
+        # Extract preconditions and steps
+        scenario = test_case[sections["scenario"] + 1:sections["acceptance"]]
+        preconds = []
+        steps = []
+        
+        # Flag para saber si ya pasamos la línea "The operator follows the following steps:"
+        found_operator_line = False
+        
+        for line in scenario:
+            line = line.strip()
+            if not line:
+                continue
                 
-                # Extract test set from preconditions
-                test_set_match = re.search(r"Test Set ([A-O])", '\n'.join(preconds))
-                if test_set_match:
-                    test_set_letter = test_set_match.group(1)
-                    test_set_id = TEST_SET_MAP.get(test_set_letter)
+            if "The operator follows the following steps:" in line:
+                found_operator_line = True
+                preconds.append(line)
+            elif not found_operator_line:
+                # Todo antes de "The operator follows..." va en preconds
+                preconds.append(line)
+            else:
+                # Todo después de "The operator follows..." va en steps
+                if any(keyword in line.lower() for keyword in ["use test set", "download"]):
+                    preconds.append(line)
                 else:
-                    print(f"Warning: Could not find test set in preconditions for {test_id}")
-                    test_set_id = None
-
-                return {
-                    "title": title,
-                    "section_id": section_id,
-                    "template_id": 2,
-                    "type_id": 3,
-                    "priority_id": 2,
-                    "milestone_id": milestone_id,
-                    "custom_cm_id": test_id,
-                    "custom_test_set": test_set_id,
-                    "custom_summary": summary,
-                    "custom_preconds": '\r\n'.join(preconds),
-                    "custom_tc_steps": tc_steps,
-                    "custom_testing_type": testing_type,
-                    "custom_parent_requirements": parent_reqs
-                }
-            except Exception as e:
-                print(f"Error processing test case {test_id}: {str(e)}")
-                return None
-    
-    return None
+                    steps.append(line)
+        
+        # Extract acceptance criteria
+        acceptance = test_case[sections["acceptance"] + 1:sections["type"]]
+        acceptance = [a for a in acceptance if a.strip()]
+        
+        # Extract testing type (extraer de la misma línea después de los dos puntos)
+        type_line = test_case[sections["type"]]
+        testing_type = type_line.split("Type of Testing:", 1)[1].strip() if "Type of Testing:" in type_line else type_line.split("Type of Testing", 1)[1].strip()
+        
+        # Extract parent requirements
+        parent_reqs = test_case[sections["parent"] + 1:]
+        
+        valid_prefixes = ("ANG-PR-", "ANG-SRS-", "ANG-SDS-")
+        filtered_reqs = [
+            req.strip() 
+            for req in parent_reqs 
+            if req.strip() and req.strip().startswith(valid_prefixes)
+        ]
+        parent_reqs = '\r\n'.join(filtered_reqs)
+        
+        # Create steps with matching expectations
+        tc_steps = []
+        for i, step in enumerate(steps):
+            if step.strip():  # Solo incluir pasos no vacíos
+                tc_steps.append({
+                    "content": step,
+                    "expected": acceptance[i] if i < len(acceptance) else "",
+                    "additional_info": "",
+                    "refs": ""
+                })
+        
+        # Extract test set from preconditions
+        test_set_match = re.search(r"Test Set ([A-O])", '\n'.join(preconds))
+        if test_set_match:
+            test_set_letter = test_set_match.group(1)
+            test_set_id = TESTRAIL_TEST_SET_MAP.get(test_set_letter)
+        else:
+            logger.warning("Could not find test set in preconditions", extra={"cm_id": test_id})
+            test_set_id = None
 
-def compare_and_prompt(doc_case: Dict, testrail_case: Dict = None) -> Dict:
-    """Compare test cases and ask user for confirmation on differences."""
-    # For existing test case comparison
+        return {
+            "title": title,
+            "section": section,
+            "section_id": None,  # Resolved from the section name, see with_section_id
+            "template_id": 2,
+            "type_id": 3,
+            "priority_id": 2,
+            "milestone_id": milestone_id,
+            "custom_cm_id": test_id,
+            "custom_test_set": test_set_id,
+            "custom_summary": summary,
+            "custom_preconds": '\r\n'.join(preconds),
+            "custom_tc_steps": tc_steps,
+            "custom_testing_type": testing_type,
+            "custom_parent_requirements": parent_reqs
+        }
+    except Exception as e:
+        logger.error("Error processing test case", extra={"cm_id": test_id, "error": str(e)})
+        return None
+
+PARSER_BACKENDS = ("docx", "lxml")
+
+def iter_document_texts(doc: Union[str, Document], backend: str = "docx") -> Iterable[str]:
+    """
+    Iterate the block texts of a Word document.
+    Args:
+        doc: Path to the Word document or an already loaded document
+        backend: "docx" walks the python-docx object model, "lxml" streams
+            word/document.xml with flat memory use (paths only)
+    """
+    if backend == "lxml":
+        if isinstance(doc, Document):
+            raise ValueError("The lxml backend reads documents from a path")
+        return iter_block_texts(doc)
+    if backend != "docx":
+        raise ValueError(f"Unknown parser backend '{backend}'")
+    if not isinstance(doc, Document):
+        doc = docx.Document(doc)
+    return (block.text for block in iter_block_items(doc))
+
+def build_test_case_index(doc: Union[str, Document], milestone_id: int,
+                          backend: str = "docx") -> Dict[str, Optional[Dict]]:
+    """
+    Parse every test case of a Word document in a single pass.
+    Args:
+        doc: Path to the Word document or an already loaded document
+        milestone_id: ID of the milestone selected by user
+        backend: Parser backend, see iter_document_texts
+    Returns:
+        A dict mapping each CM ID to its parsed test case, in document order.
+        Test cases that could not be parsed map to None. When an ID appears
+        more than once, the first occurrence wins.
+    """
+    metrics = get_metrics()
+    with metrics.span("docx_load", backend=backend) as span:
+        test_cases = split_test_case_blocks(iter_document_texts(doc, backend))
+        span["blocks"] = len(test_cases)
+
+    index = {}
+    with metrics.span("case_extraction", cases=len(test_cases)):
+        for test_case in test_cases:
+            test_id = test_case[0].split()[0].strip()
+            if test_id not in index:
+                index[test_id] = parse_test_case(test_case, milestone_id)
+
+    return index
+
+def section_names(test_case_index: Dict[str, Optional[Dict]]) -> List[str]:
+    """Names of the sections the parsed test cases belong to, in document order."""
+    return list(dict.fromkeys(doc_case["section"] for doc_case in test_case_index.values() if doc_case))
+
+def with_section_id(doc_case: Dict, section_ids: Dict[str, int]) -> Dict:
+    """Copy of a parsed test case with its section ID, None while the section does not exist."""
+    return dict(doc_case, section_id=section_ids.get(doc_case["section"]))
+
+def get_test_case(index: Dict[str, Optional[Dict]], test_id: str) -> Optional[Dict]:
+    """Look up a parsed test case by CM ID in an index built by build_test_case_index."""
+    return index.get(test_id)
+
+_index_cache: Dict[Tuple, Dict[str, Optional[Dict]]] = {}
+
+def extract_test_case_from_docx(doc_path: str, test_id: str, milestone_id: int,
+                                section_ids: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    Extract test case information from Word document.
+    The document is parsed once and its index reused for as long as the file
+    is unchanged, so looking up every ID of a document stays linear.
+    Args:
+        doc_path: Path to the Word document
+        test_id: Test case ID to extract
+        milestone_id: ID of the milestone selected by user
+        section_ids: Section IDs by name, e.g. from RailClient.sections;
+            section_id stays None when not given
+    """
+    stat = os.stat(doc_path)
+    key = (os.path.abspath(doc_path), stat.st_mtime_ns, stat.st_size, milestone_id)
+    index = _index_cache.get(key)
+    if index is None:
+        index = build_test_case_index(doc_path, milestone_id)
+        _index_cache.clear()
+        _index_cache[key] = index
+    doc_case = get_test_case(index, test_id)
+    if doc_case and section_ids is not None:
+        doc_case = with_section_id(doc_case, section_ids)
+    return doc_case
+
+# Label to ID maps of dropdown fields, so labels and IDs compare equal
+FIELD_LABELS = {
+    "custom_test_set": TESTRAIL_TEST_SET_MAP
+}
+
+def build_case_updates(doc_case: Dict, testrail_case=None) -> Tuple[Dict, Dict]:
+    """
+    Work out which fields have to be sent to TestRail for a document case.
+    Args:
+        doc_case: Test case extracted from the Word document
+        testrail_case: Existing TestRail case, or None if the case is new
+    Returns:
+        A tuple (updates, changes). For a new case, updates holds every
+        required field. For an existing case, it only holds changed fields,
+        and changes maps each of them to its (testrail_value, doc_value) pair.
+        Both are empty when nothing changed.
+    """
     updates = {}
     
     required_fields = {
@@ -246,7 +347,7 @@ def compare_and_prompt(doc_case: Dict, testrail_case: Dict = None) -> Dict:
         if field in doc_case:
             updates[field] = doc_case[field]
         else:
-            print(f"Warning: Required field '{field}' not found in document case")
+            logger.warning("Required field not found in document case", extra={"field": field})
     
     updates.update({
         "type_id": 3,
@@ -255,10 +356,26 @@ def compare_and_prompt(doc_case: Dict, testrail_case: Dict = None) -> Dict:
         "section_id": doc_case["section_id"],
         "custom_cm_id": doc_case["custom_cm_id"]
     })
+
+    if testrail_case is None:
+        return updates, {}
+
+    changes = diff_case(updates, testrail_case, labels=FIELD_LABELS)
+    return {field: updates[field] for field in changes}, changes
+
+def compare_and_prompt(doc_case: Dict, testrail_case=None) -> Dict:
+    """Compare test cases and ask user for confirmation on differences."""
+    updates, changes = build_case_updates(doc_case, testrail_case)
     
     if updates:
         print("\nProposed updates:")
-        print(json.dumps(updates, indent=2))
+        if changes:
+            for field, (old, new) in changes.items():
+                print(f"  {field}:")
+                print(f"    - {json.dumps(old)}")
+                print(f"    + {json.dumps(new)}")
+        else:
+            print(json.dumps(updates, indent=2))
         
         response = input("\nApply these updates to TestRail? (y/n): ").lower()
         if response == 'y':
@@ -288,57 +405,32 @@ def update_testrail_case(client: RailClient, case_id: int, updates: Dict):
 
 def select_milestone() -> int:
     """Let user select which milestone to update."""
+    milestones = milestone_map()
     print("\nAvailable milestones:")
-    for version, milestone_id in sorted(MILESTONE_MAP.items()):
+    for version, milestone_id in sorted(milestones.items()):
         print(f"{version} (ID: {milestone_id})")
     
     while True:
         version = input("\nSelect milestone version (e.g., 2.0): ").strip()
-        if version in MILESTONE_MAP:
-            return MILESTONE_MAP[version]
+        if version in milestones:
+            return milestones[version]
         print("Invalid version. Please try again.")
 
-def extract_test_set_id(text: str) -> int:
-    """Extract test set ID from preconditions text."""
-    import re
-    match = re.search(r"Test Set ([A-O])", text)
-    if match:
-        test_set = match.group(1)
-        return TEST_SET_MAP.get(test_set)
-    return None
-
-def extract_test_ids(doc: Document) -> List[str]:
-    """
-    Extract all test case IDs from the Word document.
-    Returns a list of test case IDs (e.g., ['ANG-TCS-BUS-001', 'ANG-TCS-PERF-002']).
-    """
-    test_ids = []
-    
-    # Iterate through all blocks in the document
-    for block in iter_block_items(doc):
-        text = block.text.strip()
-        # Look for lines that start with ANG-TCS-
-        if text.startswith("ANG-TCS-"):
-            # Extract just the ID part (first word in the line)
-            test_id = text.split()[0].strip()
-            if test_id not in test_ids:  # Avoid duplicates
-                test_ids.append(test_id)
-    
-    if not test_ids:
-        print("⚠️  No test case IDs found in document")
-    else:
-        print(f"Found {len(test_ids)} test cases")
-    
-    return test_ids
-
 def main():
     # Initialize TestRail client
     client = RailClient()
     print("Connected to TestRail successfully")
+
+    # Writes are journaled to the same file as apply, which must not be clobbered mid-recovery
+    unfinished = SyncJournal.unfinished()
+    if unfinished:
+        print(f"⚠️  {SYNC_JOURNAL_PATH} records {unfinished} unfinished writes of an interrupted apply; "
+              "finish it with `apply --resume` first")
+        return
     
     # Select milestone
     milestone_id = select_milestone()
-    version = next(v for v, m in MILESTONE_MAP.items() if m == milestone_id)
+    version = next(v for v, m in milestone_map().items() if m == milestone_id)
     print(f"\nProcessing milestone: {version} (ID: {milestone_id})")
     
     # Find and select Word document
@@ -348,48 +440,884 @@ def main():
         
     print(f"\nProcessing document: {selected_doc}")
     
-    # Get test cases from TestRail
-    testrail_cases = client.get_cases(milestone_id=milestone_id)
-    
-    # Create a map of CM IDs to TestRail cases
-    testrail_case_map = {case.custom_cm_id: case for case in testrail_cases}
+    # Map CM IDs to TestRail cases of any milestone, so cases filed elsewhere are moved, not duplicated
+    testrail_case_map = client.cases_by_cm_id()
     
-    # Process test cases from Word
-    doc = docx.Document(selected_doc)
-    for test_id in extract_test_ids(doc):
-        print(f"\nProcessing test case: {test_id}")
+    writer = BatchWriter(client.api)
+
+    # Parse every test case from Word in a single pass
+    test_case_index = build_test_case_index(selected_doc, milestone_id)
+    if not test_case_index:
+        print("⚠️  No test case IDs found in document")
+    else:
+        print(f"Found {len(test_case_index)} test cases")
+
+    # Resolve every section of new cases up front, creating the missing ones in one batch
+    section_ids = client.sections.ensure(section_names(test_case_index))
+
+    # Approved writes are sent even when the review is cut short, e.g. by Ctrl+C
+    try:
+        for test_id in test_case_index:
+            print(f"\nProcessing test case: {test_id}")
         
-        # Extract test case from Word
-        doc_case = extract_test_case_from_docx(selected_doc, test_id, milestone_id)
-        if not doc_case:
-            print(f"⚠️  Failed to extract test case {test_id} from Word document")
-            continue
+            # Look up the parsed test case
+            doc_case = get_test_case(test_case_index, test_id)
+            if not doc_case:
+                print(f"⚠️  Failed to extract test case {test_id} from Word document")
+                continue
         
-        # Get existing case or None if it's new
-        testrail_case = testrail_case_map.get(test_id)
+            # Get existing case or None if it's new
+            testrail_case = testrail_case_map.get(test_id)
+            if testrail_case:
+                # Existing cases stay in their suite, which may not be the default one
+                suite_section_ids = client.sections_for(testrail_case.suite_id).ensure([doc_case["section"]])
+                doc_case = with_section_id(doc_case, suite_section_ids)
+            else:
+                doc_case = with_section_id(doc_case, section_ids)
         
-        # Compare and get updates
-        updates = compare_and_prompt(doc_case, testrail_case)
+            # Skip cases that match TestRail already
+            if not build_case_updates(doc_case, testrail_case)[0]:
+                print("No differences found, skipping")
+                continue
+
+            # Compare and get updates
+            updates = compare_and_prompt(doc_case, testrail_case)
         
-        if updates:
-            try:
+            if updates:
                 if testrail_case:
-                    # Update existing case
-                    update_testrail_case(client, testrail_case.id, updates)
+                    # Queue update of existing case
+                    writer.update(test_id, testrail_case.id, updates, testrail_case.suite_id)
                 else:
-                    # Create new case
-                    section_id = doc_case['section_id']
-                    result = client.api.send_post(f'add_case/{section_id}', updates)
-                    print(f"✅ Successfully created new test case (ID: {result['id']})")
-            except Exception as e:
-                print(f"❌ Error updating TestRail: {str(e)}")
-                if input("\nContinue with next test case? (y/n): ").lower() != 'y':
-                    print("Stopping process...")
-                    break
+                    # Queue creation of new case
+                    writer.create(test_id, doc_case['section_id'], updates)
         
-        if input("\nContinue to next test case? (y/n): ").lower() != 'y':
-            print("Stopping process...")
-            break
+            if input("\nContinue to next test case? (y/n): ").lower() != 'y':
+                print("Stopping process...")
+                break
+    finally:
+        if len(writer):
+            print(f"\nSending {len(writer)} queued changes to TestRail...")
+            # Every write is journaled, so an interrupted run shows which ones landed
+            with SyncJournal() as journal:
+                writer.journal = journal
+                report_write_results(writer.flush())
+
+def report_write_results(results: List[WriteResult]) -> bool:
+    """Print the outcome of every write and return True when all of them succeeded."""
+    for result in results:
+        if result.ok and result.action == CREATE:
+            print(f"✅ Successfully created new test case {result.cm_id} (ID: {result.case_id})")
+        elif result.ok:
+            print(f"✅ Successfully updated case {result.case_id} ({result.cm_id}): {', '.join(result.fields)}")
+        else:
+            print(f"❌ Error writing {result.cm_id} to TestRail: {result.error}")
+
+    failed = sum(1 for result in results if not result.ok)
+    print(f"\n{len(results) - failed} succeeded, {failed} failed")
+    return not failed
+
+CHANGE_SET_PATH = OUTPUT_PATH / "change_set.json"
+
+def resolve_milestone(value: str, project_id: int = TESTRAIL_PROJECT_ID) -> int:
+    """Resolve a milestone of a project given as a version (e.g. 2.0 or v2.0) or as a TestRail milestone ID."""
+    milestones = milestone_map(project_id)
+    version = value[1:] if value[:1] in ("v", "V") else value
+    if version in milestones:
+        return milestones[version]
+    if value.isdigit() and int(value) in milestones.values():
+        return int(value)
+    raise argparse.ArgumentTypeError(
+        f"unknown milestone '{value}' of project {project_id}, expected one of: {', '.join(sorted(milestones))}"
+    )
+
+def resolve_project(value: str) -> int:
+    """Resolve a project given as a name from TESTRAIL_PROJECT_MAP or as a TestRail project ID."""
+    if value in TESTRAIL_PROJECT_MAP:
+        return TESTRAIL_PROJECT_MAP[value]
+    if value.isdigit() and (int(value) in TESTRAIL_PROJECT_MAP.values() or int(value) in TESTRAIL_MILESTONE_MAP):
+        return int(value)
+    raise argparse.ArgumentTypeError(
+        f"unknown project '{value}', expected one of: {', '.join(sorted(TESTRAIL_PROJECT_MAP))}"
+    )
+
+def collect_documents(patterns: List[str]) -> List[str]:
+    """Expand directories and glob patterns into the .docx files they contain."""
+    doc_paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.docx")))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]
+        for path in matches:
+            # Skip the lock files Word leaves next to open documents
+            if os.path.basename(path).startswith("~$") or path in doc_paths:
+                continue
+            doc_paths.append(path)
+    return doc_paths
+
+# Bump when parsing changes, so indexes cached by the fingerprint store are rebuilt
+INDEX_VERSION = "3"
+
+def index_version(backend: str) -> str:
+    """Version under which indexes are cached; each parser backend caches its own."""
+    return f"{INDEX_VERSION}/{backend}"
+
+def _index_document(job: Tuple[str, int, str]) -> Tuple[Dict[str, Optional[Dict]], Dict]:
+    doc_path, milestone_id, backend = job
+    index = build_test_case_index(doc_path, milestone_id, backend)
+    # Spans are handed back with the index, as worker processes have their own metrics
+    return index, get_metrics().drain_spans()
+
+def _reset_worker_metrics():
+    # Forked workers inherit the parent's spans, which must not be sent back
+    get_metrics().reset()
+
+def build_multi_document_index(doc_paths: List[str], milestone_id: int, backend: str = "docx",
+                               max_workers: Optional[int] = None,
+                               store: Optional[FingerprintStore] = None,
+                               pool: Optional[Executor] = None) -> Tuple[Dict[str, Optional[Dict]], Dict[str, List[str]]]:
+    """
+    Parse several Word documents in parallel and merge them into one index.
+    Args:
+        doc_paths: Paths to the Word documents
+        milestone_id: ID of the milestone selected by user
+        backend: Parser backend, see iter_document_texts
+        max_workers: Number of worker processes; defaults to the number of CPUs
+        store: Fingerprint store; documents whose content was parsed before
+            are read from it instead of being parsed again
+        pool: Process pool shared with other callers, e.g. one per sync
+            target; its workers must be started with _reset_worker_metrics
+    Returns:
+        A tuple (index, sources). index maps each CM ID to its parsed test
+        case, taken from the first document defining it. sources maps each
+        CM ID to every document defining it, so IDs with several sources
+        are duplicates across documents.
+    """
+    indexes = [None] * len(doc_paths)
+    doc_hashes = []
+    if store:
+        doc_hashes = [hash_file(doc_path) for doc_path in doc_paths]
+        for i, doc_hash in enumerate(doc_hashes):
+            indexes[i] = store.get_index(doc_hash, milestone_id, index_version(backend))
+
+    pending = [i for i, doc_index in enumerate(indexes) if doc_index is None]
+    jobs = [(doc_paths[i], milestone_id, backend) for i in pending]
+    if pool is not None and jobs:
+        parsed = list(pool.map(_index_document, jobs))
+    elif len(jobs) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_reset_worker_metrics) as pool:
+            parsed = list(pool.map(_index_document, jobs))
+    else:
+        parsed = [_index_document(job) for job in jobs]
+
+    for i, (doc_index, spans) in zip(pending, parsed):
+        get_metrics().merge_spans(spans)
+        indexes[i] = doc_index
+        if store:
+            store.put_index(doc_hashes[i], milestone_id, index_version(backend), doc_index)
+
+    index = {}
+    sources = {}
+    for doc_path, doc_index in zip(doc_paths, indexes):
+        for test_id, doc_case in doc_index.items():
+            sources.setdefault(test_id, []).append(doc_path)
+            if test_id not in index:
+                index[test_id] = doc_case
+    return index, sources
+
+def find_duplicate_ids(sources: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Keep the CM IDs defined by more than one document."""
+    return {test_id: paths for test_id, paths in sources.items() if len(paths) > 1}
+
+def split_synced_cases(test_case_index: Dict[str, Optional[Dict]], store: FingerprintStore,
+                       project_id: int = TESTRAIL_PROJECT_ID) -> Tuple[Dict[str, Optional[Dict]], List[str]]:
+    """
+    Separate the test cases that are unchanged since their last successful sync.
+    Returns:
+        A tuple (pending, synced): the index of cases that still have to be
+        compared with TestRail, and the CM IDs that can be skipped.
+    """
+    pending = {}
+    synced = []
+    for test_id, doc_case in test_case_index.items():
+        last_sync = store.synced_case(project_id, test_id) if doc_case else None
+        if last_sync and last_sync[0] == hash_case(doc_case):
+            synced.append(test_id)
+        else:
+            pending[test_id] = doc_case
+    return pending, synced
+
+def new_change_set(milestone_id: int, sources: Optional[Dict[str, List[str]]] = None,
+                   project_id: int = TESTRAIL_PROJECT_ID) -> Dict:
+    """Empty change set for a milestone and the documents it was planned from."""
+    documents = []
+    for paths in (sources or {}).values():
+        documents.extend(os.path.abspath(path) for path in paths)
+
+    return {
+        "project_id": project_id,
+        "milestone_id": milestone_id,
+        "documents": list(dict.fromkeys(documents)),
+        "sections": [],
+        "creates": [],
+        "updates": [],
+        "noops": [],
+        "errors": []
+    }
+
+def build_change_set(client: RailClient, test_case_index: Dict[str, Optional[Dict]], milestone_id: int,
+                     sources: Optional[Dict[str, List[str]]] = None,
+                     store: Optional[FingerprintStore] = None,
+                     testrail_case_map: Optional[Dict[str, TestRailCase]] = None) -> Dict:
+    """
+    Compare parsed test cases with TestRail without writing anything.
+    Args:
+        client: Connected TestRail client
+        test_case_index: Parsed test cases by CM ID, see build_multi_document_index
+        milestone_id: ID of the milestone to sync
+        sources: Documents defining each CM ID, used to report errors
+        store: Fingerprint store recording the cases found already in sync
+        testrail_case_map: TestRail cases by CM ID, when already loaded;
+            every loaded case of the client otherwise. Cases are matched
+            whatever their milestone, which is only the value written.
+    Returns:
+        A JSON-serializable change set with the creates, updates (including
+        their field diffs), no-ops and extraction errors, for apply_change_set.
+    """
+    sources = sources or {}
+    if testrail_case_map is None:
+        testrail_case_map = client.cases_by_cm_id()
+
+    change_set = new_change_set(milestone_id, sources, client.project_id)
+    names = section_names(test_case_index)
+    # Section IDs by name per suite: None for new cases, the case's suite for existing ones
+    section_ids = {None: client.sections.resolve_all(names)}
+    missing = set()
+    with get_metrics().span("diff", cases=len(test_case_index)):
+        for test_id, doc_case in test_case_index.items():
+            if not doc_case:
+                change_set["errors"].append({
+                    "cm_id": test_id,
+                    "document": sources.get(test_id, [None])[0],
+                    "error": "Failed to extract test case from Word document"
+                })
+                continue
+
+            testrail_case = testrail_case_map.get(test_id)
+            case_hash = hash_case(doc_case)
+            suite_id = testrail_case.suite_id if testrail_case else None
+            if suite_id not in section_ids:
+                section_ids[suite_id] = client.sections_for(suite_id).resolve_all(names)
+            doc_case = with_section_id(doc_case, section_ids[suite_id])
+            if doc_case["section_id"] is None:
+                missing.add(doc_case["section"])
+            updates, changes = build_case_updates(doc_case, testrail_case)
+            if not updates:
+                change_set["noops"].append(test_id)
+                if store:
+                    store.record_synced(change_set["project_id"], test_id, case_hash, testrail_case.id)
+            elif testrail_case:
+                change_set["updates"].append({
+                    "cm_id": test_id,
+                    "case_id": testrail_case.id,
+                    "suite_id": testrail_case.suite_id,
+                    "section": doc_case["section"],
+                    "case_hash": case_hash,
+                    "fields": updates,
+                    "diff": {field: {"old": old, "new": new} for field, (old, new) in changes.items()}
+                })
+            else:
+                change_set["creates"].append({
+                    "cm_id": test_id,
+                    "section": doc_case["section"],
+                    "section_id": doc_case["section_id"],
+                    "case_hash": case_hash,
+                    "fields": updates
+                })
+
+    # Created by apply_change_set, before any case is written
+    change_set["sections"] = [name for name in names if name in missing]
+    return change_set
+
+def apply_change_set(client: RailClient, change_set: Dict,
+                     store: Optional[FingerprintStore] = None,
+                     journal: Optional[SyncJournal] = None) -> List[WriteResult]:
+    """
+    Send every create and update of a change set to TestRail through the batch writer.
+    When a fingerprint store is given, successfully written cases are recorded
+    in it, so the next plan skips them until they change again.
+    When a journal resumed from an interrupted run is given, writes it records
+    as completed are not sent again, and creates it records as started are
+    looked up by CM ID first, so a case that did land is not created twice.
+    """
+    project_id = change_set.get("project_id", TESTRAIL_PROJECT_ID)
+    if change_set.get("sections"):
+        assign_new_sections(client, change_set)
+    writer = BatchWriter(client.api, project_id=project_id, journal=journal)
+    done = []
+    in_flight = []
+    for update in change_set["updates"]:
+        state = journal.state(update["cm_id"], UPDATE, update["fields"]) if journal else None
+        if state and state["event"] == COMPLETED:
+            done.append(WriteResult(update["cm_id"], UPDATE, update["case_id"], fields=list(update["fields"])))
+        else:
+            writer.update(update["cm_id"], update["case_id"], update["fields"], update.get("suite_id"))
+    for create in change_set["creates"]:
+        state = journal.state(create["cm_id"], CREATE, create["fields"]) if journal else None
+        if state and state["event"] == COMPLETED:
+            done.append(WriteResult(create["cm_id"], CREATE, state.get("case_id"), fields=list(create["fields"])))
+        elif state and state["event"] == STARTED:
+            in_flight.append(create)
+        else:
+            writer.create(create["cm_id"], create["section_id"], create["fields"])
+
+    if in_flight:
+        landed = find_created_cases(client, project_id, in_flight)
+        for create in in_flight:
+            case_id = landed.get(create["cm_id"])
+            if case_id:
+                journal.completed(create["cm_id"], CREATE, create["fields"], case_id, reconciled=True)
+                done.append(WriteResult(create["cm_id"], CREATE, case_id, fields=list(create["fields"])))
+            else:
+                writer.create(create["cm_id"], create["section_id"], create["fields"])
+    if done:
+        print(f"Skipping {len(done)} writes completed by the interrupted run")
+    results = done + writer.flush()
+
+    if store:
+        case_hashes = {
+            entry["cm_id"]: entry.get("case_hash")
+            for entry in change_set["updates"] + change_set["creates"]
+        }
+        for result in results:
+            if result.ok and case_hashes.get(result.cm_id):
+                store.record_synced(project_id, result.cm_id, case_hashes[result.cm_id], result.case_id)
+    return results
+
+def assign_new_sections(client: RailClient, change_set: Dict):
+    """
+    Create the sections a change set is missing, one batch per suite, and fill in their IDs.
+    New cases get sections of the default suite, existing cases sections of their own suite.
+    """
+    print(f"Creating sections missing from TestRail: {', '.join(change_set['sections'])}")
+    by_suite = {}
+    for create in change_set["creates"]:
+        if create["section_id"] is None:
+            by_suite.setdefault(None, []).append(create)
+    for update in change_set["updates"]:
+        if "section_id" in update["fields"] and update["fields"]["section_id"] is None:
+            by_suite.setdefault(update.get("suite_id"), []).append(update)
+    for suite_id, entries in by_suite.items():
+        section_ids = client.sections_for(suite_id).ensure(entry["section"] for entry in entries)
+        for entry in entries:
+            entry["fields"]["section_id"] = section_ids[entry["section"]]
+            if "section_id" in entry:  # Creates also carry it next to their fields
+                entry["section_id"] = entry["fields"]["section_id"]
+    change_set["sections"] = []
+
+def find_created_cases(client: RailClient, project_id: int, creates: List[Dict]) -> Dict[str, int]:
+    """Look up by CM ID the cases of creates whose outcome is unknown; maps each one found to its case ID."""
+    cm_ids = {create["cm_id"] for create in creates}
+    section_ids = sorted({create["section_id"] for create in creates})
+    cases = client.fetcher.fetch_cases(project_id, section_id=section_ids)
+    return {case["custom_cm_id"]: case["id"] for case in cases if case.get("custom_cm_id") in cm_ids}
+
+def summarize_change_set(change_set: Dict) -> str:
+    summary = (f"{len(change_set['creates'])} to create, {len(change_set['updates'])} to update, "
+               f"{len(change_set['noops'])} unchanged, {len(change_set['errors'])} errors")
+    if change_set.get("sections"):
+        summary += f", {len(change_set['sections'])} new sections"
+    return summary
+
+def plan_command(args) -> int:
+    doc_paths = collect_documents(args.documents)
+    if not doc_paths:
+        print("No .docx files found")
+        return 1
+
+    store = None if args.no_cache else FingerprintStore()
+
+    try:
+        print(f"Parsing {len(doc_paths)} documents...")
+        test_case_index, sources = build_multi_document_index(
+            doc_paths, args.milestone, args.parser, args.jobs, store
+        )
+        duplicates = find_duplicate_ids(sources)
+        if duplicates:
+            print(f"\n❌ {len(duplicates)} test case IDs are defined in more than one document:")
+            for test_id, paths in duplicates.items():
+                print(f"  - {test_id}: {', '.join(paths)}")
+            return 1
+        print(f"Found {len(test_case_index)} test cases")
+
+        synced = []
+        if store:
+            test_case_index, synced = split_synced_cases(test_case_index, store)
+            print(f"{len(synced)} test cases unchanged since the last sync")
+
+        if test_case_index:
+            with RailClient() as client:
+                change_set = build_change_set(client, test_case_index, args.milestone, sources, store)
+        else:
+            change_set = new_change_set(args.milestone, sources)
+        change_set["noops"].extend(synced)
+
+        output = args.output
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(change_set, f, indent=2)
+
+        print(f"\nPlan: {summarize_change_set(change_set)}")
+        print(f"Change set written to {output}")
+        return 1 if change_set["errors"] else 0
+    finally:
+        if store:
+            store.close()
+
+def apply_command(args) -> int:
+    with open(args.change_set, encoding="utf-8") as f:
+        change_set = json.load(f)
+
+    print(f"\nApplying: {summarize_change_set(change_set)}")
+    if not change_set["creates"] and not change_set["updates"]:
+        print("Nothing to apply")
+        return 0
+    store = None if args.no_cache else FingerprintStore()
+    project_id = change_set.get("project_id", TESTRAIL_PROJECT_ID)
+    journal_path = args.journal or change_set.get("journal") or SYNC_JOURNAL_PATH
+    try:
+        with RailClient(project_id=project_id) as client, SyncJournal(journal_path, resume=args.resume) as journal:
+            ok = report_write_results(apply_change_set(client, change_set, store, journal))
+    finally:
+        if store:
+            store.close()
+    return 0 if ok else 1
+
+def update_case_map(testrail_case_map: Dict[str, TestRailCase], change_set: Dict,
+                    results: List[WriteResult]):
+    """Reflect the successful writes of a change set in a map of TestRail cases by CM ID."""
+    entries = {entry["cm_id"]: entry for entry in change_set["updates"] + change_set["creates"]}
+    for result in results:
+        if not result.ok or result.cm_id not in entries:
+            continue
+        fields = entries[result.cm_id]["fields"]
+        testrail_case = testrail_case_map.get(result.cm_id)
+        if result.action == CREATE or testrail_case is None:
+            testrail_case_map[result.cm_id] = TestRailCase(dict(fields, id=result.case_id))
+        else:
+            for field, value in fields.items():
+                setattr(testrail_case, field, value)
+
+def watch_command(args) -> int:
+    doc_paths = collect_documents(args.documents)
+    if not doc_paths:
+        print("No .docx files found")
+        return 1
+    store = None if args.no_cache else FingerprintStore()
+
+    with RailClient() as client:
+        testrail_case_map = client.cases_by_cm_id()
+        doc_indexes = {}
+        doc_stamps = {}
+        # CM ID -> document of the cases whose write failed, retried on every poll until they land
+        failed = {}
+        print(f"\nWatching {len(doc_paths)} documents every {args.interval}s, press Ctrl+C to stop")
+        try:
+            while True:
+                for doc_path in doc_paths:
+                    try:
+                        stat = os.stat(doc_path)
+                    except FileNotFoundError:
+                        continue
+                    stamp = (stat.st_mtime_ns, stat.st_size)
+                    affected = {}
+                    if doc_stamps.get(doc_path) != stamp:
+                        try:
+                            doc_index = build_test_case_index(doc_path, args.milestone, args.parser)
+                        except Exception as e:
+                            # Most likely caught halfway through a save; retry on the next poll
+                            print(f"⚠️  Could not read {doc_path}: {str(e)}")
+                            continue
+                        doc_stamps[doc_path] = stamp
+
+                        previous = doc_indexes.get(doc_path, {})
+                        doc_indexes[doc_path] = doc_index
+                        affected = {
+                            test_id: doc_case for test_id, doc_case in doc_index.items()
+                            if test_id not in previous or previous[test_id] != doc_case
+                        }
+
+                    doc_index = doc_indexes.get(doc_path, {})
+                    for test_id in [test_id for test_id, path in failed.items() if path == doc_path]:
+                        del failed[test_id]
+                        if test_id in doc_index:
+                            affected.setdefault(test_id, doc_index[test_id])
+                    for test_id in sync_watched_cases(client, doc_path, affected, doc_indexes,
+                                                      testrail_case_map, args.milestone, store):
+                        failed[test_id] = doc_path
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        finally:
+            if store:
+                store.close()
+    return 0
+
+def sync_watched_cases(client: RailClient, doc_path: str, affected: Dict[str, Optional[Dict]],
+                       doc_indexes: Dict[str, Dict], testrail_case_map: Dict[str, TestRailCase],
+                       milestone_id: int, store: Optional[FingerprintStore] = None) -> List[str]:
+    """
+    Push the test cases of a watched document that changed since the last poll.
+    Returns:
+        The CM IDs whose write failed, to be retried on the next poll.
+    """
+    if not affected:
+        return []
+    print(f"\n{time.strftime('%H:%M:%S')} {doc_path}: {len(affected)} test cases changed or pending")
+
+    sources = {}
+    for path, doc_index in doc_indexes.items():
+        for test_id in doc_index:
+            sources.setdefault(test_id, []).append(path)
+    duplicates = {test_id: paths for test_id, paths in find_duplicate_ids(sources).items()
+                  if test_id in affected}
+    if duplicates:
+        print(f"❌ Skipping {len(duplicates)} test case IDs defined in more than one document:")
+        for test_id, paths in duplicates.items():
+            print(f"  - {test_id}: {', '.join(paths)}")
+        affected = {test_id: doc_case for test_id, doc_case in affected.items()
+                    if test_id not in duplicates}
+
+    try:
+        change_set = build_change_set(client, affected, milestone_id, sources, store, testrail_case_map)
+        print(f"Plan: {summarize_change_set(change_set)}")
+        for error in change_set["errors"]:
+            print(f"⚠️  {error['cm_id']}: {error['error']}")
+        if not change_set["creates"] and not change_set["updates"]:
+            return []
+        results = apply_change_set(client, change_set, store)
+    except Exception as e:
+        print(f"❌ Could not sync {doc_path}, retrying on the next poll: {str(e)}")
+        return [test_id for test_id, doc_case in affected.items() if doc_case]
+    report_write_results(results)
+    update_case_map(testrail_case_map, change_set, results)
+    return [result.cm_id for result in results if not result.ok]
+
+def parse_target(value: str) -> Dict:
+    """
+    Parse a sync target given as [PROJECT:]MILESTONE=DOCUMENTS, e.g. project_name:2.0=specs/v2/.
+    The project is a name or ID from the constants and defaults to TESTRAIL_PROJECT_ID; the
+    documents are comma-separated paths, directories or glob patterns.
+    """
+    spec, sep, documents = value.partition("=")
+    if not sep or not documents:
+        raise argparse.ArgumentTypeError(f"target '{value}' is not of the form [PROJECT:]MILESTONE=DOCUMENTS")
+    project, _, milestone = spec.rpartition(":")
+    project_id = resolve_project(project) if project else TESTRAIL_PROJECT_ID
+    milestone_id = resolve_milestone(milestone, project_id)
+    return {
+        "project_id": project_id,
+        "milestone_id": milestone_id,
+        "version": next(v for v, m in milestone_map(project_id).items() if m == milestone_id),
+        "documents": [pattern for pattern in documents.split(",") if pattern]
+    }
+
+def target_label(target: Dict) -> str:
+    project = next((name for name, project_id in TESTRAIL_PROJECT_MAP.items()
+                    if project_id == target["project_id"]), str(target["project_id"]))
+    return f"{project}:{target['version']}"
+
+class TargetClaims:
+    """CM IDs claimed by the targets of a sync, so two milestones of a project never write the same case."""
+
+    def __init__(self):
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def claim(self, target: Dict, test_ids: Iterable[str]) -> Dict[str, str]:
+        """Claim CM IDs for a target; returns those another target claimed first, with its label."""
+        label = target_label(target)
+        conflicts = {}
+        with self._lock:
+            for test_id in test_ids:
+                owner = self._owners.setdefault((target["project_id"], test_id), label)
+                if owner != label:
+                    conflicts[test_id] = owner
+        return conflicts
+
+def sync_target(target: Dict, client: RailClient, backend: str = "docx", dry_run: bool = False,
+                store: Optional[FingerprintStore] = None, pool: Optional[Executor] = None,
+                claims: Optional[TargetClaims] = None) -> Dict:
+    """
+    Plan and apply one project/milestone target of a multi-target sync.
+    The change set is written to output/ and every write is journaled per
+    target. The change set names its journal, so a failed target can be
+    finished with `apply --resume`, and a rerun of the sync resumes a
+    journal left with unfinished writes instead of truncating it.
+    Returns:
+        A report of the target: its counts of planned and written cases,
+        its duration, and the error that stopped it, if any.
+    """
+    project_id, milestone_id = target["project_id"], target["milestone_id"]
+    name = f"{project_id}_{milestone_id}"
+    report = {
+        "target": target_label(target),
+        "project_id": project_id,
+        "milestone_id": milestone_id,
+        "documents": 0,
+        "cases": 0,
+        "creates": 0,
+        "updates": 0,
+        "noops": 0,
+        "errors": 0,
+        "written": 0,
+        "failed": 0,
+        "change_set": None,
+        "error": None
+    }
+    start = time.perf_counter()
+    try:
+        with get_metrics().span("target", target=report["target"]):
+            doc_paths = collect_documents(target["documents"])
+            if not doc_paths:
+                raise ValueError("no .docx files found")
+            report["documents"] = len(doc_paths)
+
+            test_case_index, sources = build_multi_document_index(
+                doc_paths, milestone_id, backend, store=store, pool=pool
+            )
+            duplicates = find_duplicate_ids(sources)
+            if duplicates:
+                raise ValueError(f"{len(duplicates)} test case IDs are defined in more than one document: "
+                                 f"{', '.join(duplicates)}")
+            report["cases"] = len(test_case_index)
+            conflicts = claims.claim(target, test_case_index) if claims else {}
+            for test_id in conflicts:
+                del test_case_index[test_id]
+
+            synced = []
+            if store:
+                test_case_index, synced = split_synced_cases(test_case_index, store, project_id)
+            if test_case_index:
+                change_set = build_change_set(client, test_case_index, milestone_id, sources, store)
+            else:
+                change_set = new_change_set(milestone_id, sources, project_id)
+            change_set["noops"].extend(synced)
+            change_set["errors"].extend(
+                {"cm_id": test_id, "document": sources[test_id][0], "error": f"Also synced by target {owner}"}
+                for test_id, owner in conflicts.items()
+            )
+
+            journal_path = SYNC_JOURNAL_PATH.with_name(f"{SYNC_JOURNAL_PATH.stem}_{name}.jsonl")
+            change_set["journal"] = str(journal_path)
+            output = OUTPUT_PATH / f"change_set_{name}.json"
+            os.makedirs(OUTPUT_PATH, exist_ok=True)
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(change_set, f, indent=2)
+            report["change_set"] = str(output)
+            for key in ("creates", "updates", "noops", "errors"):
+                report[key] = len(change_set[key])
+
+            if not dry_run and (change_set["creates"] or change_set["updates"]):
+                resume = SyncJournal.unfinished(journal_path) > 0
+                with SyncJournal(journal_path, resume=resume) as journal:
+                    results = apply_change_set(client, change_set, store, journal)
+                for result in results:
+                    if not result.ok:
+                        print(f"❌ {report['target']}: error writing {result.cm_id} to TestRail: {result.error}")
+                report["failed"] = sum(1 for result in results if not result.ok)
+                report["written"] = len(results) - report["failed"]
+    except Exception as e:
+        report["error"] = str(e)
+    report["duration_s"] = round(time.perf_counter() - start, 3)
+    status = "❌" if report["error"] or report["failed"] else "⚠️ " if report["errors"] else "✅"
+    print(f"{status} {report['target']}: {report['error'] or summarize_target(report)}")
+    return report
+
+def summarize_target(report: Dict) -> str:
+    """One line summary of a target report."""
+    return (f"{report['creates']} to create, {report['updates']} to update, {report['noops']} unchanged, "
+            f"{report['errors']} errors; {report['written']} written, {report['failed']} failed")
+
+def sync_targets(targets: List[Dict], backend: str = "docx", dry_run: bool = False,
+                 max_targets: int = TESTRAIL_MAX_TARGETS, jobs: Optional[int] = None,
+                 store: Optional[FingerprintStore] = None) -> List[Dict]:
+    """
+    Sync several project/milestone targets concurrently.
+    Every target runs in its own thread, but all of them share one TestRail
+    connection pool, the process-wide rate limiter, one case cache and one
+    process pool for parsing. Targets of the same project also share its
+    RailClient, so its cases are downloaded and its sections created once,
+    and a CM ID is only written by the first of them to claim it.
+    Returns:
+        The report of every target, in the order given.
+    """
+    max_targets = max(1, min(max_targets, len(targets)))
+    api = create_api_client(pool_size=TESTRAIL_MAX_WORKERS * max_targets)
+    case_store = CaseStore()
+    claims = TargetClaims()
+    clients = {}
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_reset_worker_metrics)
+    try:
+        # With fork, every worker is started on the first task: start them before any
+        # target thread runs, as forking next to running threads can deadlock
+        pool.submit(_reset_worker_metrics).result()
+        project_ids = list(dict.fromkeys(target["project_id"] for target in targets))
+        with ThreadPoolExecutor(max_workers=max_targets) as executor:
+            opening = {
+                project_id: executor.submit(RailClient, project_id=project_id, api=api, store=case_store)
+                for project_id in project_ids
+            }
+            # Collected one by one, so the clients opened before a failure are still closed
+            error = None
+            for project_id, future in opening.items():
+                try:
+                    clients[project_id] = future.result()
+                except Exception as e:
+                    error = error or e
+            if error:
+                raise error
+            return list(executor.map(
+                lambda target: sync_target(target, clients[target["project_id"]], backend, dry_run, store, pool, claims),
+                targets
+            ))
+    finally:
+        pool.shutdown()
+        for client in clients.values():
+            client.close()
+        api.close()
+        case_store.close()
+
+def report_targets(reports: List[Dict], path: Optional[str] = None) -> bool:
+    """Print one table for every target of a sync, optionally save it as JSON, and return True when all succeeded."""
+    columns = ("creates", "updates", "noops", "errors", "written", "failed")
+    print(f"\n{'target':24} {'create':>7} {'update':>7} {'same':>7} {'errors':>7} "
+          f"{'written':>7} {'failed':>7} {'time s':>7}")
+    for report in reports:
+        counts = " ".join(f"{report[column]:>7}" for column in columns)
+        print(f"{report['target'][:24]:24} {counts} {report['duration_s']:>7.2f}"
+              + (f"  {report['error']}" if report["error"] else ""))
+    totals = {column: sum(report[column] for report in reports) for column in columns}
+    print(f"{'total':24} " + " ".join(f"{totals[column]:>7}" for column in columns))
+
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"targets": reports, "totals": totals, "generated_at": int(time.time())}, f, indent=2)
+        print(f"Report written to {path}")
+    return not any(report["error"] or report["failed"] or report["errors"] for report in reports)
+
+def sync_command(args) -> int:
+    store = None if args.no_cache else FingerprintStore()
+    print(f"Syncing {len(args.targets)} targets, {min(args.max_targets, len(args.targets))} at a time...")
+    try:
+        reports = sync_targets(args.targets, args.parser, args.dry_run, args.max_targets, args.jobs, store)
+    finally:
+        if store:
+            store.close()
+    return 0 if report_targets(reports, args.report) else 1
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Sync test cases from Word test plans to TestRail. "
+                    "Run without a command for the interactive mode."
+    )
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Level of the structured log written to stderr (default: %(default)s)")
+    parser.add_argument("--log-json", action="store_true",
+                        help="Write log records as JSON lines")
+    parser.add_argument("--metrics-json", nargs="?", const=str(METRICS_REPORT_PATH),
+                        help="Also save the timing and request summary as JSON (default path: %(const)s)")
+    commands = parser.add_subparsers(dest="command")
+
+    plan = commands.add_parser("plan", help="Compare documents with TestRail and write a change set")
+    plan.add_argument("documents", nargs="+",
+                      help="Word documents to read, or directories and glob patterns matching them")
+    plan.add_argument("-m", "--milestone", required=True, type=resolve_milestone,
+                      help="Milestone version (e.g. 2.0) or ID")
+    plan.add_argument("-o", "--output", default=str(CHANGE_SET_PATH),
+                      help="Where to write the change set (default: %(default)s)")
+    plan.add_argument("--parser", choices=PARSER_BACKENDS, default="docx",
+                      help="Document parser backend (default: %(default)s)")
+    plan.add_argument("-j", "--jobs", type=int, default=None,
+                      help="Documents parsed in parallel (default: number of CPUs)")
+    plan.add_argument("--no-cache", action="store_true",
+                      help="Ignore fingerprints: re-parse every document and re-compare every case")
+    plan.set_defaults(func=plan_command)
+
+    apply = commands.add_parser("apply", help="Apply a change set written by plan")
+    apply.add_argument("change_set", nargs="?", default=str(CHANGE_SET_PATH),
+                       help="Change set to apply (default: %(default)s)")
+    apply.add_argument("--no-cache", action="store_true",
+                       help="Do not record applied cases in the fingerprint store")
+    apply.add_argument("--resume", action="store_true",
+                       help="Continue an interrupted apply: skip the writes its journal records as "
+                            "completed and look up unfinished creates before sending them again")
+    apply.add_argument("--journal",
+                       help="Journal of the writes (default: the one named by the change set, "
+                            f"or {SYNC_JOURNAL_PATH})")
+    apply.set_defaults(func=apply_command)
+
+    watch = commands.add_parser("watch", help="Keep documents in sync with TestRail as they are edited")
+    watch.add_argument("documents", nargs="+",
+                       help="Word documents to watch, or directories and glob patterns matching them")
+    watch.add_argument("-m", "--milestone", required=True, type=resolve_milestone,
+                       help="Milestone version (e.g. 2.0) or ID")
+    watch.add_argument("--interval", type=float, default=2.0,
+                       help="Seconds between checks for modified documents (default: %(default)s)")
+    watch.add_argument("--parser", choices=PARSER_BACKENDS, default="docx",
+                       help="Document parser backend (default: %(default)s)")
+    watch.add_argument("--no-cache", action="store_true",
+                       help="Do not record synced cases in the fingerprint store")
+    watch.set_defaults(func=watch_command)
+
+    sync = commands.add_parser("sync", help="Plan and apply several project/milestone targets concurrently")
+    sync.add_argument("targets", nargs="+", type=parse_target, metavar="[PROJECT:]MILESTONE=DOCUMENTS",
+                      help="Target to sync, e.g. project_name:2.0=specs/v2/; the project is a name or ID from "
+                           "TESTRAIL_PROJECT_MAP (default: TESTRAIL_PROJECT_ID), documents are comma-separated "
+                           "paths, directories or glob patterns")
+    sync.add_argument("--dry-run", action="store_true",
+                      help="Only write the change set of every target, without applying it")
+    sync.add_argument("--max-targets", type=int, default=TESTRAIL_MAX_TARGETS,
+                      help="Targets synced at once (default: %(default)s)")
+    sync.add_argument("--report", default=str(SYNC_REPORT_PATH),
+                      help="Where to write the combined report (default: %(default)s)")
+    sync.add_argument("--parser", choices=PARSER_BACKENDS, default="docx",
+                      help="Document parser backend (default: %(default)s)")
+    sync.add_argument("-j", "--jobs", type=int, default=None,
+                      help="Documents parsed in parallel, across all targets (default: number of CPUs)")
+    sync.add_argument("--no-cache", action="store_true",
+                      help="Ignore fingerprints: re-parse every document and re-compare every case")
+    sync.set_defaults(func=sync_command)
+
+    return parser
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(args.log_level, args.log_json)
+    try:
+        if not args.command:
+            main()
+            return 0
+        return args.func(args)
+    finally:
+        get_metrics().report(args.metrics_json)
+
+def iter_table_cells(table: Table) -> Iterator[Tuple[int, int, _Cell]]:
+    """
+    Iterate the cells of a table, visiting each physical cell exactly once.
+    Unlike table.rows[i].cells, a merged cell is not repeated for every grid
+    column it spans or every row it is continued into.
+    Yields (row index, grid column index, cell) tuples, row by row.
+    """
+    for row_idx, tr in enumerate(table._tbl.tr_lst):
+        grid_col = tr.grid_before
+        for tc in tr.tc_lst:
+            yield row_idx, grid_col, _Cell(tc, table)
+            grid_col += tc.grid_span
 
 def iter_block_items(parent):
     """Iterate through all paragraphs and tables in document."""
@@ -405,9 +1333,8 @@ def iter_block_items(parent):
             yield Paragraph(child, parent)
         elif isinstance(child, CT_Tbl):
             table = Table(child, parent)
-            for row in table.rows:
-                for cell in row.cells:
-                    yield from iter_block_items(cell)
+            for _, _, cell in iter_table_cells(table):
+                yield from iter_block_items(cell)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -1,10 +1,43 @@
 import pytest
 import logging
+from benchmarks.fake_testrail import FakeTestRail
+from utils.case_store import CaseStore
+from utils.shared_cases import load_shared_client
+from utils.testrail import APIClient
 from utils.testrail_client import RailClient
+from utils.test_case_generator import TestCaseGenerator
+
+pytest_plugins = ["utils.pytest_testrail"]
 
 def pytest_configure(config):
     logging.basicConfig(level=logging.INFO)
 
 @pytest.fixture(scope="session")
 def testrail_client():
-    return RailClient()
+    return load_shared_client()
+
+@pytest.fixture
+def fake_testrail():
+    with FakeTestRail(seed=0) as server:
+        yield server
+
+@pytest.fixture
+def connect(fake_testrail, tmp_path):
+    """Factory of RailClients bound to the fake TestRail, sharing one client and a temporary case cache"""
+    api = APIClient(fake_testrail.url)
+    store = CaseStore(tmp_path / "cases.sqlite3")
+    yield lambda **kwargs: RailClient(api=api, store=store, **kwargs)
+    api.close()
+    store.close()
+
+def pytest_generate_tests(metafunc):
+    if "testrail_case" not in metafunc.fixturenames:
+        return
+    # TestRail cases are only loaded once a test asks for them
+    option = metafunc.config.option
+    params = TestCaseGenerator.build_params(
+        load_shared_client().get_test_cases(),
+        case_ids=option.testrail_case_ids,
+        section_ids=option.testrail_section_ids
+    )
+    metafunc.parametrize("testrail_case", params)
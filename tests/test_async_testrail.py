@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.fake_testrail import FakeTestRail
+from utils.async_testrail import AsyncAPIClient
+from utils.rate_limit import Throttle
+from utils.testrail import APIError
+
+def seed_cases(server, count):
+    return [server.seed_case({"title": f"Case {i}"}, 1)["id"] for i in range(count)]
+
+async def get_cases(api, case_ids):
+    async with api:
+        return await asyncio.gather(*(api.send_get(f"get_case/{case_id}") for case_id in case_ids))
+
+def test_concurrent_gets_and_posts(fake_testrail):
+    case_ids = seed_cases(fake_testrail, 20)
+    cases = asyncio.run(get_cases(AsyncAPIClient(fake_testrail.url), case_ids))
+    assert [case["id"] for case in cases] == case_ids
+
+    async def update():
+        async with AsyncAPIClient(fake_testrail.url) as api:
+            return await api.send_post(f"update_case/{case_ids[0]}", {"title": "Renamed"})
+    assert asyncio.run(update())["title"] == "Renamed"
+
+def test_requests_in_flight_are_bounded():
+    with FakeTestRail(latency=0.1) as server:
+        case_ids = seed_cases(server, 12)
+        start = time.perf_counter()
+        asyncio.run(get_cases(AsyncAPIClient(server.url, max_concurrency=3), case_ids))
+        # Four waves of three requests
+        assert time.perf_counter() - start >= 0.4
+
+def test_rate_limited_requests_are_retried():
+    with FakeTestRail(rate_limited=0.3, retry_after=0.01, seed=0) as server:
+        case_ids = seed_cases(server, 20)
+        throttle = Throttle(requests_per_minute=600000, burst=100, max_retries=20)
+        cases = asyncio.run(get_cases(AsyncAPIClient(server.url, throttle=throttle), case_ids))
+        assert [case["id"] for case in cases] == case_ids
+        assert throttle.stats["throttled"] == throttle.stats["retried"] > 0
+        assert sum(server.requests.values()) == 20 + throttle.stats["retried"]
+
+def test_errors_raise_without_retry(fake_testrail):
+    throttle = Throttle(requests_per_minute=600000, burst=100)
+    with pytest.raises(APIError, match="HTTP 400"):
+        asyncio.run(get_cases(AsyncAPIClient(fake_testrail.url, throttle=throttle), [999]))
+    assert fake_testrail.requests == {"get_case": 1}
+
+    with FakeTestRail(rate_limited=1.0) as server:
+        # Without a throttle, a 429 is not retried
+        with pytest.raises(APIError, match="HTTP 429"):
+            asyncio.run(get_cases(AsyncAPIClient(server.url), [1]))
+
+def test_attachments(fake_testrail, tmp_path):
+    case_id = seed_cases(fake_testrail, 1)[0]
+    upload = tmp_path / "report.txt"
+    upload.write_bytes(b"x" * 100000)
+
+    async def round_trip():
+        async with AsyncAPIClient(fake_testrail.url) as api:
+            added = await api.send_post(f"add_attachment_to_case/{case_id}", str(upload))
+            return await api.send_get(f"get_attachment/{added['attachment_id']}", str(tmp_path / "download.txt"))
+
+    assert asyncio.run(round_trip()) == str(tmp_path / "download.txt")
+    assert (tmp_path / "download.txt").read_bytes() == upload.read_bytes()
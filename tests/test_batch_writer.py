@@ -0,0 +1,74 @@
+from utils.batch_writer import CREATE, UPDATE, BatchWriter
+from utils.sync_journal import COMPLETED, FAILED, SyncJournal
+from utils.testrail import APIClient, APIError
+
+def seed_cases(fake_testrail, count):
+    return [fake_testrail.seed_case({"title": f"Case {i}", "custom_cm_id": f"CM-{i}"}, 1)["id"]
+            for i in range(count)]
+
+def test_identical_updates_are_sent_in_bulk_chunks(fake_testrail):
+    case_ids = seed_cases(fake_testrail, 250)
+    with APIClient(fake_testrail.url) as api:
+        writer = BatchWriter(api, project_id=4, chunk_size=100)
+        for case_id in case_ids:
+            writer.update(f"CM-{case_id}", case_id, {"milestone_id": 7})
+        writer.update("CM-odd", case_ids[0], {"title": "Renamed"})
+        results = writer.flush()
+
+    assert all(result.ok for result in results)
+    assert [result.action for result in results] == [UPDATE] * 251
+    assert fake_testrail.requests["update_cases"] == 3
+    assert fake_testrail.requests["update_case"] == 1
+    assert all(case["milestone_id"] == 7 for case in fake_testrail.cases.values())
+
+def test_failed_bulk_update_falls_back_to_single_updates(fake_testrail, tmp_path):
+    case_ids = seed_cases(fake_testrail, 3) + [999]
+    with APIClient(fake_testrail.url) as api, SyncJournal(tmp_path / "journal.jsonl") as journal:
+        writer = BatchWriter(api, project_id=4, journal=journal)
+        for case_id in case_ids:
+            writer.update(f"CM-{case_id}", case_id, {"milestone_id": 7})
+        results = writer.flush()
+
+        assert [result.ok for result in results] == [True, True, True, False]
+        assert fake_testrail.requests["update_cases"] == 1
+        assert fake_testrail.requests["update_case"] == 4
+        assert journal.state("CM-1", UPDATE, {"milestone_id": 7})["event"] == COMPLETED
+        assert journal.state("CM-999", UPDATE, {"milestone_id": 7})["event"] == FAILED
+
+class WriteOnlyAPI:
+    """Client whose reads fail, e.g. when get_suites errors out"""
+
+    def __init__(self, api):
+        self.api = api
+
+    def send_get(self, uri):
+        raise APIError("TestRail API returned HTTP 500")
+
+    def send_post(self, uri, data):
+        return self.api.send_post(uri, data)
+
+def test_updates_without_a_known_suite_are_sent_one_by_one(fake_testrail, tmp_path):
+    case_ids = seed_cases(fake_testrail, 3)
+    with APIClient(fake_testrail.url) as api, SyncJournal(tmp_path / "journal.jsonl") as journal:
+        writer = BatchWriter(WriteOnlyAPI(api), project_id=4, journal=journal)
+        for case_id in case_ids:
+            writer.update(f"CM-{case_id}", case_id, {"milestone_id": 7})
+        results = writer.flush()
+
+        assert [result.ok for result in results] == [True, True, True]
+        assert fake_testrail.requests == {"update_case": 3}
+        assert journal.in_flight() == []
+
+def test_creates_keep_their_order(fake_testrail):
+    with APIClient(fake_testrail.url) as api:
+        writer = BatchWriter(api, project_id=4, chunk_size=2)
+        for i in range(5):
+            writer.create(f"CM-{i}", 1, {"title": f"Case {i}", "custom_cm_id": f"CM-{i}"})
+        assert len(writer) == 5
+        results = writer.flush()
+
+    assert [result.cm_id for result in results] == [f"CM-{i}" for i in range(5)]
+    assert [result.action for result in results] == [CREATE] * 5
+    assert {fake_testrail.cases[result.case_id]["custom_cm_id"] for result in results} == {
+        f"CM-{i}" for i in range(5)}
+    assert len(writer) == 0
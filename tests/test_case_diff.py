@@ -0,0 +1,27 @@
+from utils.case_diff import diff_case, normalize_steps, normalize_text
+
+STEP = {"content": "Open the app", "expected": "It opens", "additional_info": "", "refs": ""}
+
+def test_formatting_differences_are_not_changes():
+    doc_case = {"custom_preconds": "Line one\r\nLine  two ", "custom_tc_steps": [STEP], "priority_id": 2}
+    testrail_case = {"custom_preconds": "Line one\n\nLine two", "priority_id": "2",
+                     "custom_tc_steps": [{"content": " Open the app", "expected": "It opens"},
+                                         {"content": "", "expected": None}]}
+    assert diff_case(doc_case, testrail_case) == {}
+
+def test_dropdown_labels_match_their_ids():
+    labels = {"custom_testing_type": {"Manual": 1, "Automated": 2}}
+    assert diff_case({"custom_testing_type": "Automated"}, {"custom_testing_type": 2}, labels=labels) == {}
+    assert diff_case({"custom_testing_type": "Manual"}, {"custom_testing_type": 2}, labels=labels) == {
+        "custom_testing_type": (2, "Manual")}
+
+def test_changed_and_missing_fields_are_reported():
+    doc_case = {"title": "New title", "milestone_id": 7, "refs": "ANG-PR-001"}
+    testrail_case = {"title": "Old title", "milestone_id": 7}
+    assert diff_case(doc_case, testrail_case) == {"title": ("Old title", "New title"), "refs": (None, "ANG-PR-001")}
+    assert diff_case(doc_case, testrail_case, fields=["milestone_id"]) == {}
+
+def test_normalization():
+    assert normalize_text(None) == ""
+    assert normalize_text(" a \t b\r\n\r\nc ") == "a b\nc"
+    assert normalize_steps([STEP, {}]) == (("Open the app", "It opens", "", ""),)
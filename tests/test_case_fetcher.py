@@ -0,0 +1,62 @@
+from benchmarks.fake_testrail import FakeTestRail
+from utils.case_fetcher import CaseFetcher, build_uri
+from utils.testrail import APIClient
+
+def seed_cases(server, count, suite_id=None, **fields):
+    return [server.seed_case(dict(fields, title=f"Case {i}", suite_id=suite_id or server.suite_ids[0]))["id"]
+            for i in range(count)]
+
+def test_build_uri():
+    assert build_uri("get_cases/4", {"suite_id": None, "type_id": [1, 3], "limit": 250}) == \
+        "get_cases/4&type_id=1,3&limit=250"
+
+def test_every_page_is_fetched_once_and_in_order(fake_testrail):
+    case_ids = seed_cases(fake_testrail, 550)
+    with APIClient(fake_testrail.url) as api:
+        cases = CaseFetcher(api, page_size=100, max_workers=4).fetch_cases(4)
+
+    assert [case["id"] for case in cases] == case_ids
+    # The first page, then two waves of four speculative pages
+    assert fake_testrail.requests["get_cases"] == 9
+
+def test_a_full_last_page_without_next_link_ends_the_fetch(fake_testrail):
+    case_ids = seed_cases(fake_testrail, 200)
+    with APIClient(fake_testrail.url) as api:
+        cases = CaseFetcher(api, page_size=100, max_workers=1).fetch_cases(4)
+
+    assert [case["id"] for case in cases] == case_ids
+    assert fake_testrail.requests["get_cases"] == 2
+
+def test_multi_suite_projects_are_read_suite_by_suite():
+    with FakeTestRail(suite_ids=(1, 2)) as server, APIClient(server.url) as api:
+        suite_2 = seed_cases(server, 3, suite_id=2)
+        suite_1 = seed_cases(server, 120, suite_id=1, milestone_id=7)
+        fetcher = CaseFetcher(api, page_size=50)
+        assert [case["id"] for case in fetcher.fetch_cases(4)] == suite_1 + suite_2
+        assert [case["id"] for case in fetcher.fetch_cases(4, suite_ids=[2])] == suite_2
+        assert [case["id"] for case in fetcher.fetch_cases(4, milestone_id=7)] == suite_1
+
+class UnpaginatedAPI:
+    """TestRail before 6.7, answering get_cases with every case in a plain list"""
+
+    def __init__(self, cases):
+        self.cases = cases
+        self.uris = []
+
+    def send_get(self, uri):
+        self.uris.append(uri)
+        return self.cases
+
+def test_unpaginated_responses_are_read_once():
+    api = UnpaginatedAPI([{"id": i} for i in range(300)])
+    cases = CaseFetcher(api, page_size=100).fetch_cases(4, suite_ids=[None])
+    assert len(cases) == 300
+    assert len(api.uris) == 1
+
+def test_section_lists_are_fetched_one_section_at_a_time(fake_testrail):
+    by_section = {section_id: seed_cases(fake_testrail, 3, section_id=section_id) for section_id in (1, 2, 3)}
+    with APIClient(fake_testrail.url) as api:
+        cases = CaseFetcher(api).fetch_cases(4, section_id=[3, 1])
+
+    assert [case["id"] for case in cases] == by_section[3] + by_section[1]
+    assert fake_testrail.requests["get_cases"] == 2
@@ -0,0 +1,71 @@
+from benchmarks.fake_testrail import FakeTestRail
+from utils.case_store import ALL_SUITES, CaseStore, scope_key
+from utils.testrail import APIClient
+from utils.testrail_client import RailClient
+
+def case(case_id, suite_id, title="Case", updated_on=1):
+    return {"id": case_id, "suite_id": suite_id, "title": title, "updated_on": updated_on}
+
+def test_delta_sync_merges_into_the_cached_cases(tmp_path):
+    store = CaseStore(tmp_path / "cases.sqlite3")
+    assert store.last_sync(4) is None
+    store.save_cases(4, [case(1, 1), case(2, 1)], 100, replace=True)
+    store.save_cases(4, [case(2, 1, "Renamed", 150), case(3, 1)], 200)
+
+    assert [(c["id"], c["title"]) for c in store.load_cases(4)] == [(1, "Case"), (2, "Renamed"), (3, "Case")]
+    assert store.last_sync(4) == 200
+    assert store.load_cases(5) == []
+    store.close()
+
+def test_full_refresh_drops_the_queried_suites(tmp_path):
+    store = CaseStore(tmp_path / "cases.sqlite3")
+    store.save_cases(4, [case(1, 1), case(2, 1), case(3, 2)], 100, scope_key([1, 2]), replace=True)
+    store.save_cases(4, [case(4, 3), case(5, None)], 100, scope_key([3]))
+
+    # Case 1, the suiteless case 5 and every case of suite 2 were deleted; suite 3 was not queried
+    store.save_cases(4, [case(2, 1)], 200, ALL_SUITES, replace=True, suite_ids=[1, 2])
+    assert [c["id"] for c in store.load_cases(4)] == [2, 4]
+    store.save_cases(4, [], 300, scope_key([3]), replace=True)
+    assert [c["id"] for c in store.load_cases(4)] == [2]
+    assert store.last_sync(4, scope_key([3])) == 300
+    store.close()
+
+def test_full_refresh_of_the_whole_project(tmp_path):
+    store = CaseStore(tmp_path / "cases.sqlite3")
+    store.save_cases(4, [case(1, 1), case(2, 2)], 100, replace=True)
+    store.save_cases(5, [case(3, 1)], 100, replace=True)
+    # A single-suite project is read in one query, without a suite
+    store.save_cases(4, [case(2, 2)], 200, replace=True, suite_ids=[None])
+    assert [c["id"] for c in store.load_cases(4)] == [2]
+    store.save_cases(4, [], 300, replace=True)
+    assert store.load_cases(4) == []
+    assert [c["id"] for c in store.load_cases(5)] == [3]
+    store.close()
+
+def test_rail_client_full_refresh_empties_deleted_suites(tmp_path):
+    with FakeTestRail(suite_ids=(1, 2)) as server, APIClient(server.url) as api:
+        store = CaseStore(tmp_path / "cases.sqlite3")
+        kept = server.seed_case({"title": "Kept", "type_id": 3, "suite_id": 1}, 1)
+        gone = server.seed_case({"title": "Gone", "type_id": 3, "suite_id": 2}, 2)
+        RailClient(api=api, store=store).close()
+        assert len(store.load_cases(4)) == 2
+
+        del server.cases[gone["id"]]
+        RailClient(api=api, store=store, full_refresh=True).close()
+        assert [c["id"] for c in store.load_cases(4)] == [kept["id"]]
+        with RailClient(api=api, store=store, offline=True) as client:
+            assert [c.id for c in client.get_test_cases()] == [kept["id"]]
+        store.close()
+
+def test_sections_are_cached_per_scope(tmp_path):
+    store = CaseStore(tmp_path / "cases.sqlite3")
+    assert store.load_sections(4) is None
+    store.save_sections(4, [{"id": 2, "name": "Labeling"}, {"id": 1, "name": "Business"}])
+    store.save_sections(4, [{"id": 3, "name": "Functional"}], replace=False)
+    assert [section["id"] for section in store.load_sections(4)] == [1, 2, 3]
+    assert store.load_sections(4, scope_key([1])) is None
+
+    store.clear(4)
+    assert store.load_sections(4) is None
+    assert store.last_sync(4) is None
+    store.close()
@@ -0,0 +1,95 @@
+import pytest
+
+from benchmarks.fake_testrail import FakeTestRail
+from benchmarks.generate_specs import generate_spec
+from testplan_to_testrail import GROUP_SECTIONS, apply_change_set, build_change_set, build_test_case_index
+from utils.testrail import APIClient
+from utils.testrail_client import RailClient
+
+MILESTONE_ID = 7
+
+@pytest.fixture
+def spec_index(tmp_path):
+    return build_test_case_index(generate_spec(str(tmp_path / "spec.docx"), 3), MILESTONE_ID)
+
+def seed(fake_testrail, spec_index, milestone_ids):
+    """Seed the sections and a TestRail copy of the first cases, one per given milestone ID"""
+    fake_testrail.reset(sections=GROUP_SECTIONS.values())
+    section_ids = {section["name"]: section["id"] for section in fake_testrail.sections.values()}
+    for doc_case, milestone_id in zip(spec_index.values(), milestone_ids):
+        fake_testrail.seed_case(dict(doc_case, section_id=section_ids[doc_case["section"]],
+                                     milestone_id=milestone_id))
+
+@pytest.mark.parametrize("other_milestone_id", [6, None])
+def test_cases_of_other_milestones_are_updated_not_created(fake_testrail, connect, spec_index, other_milestone_id):
+    seed(fake_testrail, spec_index, [MILESTONE_ID, other_milestone_id])
+    in_sync, moved, missing = spec_index
+
+    with connect() as client:
+        change_set = build_change_set(client, spec_index, MILESTONE_ID)
+        assert change_set["noops"] == [in_sync]
+        assert [update["cm_id"] for update in change_set["updates"]] == [moved]
+        assert change_set["updates"][0]["fields"] == {"milestone_id": MILESTONE_ID}
+        assert [create["cm_id"] for create in change_set["creates"]] == [missing]
+        assert change_set["sections"] == []
+
+        results = apply_change_set(client, change_set)
+
+    assert all(result.ok for result in results)
+    cases = {case["custom_cm_id"]: case for case in fake_testrail.cases.values()}
+    assert len(fake_testrail.cases) == len(cases) == 3
+    assert cases[moved]["milestone_id"] == MILESTONE_ID
+
+def test_changed_fields_are_diffed(fake_testrail, connect, spec_index):
+    seed(fake_testrail, spec_index, [MILESTONE_ID])
+    case = next(iter(fake_testrail.cases.values()))
+    case["title"] += " (outdated)"
+
+    with connect() as client:
+        change_set = build_change_set(client, spec_index, MILESTONE_ID)
+
+    update = change_set["updates"][0]
+    assert update["case_id"] == case["id"]
+    assert update["diff"] == {"title": {"old": case["title"], "new": case["title"][:-len(" (outdated)")]}}
+
+def test_missing_sections_are_created_before_the_cases(fake_testrail, connect, spec_index):
+    with connect() as client:
+        change_set = build_change_set(client, spec_index, MILESTONE_ID)
+        assert change_set["sections"] == ["Business", "Performance", "Risk Management/Safety"]
+        results = apply_change_set(client, change_set)
+
+    assert all(result.ok for result in results)
+    section_ids = {section["name"]: section["id"] for section in fake_testrail.sections.values()}
+    for case in fake_testrail.cases.values():
+        assert case["section_id"] == section_ids[spec_index[case["custom_cm_id"]]["section"]]
+
+def test_planning_without_testrail_raises(spec_index, tmp_path):
+    # Nothing listens on port 1: planning against the mock case would create every case twice
+    api = APIClient("http://127.0.0.1:1")
+    with RailClient(api=api, use_cache=False) as client:
+        with pytest.raises(Exception):
+            build_change_set(client, spec_index, MILESTONE_ID)
+    api.close()
+
+def test_existing_cases_keep_sections_of_their_own_suite(spec_index):
+    with FakeTestRail(suite_ids=(1, 2)) as server, APIClient(server.url) as api:
+        for name in ("Business", "Performance", "Risk Management/Safety"):
+            server.seed_section(name, suite_id=1)
+        business = server.seed_section("Business", suite_id=2)["id"]
+        in_sync, moved, missing = spec_index
+        # Both cases live in suite 2, which has no Performance section yet
+        server.seed_case(dict(spec_index[in_sync], section_id=business, suite_id=2))
+        server.seed_case(dict(spec_index[moved], section_id=business, suite_id=2))
+
+        with RailClient(api=api, use_cache=False) as client:
+            change_set = build_change_set(client, spec_index, MILESTONE_ID)
+            assert change_set["noops"] == [in_sync]
+            assert change_set["sections"] == ["Performance"]
+            results = apply_change_set(client, change_set)
+
+    assert all(result.ok for result in results)
+    sections = {(section["suite_id"], section["name"]): section["id"] for section in server.sections.values()}
+    cases = {case["custom_cm_id"]: case for case in server.cases.values()}
+    assert cases[moved]["section_id"] == sections[(2, "Performance")]
+    assert cases[missing]["section_id"] == sections[(1, "Risk Management/Safety")]
+    assert len(sections) == 5
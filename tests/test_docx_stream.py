@@ -0,0 +1,37 @@
+import docx
+
+from benchmarks.generate_specs import generate_spec
+from testplan_to_testrail import build_test_case_index, iter_document_texts
+from utils.docx_stream import iter_block_texts
+
+def test_backends_parse_the_same_cases(tmp_path):
+    path = generate_spec(str(tmp_path / "spec.docx"), 12)
+    assert build_test_case_index(path, 7, "lxml") == build_test_case_index(path, 7, "docx")
+
+def test_merged_and_nested_cells_are_read_once(tmp_path):
+    doc = docx.Document()
+    doc.add_paragraph("Before")
+    table = doc.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 2)).text = "Merged"
+    table.cell(1, 0).merge(table.cell(1, 1)).text = "Left"
+    table.cell(1, 2).text = "Right"
+    table.cell(1, 2).add_table(rows=1, cols=1).cell(0, 0).text = "Nested"
+    doc.add_paragraph("After")
+    path = str(tmp_path / "merged.docx")
+    doc.save(path)
+
+    texts = list(iter_block_texts(path))
+    # A cell ends with a paragraph, so python-docx adds an empty one after the nested table
+    assert texts == ["Before", "Merged", "Left", "Right", "Nested", "", "After"]
+    assert list(iter_document_texts(path, "docx")) == texts
+
+def test_tabs_and_line_breaks(tmp_path):
+    doc = docx.Document()
+    paragraph = doc.add_paragraph("Step")
+    paragraph.add_run("\tone").add_break()
+    paragraph.add_run("two")
+    path = str(tmp_path / "runs.docx")
+    doc.save(path)
+
+    assert list(iter_block_texts(path)) == ["Step\tone\ntwo"]
+    assert list(iter_document_texts(path, "docx")) == ["Step\tone\ntwo"]
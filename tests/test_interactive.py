@@ -0,0 +1,43 @@
+import pytest
+
+import testplan_to_testrail
+from benchmarks.generate_specs import generate_spec
+from testplan_to_testrail import GROUP_SECTIONS, build_case_updates, main
+from utils.sync_journal import SyncJournal
+
+def test_approved_writes_survive_an_interrupted_review(fake_testrail, connect, monkeypatch, tmp_path):
+    spec = generate_spec(str(tmp_path / "spec.docx"), 3)
+    fake_testrail.reset(sections=GROUP_SECTIONS.values())
+    journal_path = tmp_path / "sync_journal.jsonl"
+
+    class Journal(SyncJournal):
+        def __init__(self, path=journal_path, resume=False):
+            super().__init__(path, resume)
+
+        @classmethod
+        def unfinished(cls, path=journal_path):
+            return super().unfinished(path)
+
+    answers = iter(["y"])
+
+    def answer(prompt):
+        answer = next(answers, None)
+        if answer is None:
+            raise KeyboardInterrupt
+        return answer
+
+    monkeypatch.setattr(testplan_to_testrail, "RailClient", connect)
+    monkeypatch.setattr(testplan_to_testrail, "SyncJournal", Journal)
+    monkeypatch.setattr(testplan_to_testrail, "select_milestone", lambda: 7)
+    monkeypatch.setattr(testplan_to_testrail, "find_docx_files", lambda: spec)
+    monkeypatch.setattr(testplan_to_testrail, "compare_and_prompt", lambda doc_case, testrail_case=None:
+                        build_case_updates(doc_case, testrail_case)[0])
+    monkeypatch.setattr("builtins.input", answer)
+
+    # Ctrl+C at the second prompt, after two cases were approved
+    with pytest.raises(KeyboardInterrupt):
+        main()
+
+    assert sorted(case["custom_cm_id"] for case in fake_testrail.cases.values()) == sorted(list(
+        testplan_to_testrail.build_test_case_index(spec, 7))[:2])
+    assert SyncJournal.unfinished(journal_path) == 0
@@ -0,0 +1,75 @@
+import json
+import logging
+
+import pytest
+
+from utils.metrics import BUCKETS, Histogram, Metrics, StructuredFormatter
+from utils.testrail import APIClient
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) == 0.0
+    for seconds in (0.005, 0.02, 0.02, 0.3, 40.0):
+        histogram.observe(seconds)
+
+    assert (histogram.count, histogram.max) == (5, 40.0)
+    assert histogram.total == pytest.approx(40.345)
+    assert histogram.buckets[0] == 1 and histogram.buckets[1] == 2 and histogram.buckets[-1] == 1
+    assert histogram.percentile(0.5) == 0.025
+    assert histogram.percentile(0.95) == 40.0
+    stats = histogram.to_dict()
+    assert stats["p50_s"] == 0.025 and stats["mean_s"] == pytest.approx(8.069)
+    assert len(stats["buckets"]) == len(BUCKETS) + 1 and stats["buckets"]["inf"] == 1
+
+def test_histograms_merge():
+    a, b = Histogram(), Histogram()
+    a.observe(0.01)
+    b.observe(2.0)
+    b.observe(0.2)
+    a.merge(b)
+    assert (a.count, a.max) == (3, 2.0)
+    assert sum(a.buckets) == 3
+
+def test_spans_keep_their_fields_and_survive_errors(caplog):
+    metrics = Metrics()
+    with caplog.at_level(logging.DEBUG, logger="testrail_sync.metrics"):
+        with metrics.span("fetch", suite_ids=[1]) as span:
+            span["cases"] = 3
+        with pytest.raises(ValueError):
+            with metrics.span("fetch"):
+                raise ValueError
+    assert metrics.spans["fetch"].count == 2
+    assert caplog.records[0].cases == 3 and caplog.records[0].span == "fetch"
+
+    spans = metrics.drain_spans()
+    assert metrics.spans == {}
+    other = Metrics()
+    other.merge_spans(spans)
+    other.merge_spans(spans)
+    assert other.spans["fetch"].count == 4
+
+def test_requests_are_recorded_per_endpoint(fake_testrail, tmp_path, capsys):
+    metrics = Metrics()
+    fake_testrail.seed_case({"title": "Case"}, 1)
+    with APIClient(fake_testrail.url, metrics=metrics) as api:
+        api.send_get("get_cases/4&limit=250")
+        api.send_get("get_case/1")
+        with pytest.raises(Exception):
+            api.send_get("get_case/2")
+
+    path = tmp_path / "metrics.json"
+    summary = metrics.report(str(path))
+    assert summary["requests"]["get_cases"]["count"] == 1
+    assert summary["requests"]["get_case"]["statuses"] == {"200": 1, "400": 1}
+    assert json.loads(path.read_text(encoding="utf-8"))["requests"].keys() == {"get_case", "get_cases"}
+    assert "get_case" in capsys.readouterr().out
+
+    metrics.reset()
+    assert metrics.summary() == {"spans": {}, "requests": {}}
+
+def test_structured_formatter():
+    record = logging.makeLogRecord({"name": "testrail_sync.client", "levelname": "INFO",
+                                    "msg": "Retrieved cases", "cases": 3})
+    assert StructuredFormatter().format(record) == "INFO    testrail_sync.client Retrieved cases cases=3"
+    entry = json.loads(StructuredFormatter(json_lines=True).format(record))
+    assert (entry["message"], entry["cases"], entry["level"]) == ("Retrieved cases", 3, "INFO")
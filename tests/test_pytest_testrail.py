@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import pytest_testrail
+from utils.pytest_testrail import ResultReporter, TestRailPlugin, get_case_id, replay_spilled_results
+from utils.testrail import APIClient
+
+def result(case_id, status_id=1):
+    return {"case_id": case_id, "status_id": status_id}
+
+@pytest.fixture
+def api(fake_testrail):
+    with APIClient(fake_testrail.url) as api:
+        yield api
+
+def test_results_are_posted_in_chunks_to_a_created_run(fake_testrail, api, tmp_path):
+    create_run = lambda: api.send_post("add_run/4", {"name": "Run"})["id"]
+    reporter = ResultReporter(api, create_run=create_run, chunk_size=2, spill_path=tmp_path / "spill.jsonl")
+    for case_id in range(5):
+        reporter.add(result(case_id))
+    reporter.close(timeout=10)
+
+    assert (reporter.run_id, reporter.posted, reporter.spilled) == (1, 5, 0)
+    assert fake_testrail.requests == {"add_run": 1, "add_results_for_cases": 3}
+    assert [r["case_id"] for r in fake_testrail.results[1]] == list(range(5))
+
+def test_a_partial_chunk_is_posted_after_the_flush_interval(fake_testrail, api, tmp_path):
+    api.send_post("add_run/4", {"name": "Run"})
+    reporter = ResultReporter(api, run_id=1, chunk_size=50, flush_interval=0.05, spill_path=tmp_path / "spill.jsonl")
+    reporter.add(result(1))
+    time.sleep(0.5)
+    assert reporter.posted == 1
+    reporter.close(timeout=10)
+
+def test_unposted_results_are_spilled_and_replayed(fake_testrail, api, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    reporter = ResultReporter(api, run_id=42, chunk_size=2, spill_path=spill_path)
+    for case_id in range(3):
+        reporter.add(result(case_id))
+    reporter.close(timeout=10)
+    assert (reporter.posted, reporter.spilled) == (0, 3)
+
+    # Run 42 does not exist: the results stay spilled
+    assert replay_spilled_results(api, spill_path) == 0
+    assert len(spill_path.read_text(encoding="utf-8").splitlines()) == 2
+
+    run_id = api.send_post("add_run/4", {"name": "Run"})["id"]
+    assert replay_spilled_results(api, spill_path, run_id=run_id) == 3
+    assert not spill_path.exists()
+    assert len(fake_testrail.results[run_id]) == 3
+
+def test_case_ids_come_from_the_marker_or_the_name():
+    marker = SimpleNamespace(args=(), kwargs={"case_id": "12"})
+    assert get_case_id(SimpleNamespace(name="test_login", get_closest_marker=lambda name: marker)) == 12
+    assert get_case_id(SimpleNamespace(name="test_case_34[x]", get_closest_marker=lambda name: None)) == 34
+    assert get_case_id(SimpleNamespace(name="test_login", get_closest_marker=lambda name: None)) is None
+
+def plugin_config(**option):
+    defaults = dict(testrail_run_id=None, testrail_run_name="CI", testrail_suite_id=None, testrail_chunk_size=50)
+    return SimpleNamespace(option=SimpleNamespace(**dict(defaults, **option)))
+
+def report(nodeid, case_id, when, failed=False):
+    return SimpleNamespace(nodeid=nodeid, user_properties=[("testrail_case_id", case_id)], when=when,
+                           duration=0.4, failed=failed, skipped=False, longreprtext="boom" if failed else "")
+
+def test_xdist_workers_tag_items_and_the_controller_reports(fake_testrail, api, monkeypatch, capsys):
+    worker_config = plugin_config()
+    worker_config.workerinput = {"workerid": "gw0"}
+    worker = TestRailPlugin(worker_config)
+    assert (worker.api, worker.reporter) == (None, None)
+    item = SimpleNamespace(name="test_case_7", user_properties=[], get_closest_marker=lambda name: None)
+    worker.pytest_collection_modifyitems([item])
+    assert item.user_properties == [("testrail_case_id", 7)]
+
+    monkeypatch.setattr(pytest_testrail, "create_api_client", lambda: APIClient(fake_testrail.url))
+    controller = TestRailPlugin(plugin_config())
+    for when in ("setup", "call", "teardown"):
+        controller.pytest_runtest_logreport(report("tests/a.py::ok", 7, when))
+        controller.pytest_runtest_logreport(report("tests/a.py::bad", 8, when, failed=when == "call"))
+    controller.pytest_sessionfinish(None)
+
+    assert "2 results posted to run 1" in capsys.readouterr().out
+    results = {r["case_id"]: r for r in fake_testrail.results[1]}
+    assert results[7]["status_id"] == 1 and results[8]["status_id"] == 5
+    assert results[8]["comment"] == "boom"
@@ -0,0 +1,37 @@
+from email.utils import formatdate
+import time
+
+import pytest
+
+from utils.rate_limit import Throttle, TokenBucket, parse_retry_after
+
+def test_bucket_hands_out_the_burst_then_spaces_callers():
+    bucket = TokenBucket(rate=10, capacity=3)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    # Each caller past the burst gets its own slot, 1/rate apart
+    assert waits[3] == pytest.approx(0.1, abs=0.01)
+    assert waits[4] == pytest.approx(0.2, abs=0.01)
+
+def test_pause_delays_every_caller():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.pause(5)
+    assert bucket.reserve() == pytest.approx(5, abs=0.05)
+
+def test_throttle_counts_and_honours_retry_after():
+    throttle = Throttle(requests_per_minute=600, burst=2, backoff_base=1, backoff_max=4)
+    assert throttle.reserve() == 0.0
+    assert throttle.throttled("3", attempt=0) == 3.0
+    assert throttle.reserve() == pytest.approx(3, abs=0.05)
+    assert 0 <= throttle.throttled(None, attempt=5) <= 4
+    throttle.retried()
+    assert throttle.stats == {"requests": 2, "throttled": 2, "retried": 1}
+
+@pytest.mark.parametrize("value, expected", [(None, None), ("", None), ("2", 2.0), ("1.5", 1.5),
+                                             ("-3", 0.0), ("soon", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
@@ -0,0 +1,48 @@
+import pytest
+
+from utils.case_store import CaseStore
+from utils.section_resolver import SectionResolver
+from utils.testrail import APIClient
+
+@pytest.fixture
+def store(tmp_path):
+    store = CaseStore(tmp_path / "cases.sqlite3")
+    yield store
+    store.close()
+
+@pytest.fixture
+def api(fake_testrail):
+    with APIClient(fake_testrail.url) as api:
+        yield api
+
+def test_sections_resolve_by_name(fake_testrail, api, store):
+    fake_testrail.reset(sections=["Business", "Performance"])
+    resolver = SectionResolver(api, 4, store=store)
+    assert resolver.resolve_all(["business ", "Labeling", "Performance"]) == {"business ": 1, "Performance": 2}
+    assert resolver.ensure(["Business", "Labeling", "Functional"]) == {"Business": 1, "Labeling": 3, "Functional": 4}
+    assert fake_testrail.requests["add_section"] == 2
+    assert fake_testrail.requests["get_sections"] == 1
+    # Created sections join the cache
+    assert [section["id"] for section in store.load_sections(4, "1")] == [1, 2, 3, 4]
+
+def test_offline_resolution_reads_the_online_cache(fake_testrail, api, store):
+    fake_testrail.reset(sections=["Business"])
+    assert SectionResolver(api, 4, store=store).ensure(["Business", "Labeling"]) == {"Business": 1, "Labeling": 2}
+    fake_testrail.requests.clear()
+
+    offline = SectionResolver(api, 4, store=store, offline=True)
+    assert offline.resolve_all(["Business", "Labeling"]) == {"Business": 1, "Labeling": 2}
+    assert offline.ensure(["Labeling"]) == {"Labeling": 2}
+    with pytest.raises(RuntimeError, match="Functional"):
+        offline.ensure(["Functional"])
+    assert fake_testrail.requests == {}
+
+def test_offline_rail_client_resolves_sections(fake_testrail, connect):
+    fake_testrail.reset(sections=["Business"])
+    with connect() as client:
+        assert client.sections.resolve_all(["Business"]) == {"Business": 1}
+    with connect(offline=True) as client:
+        assert client.sections.resolve_all(["Business"]) == {"Business": 1}
+
+def test_offline_without_a_cache_resolves_nothing(api, store):
+    assert SectionResolver(api, 4, store=store, offline=True).resolve_all(["Business"]) == {}
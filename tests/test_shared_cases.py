@@ -0,0 +1,57 @@
+import pytest
+
+from utils import shared_cases
+from utils.shared_cases import close_shared_client, load_shared_client
+from utils.testrail import APIClient
+from utils.testrail_client import RailClient
+
+@pytest.fixture
+def shared(fake_testrail, connect, monkeypatch, tmp_path):
+    """Fresh shared-client state, loading from the fake TestRail"""
+    monkeypatch.setattr(shared_cases, "_client", None)
+    monkeypatch.setattr(shared_cases, "RailClient", connect)
+    monkeypatch.delenv("PYTEST_XDIST_TESTRUNUID", raising=False)
+    for i in range(3):
+        fake_testrail.seed_case({"title": f"Case {i}", "type_id": 3, "custom_cm_id": f"CM-{i}"}, 1)
+    yield tmp_path / "snapshot.json"
+    close_shared_client()
+
+def test_one_load_per_process(fake_testrail, shared):
+    client = load_shared_client(shared)
+    assert load_shared_client(shared) is client
+    assert len(client.get_test_cases()) == 3
+    assert fake_testrail.requests["get_cases"] == 1
+    assert not shared.exists()
+
+    close_shared_client()
+    assert shared_cases._client is None
+
+def test_xdist_workers_share_one_snapshot(fake_testrail, shared, monkeypatch):
+    monkeypatch.setenv("PYTEST_XDIST_TESTRUNUID", "run-1")
+    first = load_shared_client(shared)
+    assert shared.exists()
+
+    # Another worker of the same run reads the snapshot instead of TestRail
+    monkeypatch.setattr(shared_cases, "_client", None)
+    second = load_shared_client(shared)
+    assert second is not first
+    assert fake_testrail.requests["get_cases"] == 1
+    assert second.testrail_data == first.testrail_data
+    first.close()
+
+    # A new run fetches again
+    monkeypatch.setattr(shared_cases, "_client", None)
+    monkeypatch.setenv("PYTEST_XDIST_TESTRUNUID", "run-2")
+    load_shared_client(shared)
+    assert fake_testrail.requests["get_cases"] == 2
+
+def test_fallback_cases_are_never_snapshotted(shared, monkeypatch):
+    monkeypatch.setenv("PYTEST_XDIST_TESTRUNUID", "run-1")
+    # Nothing listens on port 1
+    api = APIClient("http://127.0.0.1:1")
+    monkeypatch.setattr(shared_cases, "RailClient", lambda: RailClient(api=api, use_cache=False))
+    with pytest.raises(Exception):
+        load_shared_client(shared)
+    assert not shared.exists()
+    assert shared_cases._client is None
+    api.close()
@@ -0,0 +1,84 @@
+import pytest
+
+from benchmarks.generate_specs import generate_spec
+from testplan_to_testrail import GROUP_SECTIONS, apply_change_set, build_change_set, build_test_case_index
+from utils.batch_writer import CREATE, UPDATE
+from utils.sync_journal import COMPLETED, FAILED, STARTED, SyncJournal
+
+FIELDS = {"title": "Login works", "milestone_id": 7}
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / "sync_journal.jsonl"
+
+def test_records_the_last_state_of_each_write(journal_path):
+    with SyncJournal(journal_path) as journal:
+        assert journal.state("CM-1", CREATE, FIELDS) is None
+        journal.started("CM-1", CREATE, FIELDS)
+        assert [record["cm_id"] for record in journal.in_flight()] == ["CM-1"]
+        journal.completed("CM-1", CREATE, FIELDS, 11)
+        journal.started("CM-2", UPDATE, FIELDS, 12)
+        journal.failed("CM-2", UPDATE, FIELDS, "boom", 12)
+
+        assert journal.state("CM-1", CREATE, FIELDS)["event"] == COMPLETED
+        assert journal.state("CM-1", CREATE, FIELDS)["case_id"] == 11
+        assert journal.state("CM-2", UPDATE, FIELDS)["event"] == FAILED
+        # A different payload is a different write
+        assert journal.state("CM-1", CREATE, dict(FIELDS, title="Logout works")) is None
+        assert journal.in_flight() == []
+
+def test_resume_keeps_the_previous_run(journal_path):
+    with SyncJournal(journal_path) as journal:
+        journal.started("CM-1", CREATE, FIELDS)
+        journal.started("CM-2", UPDATE, FIELDS, 12)
+        journal.completed("CM-2", UPDATE, FIELDS, 12)
+    assert SyncJournal.unfinished(journal_path) == 1
+
+    with SyncJournal(journal_path, resume=True) as journal:
+        assert journal.state("CM-1", CREATE, FIELDS)["event"] == STARTED
+        assert journal.state("CM-2", UPDATE, FIELDS)["event"] == COMPLETED
+        journal.completed("CM-1", CREATE, FIELDS, 11, reconciled=True)
+    assert SyncJournal.unfinished(journal_path) == 0
+
+    # Without resume the journal starts over
+    with SyncJournal(journal_path) as journal:
+        assert journal.state("CM-2", UPDATE, FIELDS) is None
+    assert journal_path.read_text(encoding="utf-8") == ""
+
+def test_torn_last_line_is_ignored(journal_path):
+    with SyncJournal(journal_path) as journal:
+        journal.started("CM-1", CREATE, FIELDS)
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"event": "completed", "cm_')
+
+    with SyncJournal(journal_path, resume=True) as journal:
+        assert journal.state("CM-1", CREATE, FIELDS)["event"] == STARTED
+        journal.completed("CM-1", CREATE, FIELDS, 11)
+    with SyncJournal(journal_path, resume=True) as journal:
+        assert journal.state("CM-1", CREATE, FIELDS)["event"] == COMPLETED
+    assert SyncJournal.unfinished(journal_path) == 0
+
+def test_resumed_apply_never_creates_a_case_twice(fake_testrail, connect, journal_path, tmp_path):
+    index = build_test_case_index(generate_spec(str(tmp_path / "spec.docx"), 4), 7)
+    fake_testrail.reset(sections=GROUP_SECTIONS.values())
+    with connect() as client:
+        change_set = build_change_set(client, index, 7)
+    landed, in_flight_landed, in_flight_lost, not_started = change_set["creates"]
+
+    # An apply killed mid-way: the first create completed, the next two got no response,
+    # of which only the first reached TestRail, and the last was never sent
+    with SyncJournal(journal_path) as journal:
+        for create in (landed, in_flight_landed, in_flight_lost):
+            journal.started(create["cm_id"], CREATE, create["fields"])
+        case = fake_testrail.seed_case(landed["fields"], landed["section_id"])
+        journal.completed(landed["cm_id"], CREATE, landed["fields"], case["id"])
+        fake_testrail.seed_case(in_flight_landed["fields"], in_flight_landed["section_id"])
+    fake_testrail.requests.clear()
+
+    with connect() as client, SyncJournal(journal_path, resume=True) as journal:
+        results = apply_change_set(client, change_set, journal=journal)
+
+    assert all(result.ok for result in results)
+    assert fake_testrail.requests["add_case"] == 2
+    assert sorted(case["custom_cm_id"] for case in fake_testrail.cases.values()) == sorted(index)
+    assert SyncJournal.unfinished(journal_path) == 0
@@ -0,0 +1,52 @@
+import argparse
+
+import pytest
+
+import testplan_to_testrail
+from testplan_to_testrail import TargetClaims, parse_target, sync_targets, target_label
+from utils.case_store import CaseStore
+
+def test_parse_target_defaults_to_the_configured_project():
+    target = parse_target("2.0=specs/v2/")
+    assert target == {"project_id": 4, "milestone_id": 7, "version": "2.0", "documents": ["specs/v2/"]}
+    assert target_label(target) == "project_name:2.0"
+
+@pytest.mark.parametrize("value", ["project_name:2.1=a.docx,b.docx,", "4:v2.1=a.docx,b.docx", "4:8=a.docx,b.docx"])
+def test_parse_target_resolves_projects_and_milestones(value):
+    target = parse_target(value)
+    assert (target["project_id"], target["milestone_id"], target["version"]) == (4, 8, "2.1")
+    assert target["documents"] == ["a.docx", "b.docx"]
+
+@pytest.mark.parametrize("value", ["2.0", "2.0=", "9.9=spec.docx", "unknown:2.0=spec.docx"])
+def test_parse_target_rejects_invalid_targets(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_target(value)
+
+def test_a_case_is_claimed_by_one_milestone_per_project():
+    claims = TargetClaims()
+    v20, v21 = parse_target("2.0=a.docx"), parse_target("2.1=b.docx")
+    assert claims.claim(v20, ["CM-1", "CM-2"]) == {}
+    assert claims.claim(v21, ["CM-2", "CM-3"]) == {"CM-2": "project_name:2.0"}
+    # Claiming again for the same target is not a conflict
+    assert claims.claim(v20, ["CM-1"]) == {}
+    other_project = dict(v21, project_id=5)
+    assert claims.claim(other_project, ["CM-1"]) == {}
+
+def test_clients_opened_before_a_failure_are_closed(monkeypatch, tmp_path):
+    closed = []
+
+    class Client:
+        def __init__(self, project_id, api, store):
+            if project_id == 5:
+                raise ConnectionError("project 5 is unreachable")
+            self.project_id = project_id
+
+        def close(self):
+            closed.append(self.project_id)
+
+    monkeypatch.setattr(testplan_to_testrail, "RailClient", Client)
+    monkeypatch.setattr(testplan_to_testrail, "CaseStore", lambda: CaseStore(tmp_path / "cases.sqlite3"))
+    targets = [parse_target("2.0=a.docx"), dict(parse_target("2.1=b.docx"), project_id=5)]
+    with pytest.raises(ConnectionError):
+        sync_targets(targets, dry_run=True, jobs=1)
+    assert closed == [4]
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from utils.testrail import CHUNK_SIZE, APIClient, MultipartFile, api_method
+
+@pytest.fixture
+def attachment(tmp_path):
+    path = tmp_path / "report.bin"
+    path.write_bytes(os.urandom(2 * CHUNK_SIZE + 123))
+    return path
+
+def read_all(body, size):
+    chunks = []
+    while True:
+        chunk = body.read(size)
+        if not chunk:
+            return chunks
+        chunks.append(chunk)
+
+@pytest.mark.parametrize("size", [1, 7, 200, CHUNK_SIZE, -1])
+def test_multipart_reads_cross_part_boundaries(attachment, size):
+    with MultipartFile(str(attachment)) as body:
+        boundary = body.content_type.split("boundary=")[1]
+        chunks = read_all(body, size)
+        data = b"".join(chunks)
+    assert len(data) == len(body)
+    if size > 0:
+        assert all(len(chunk) == size for chunk in chunks[:-1])
+    head, content = data.split(b"\r\n\r\n", 1)
+    assert head.startswith(f"--{boundary}\r\n".encode())
+    assert b'filename="report.bin"' in head
+    assert content == attachment.read_bytes() + f"\r\n--{boundary}--\r\n".encode()
+
+def test_multipart_iterates_in_chunks(attachment):
+    with MultipartFile(str(attachment)) as body:
+        chunks = list(body)
+    assert all(len(chunk) == CHUNK_SIZE for chunk in chunks[:-1])
+    assert sum(map(len, chunks)) == len(body)
+
+def test_attachments_are_streamed_both_ways(fake_testrail, attachment, tmp_path):
+    case_id = fake_testrail.seed_case({"title": "Case"}, 1)["id"]
+    with APIClient(fake_testrail.url) as api:
+        attachment_id = api.send_post(f"add_attachment_to_case/{case_id}", str(attachment))["attachment_id"]
+        target = str(tmp_path / "download.bin")
+        assert api.send_get(f"get_attachment/{attachment_id}", target) == target
+    assert fake_testrail.attachments[attachment_id] == attachment.read_bytes()
+    assert (tmp_path / "download.bin").read_bytes() == attachment.read_bytes()
+
+def test_api_method():
+    assert api_method("get_cases/4&limit=250") == "get_cases"
+    assert api_method("get_project/4") == "get_project"
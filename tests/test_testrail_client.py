@@ -0,0 +1,66 @@
+import pytest
+
+from utils.testrail_client import TestRailCase
+
+STEPS = [{"content": "Open the app", "expected": "It opens", "additional_info": "", "refs": ""}]
+PAYLOAD = {"id": 1, "title": "Login", "section_id": 2, "custom_cm_id": "CM-1", "custom_summary": "Logs in",
+           "custom_tc_steps": STEPS, "custom_test_set": 3, "refs": "dropped"}
+
+def test_unknown_fields_are_dropped():
+    case = TestRailCase(PAYLOAD)
+    with pytest.raises(AttributeError):
+        case.refs
+    with pytest.raises(AttributeError):
+        case.extra = 1
+    assert not hasattr(case, "__dict__")
+
+def test_steps_are_kept_encoded_until_read():
+    case = TestRailCase(PAYLOAD)
+    assert isinstance(case._custom_tc_steps, str)
+    assert case.to_dict()["custom_tc_steps"] == STEPS
+    # to_dict decodes a copy only
+    assert isinstance(case._custom_tc_steps, str)
+    assert case.custom_tc_steps == STEPS
+    assert case.custom_tc_steps is case.custom_tc_steps
+
+def test_edits_of_the_decoded_steps_stick():
+    case = TestRailCase(PAYLOAD)
+    case.custom_tc_steps.append({"content": "Log in", "expected": "Home page"})
+    case.custom_tc_steps[0]["expected"] = "It opens fast"
+    steps = TestRailCase(case.to_dict()).custom_tc_steps
+    assert [step["expected"] for step in steps] == ["It opens fast", "Home page"]
+
+def test_missing_steps_read_as_an_empty_list():
+    case = TestRailCase({"id": 1})
+    assert case.custom_tc_steps == []
+    case.custom_tc_steps.append(STEPS[0])
+    assert case.to_dict()["custom_tc_steps"] == STEPS
+    case.custom_tc_steps = None
+    assert case.to_dict()["custom_tc_steps"] == []
+
+def test_to_dict_round_trip():
+    payload = TestRailCase(PAYLOAD).to_dict()
+    assert payload == dict({field: None for field in TestRailCase.FIELDS},
+                           **{k: v for k, v in PAYLOAD.items() if k != "refs"})
+    assert TestRailCase(payload).to_dict() == payload
+
+def test_get_cases_queries_each_section_of_a_list(fake_testrail, connect):
+    for section_id in (1, 2, 3):
+        fake_testrail.seed_case({"title": f"Case {section_id}", "type_id": 3, "milestone_id": 7}, section_id)
+    with connect() as client:
+        fake_testrail.requests.clear()
+        cases = client.get_cases(section_id=[1, 3], milestone_id=7, strict=True)
+    assert [case.section_id for case in cases] == [1, 3]
+    assert fake_testrail.requests["get_cases"] == 2
+
+def test_only_automated_cases_are_downloaded_in_full(fake_testrail, connect):
+    automated = fake_testrail.seed_case({"title": "Automated", "type_id": 3}, 1)
+    fake_testrail.seed_case({"title": "Manual", "type_id": 1}, 1)
+    with connect() as client:
+        assert [case.id for case in client.get_test_cases()] == [automated["id"]]
+        assert [case["id"] for case in client.store.load_cases(4)] == [automated["id"]]
+
+    # A delta sync fetches every updated case, so one that stops being automated is dropped
+    fake_testrail.cases[automated["id"]]["type_id"] = 1
+    with connect() as client:
+        assert client.get_test_cases() == []
@@ -0,0 +1,240 @@
+"""Asyncio TestRail API binding, mirroring utils.testrail.APIClient.
+
+send_get and send_post are coroutines with the same arguments, return values
+and APIError semantics as the blocking client, so hundreds of calls can be
+awaited together from a single thread:
+
+    async with create_async_api_client() as api:
+        cases = await asyncio.gather(*(api.send_get(f'get_case/{i}') for i in ids))
+
+A semaphore bounds the number of requests in flight; the optional Throttle
+is the same process-wide rate limiter the blocking clients use.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import time
+
+import aiohttp
+
+from .testrail import APIError, CHUNK_SIZE, api_method
+from .rate_limit import get_shared_throttle
+from .metrics import get_metrics
+from config.constants import (
+    TESTRAIL_URL,
+    TESTRAIL_USER,
+    TESTRAIL_PASSWORD,
+    TESTRAIL_TIMEOUT,
+    TESTRAIL_ASYNC_CONCURRENCY
+)
+
+
+class AsyncAPIClient:
+    def __init__(self, base_url, max_concurrency=TESTRAIL_ASYNC_CONCURRENCY,
+                 timeout=(10, 60), keep_alive=True, throttle=None, metrics=None):
+        """Create a client bound to one TestRail instance.
+
+        Args:
+            base_url: The TestRail URL, e.g. https://example.testrail.io.
+            max_concurrency: Maximum number of requests in flight; further
+                calls wait for a free slot. Also caps open connections.
+            timeout: Seconds to wait for the server, either a single value for
+                the whole request or a (connect, read) tuple.
+            keep_alive: Reuse connections between requests.
+            throttle: Optional utils.rate_limit.Throttle, with the same retry
+                policy as APIClient: 429 is retried for any method, 5xx and
+                connection errors for GETs only.
+            metrics: Optional utils.metrics.Metrics recording the count,
+                status and latency of every request per API method.
+        """
+        self.__user = ''
+        self.__password = ''
+        self.__auth = None
+        if not base_url.endswith('/'):
+            base_url += '/'
+        self.__url = base_url + 'index.php?/api/v2/'
+        self.max_concurrency = max_concurrency
+        self.keep_alive = keep_alive
+        self.throttle = throttle
+        self.metrics = metrics
+        if isinstance(timeout, tuple):
+            self.timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        # Created on first use, inside the running event loop
+        self.__session = None
+        self.__semaphore = None
+
+    @property
+    def user(self):
+        return self.__user
+
+    @user.setter
+    def user(self, value):
+        self.__user = value
+        self.__auth = None
+
+    @property
+    def password(self):
+        return self.__password
+
+    @password.setter
+    def password(self, value):
+        self.__password = value
+        self.__auth = None
+
+    async def close(self):
+        """Close every pooled connection held by the client."""
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def send_get(self, uri, filepath=None):
+        """Issue a GET request (read) against the API.
+
+        Args:
+            uri: The API method to call including parameters, e.g. get_case/1.
+            filepath: The path and file name for attachment download; used only
+                for 'get_attachment/:attachment_id'.
+
+        Returns:
+            A dict containing the result of the request.
+        """
+        return await self.__send_request('GET', uri, filepath)
+
+    async def send_post(self, uri, data):
+        """Issue a POST request (write) against the API.
+
+        Args:
+            uri: The API method to call, including parameters, e.g. add_case/1.
+            data: The data to submit as part of the request as a dict; strings
+                must be UTF-8 encoded. If adding an attachment, must be the
+                path to the file.
+
+        Returns:
+            A dict containing the result of the request.
+        """
+        return await self.__send_request('POST', uri, data)
+
+    def __open(self):
+        if self.__session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             force_close=not self.keep_alive)
+            self.__session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.__session
+
+    async def __send_request(self, method, uri, data):
+        session = self.__open()
+        url = self.__url + uri
+
+        if self.__auth is None:
+            self.__auth = 'Basic ' + str(
+                base64.b64encode(
+                    bytes('%s:%s' % (self.user, self.password), 'utf-8')
+                ),
+                'ascii'
+            ).strip()
+        headers = {'Authorization': self.__auth}
+
+        attempt = 0
+        async with self.__semaphore:
+            while True:
+                if self.throttle:
+                    wait = self.throttle.reserve()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                start = time.perf_counter()
+                try:
+                    response = await self.__send_once(session, method, uri, url, dict(headers), data)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    self.__observe(uri, start, type(e).__name__)
+                    if method != 'GET' or not self.__can_retry(attempt):
+                        raise
+                    await asyncio.sleep(self.throttle.backoff(attempt))
+                else:
+                    self.__observe(uri, start, response.status)
+                    if response.status == 429 and self.__can_retry(attempt):
+                        # Rejected before processing, so retrying a POST is safe too
+                        response.release()
+                        self.throttle.throttled(response.headers.get('Retry-After'), attempt)
+                    elif (response.status >= 500 and method == 'GET'
+                          and self.__can_retry(attempt)):
+                        response.release()
+                        await asyncio.sleep(self.throttle.backoff(attempt))
+                    else:
+                        break
+                self.throttle.retried()
+                attempt += 1
+
+            try:
+                return await self.__read_response(response, uri, data)
+            finally:
+                response.release()
+
+    async def __read_response(self, response, uri, data):
+        if response.status > 201:
+            content = await response.read()
+            try:
+                error = json.loads(content)
+            except ValueError:  # response content not formatted as JSON
+                error = str(content)
+            raise APIError('TestRail API returned HTTP %s (%s)' % (response.status, error))
+        elif uri[:15] == 'get_attachment/':     # Expecting file, not JSON
+            try:
+                with open(data, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        f.write(chunk)
+                return (data)
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError):
+                return ("Error saving attachment.")
+        else:
+            content = await response.read()
+            try:
+                return json.loads(content)
+            except ValueError:  # Nothing to return
+                return {}
+
+    def __can_retry(self, attempt):
+        return self.throttle is not None and attempt < self.throttle.max_retries
+
+    def __observe(self, uri, start, status):
+        if self.metrics:
+            self.metrics.observe_request(api_method(uri), time.perf_counter() - start, status)
+
+    async def __send_once(self, session, method, uri, url, headers, data):
+        if method == 'POST':
+            if uri[:14] == 'add_attachment':    # add_attachment API method
+                with open(data, 'rb') as f:
+                    form = aiohttp.FormData()
+                    form.add_field('attachment', f, filename=os.path.basename(data),
+                                   content_type='application/octet-stream')
+                    return await session.post(url, headers=headers, data=form)
+            headers['Content-Type'] = 'application/json'
+            payload = bytes(json.dumps(data), 'utf-8')
+            return await session.post(url, headers=headers, data=payload)
+        headers['Content-Type'] = 'application/json'
+        return await session.get(url, headers=headers)
+
+
+def create_async_api_client(max_concurrency: int = TESTRAIL_ASYNC_CONCURRENCY) -> AsyncAPIClient:
+    """Create an AsyncAPIClient for the configured TestRail instance, sharing the process-wide throttle and metrics"""
+    api = AsyncAPIClient(
+        TESTRAIL_URL,
+        max_concurrency=max_concurrency,
+        timeout=TESTRAIL_TIMEOUT,
+        throttle=get_shared_throttle(),
+        metrics=get_metrics()
+    )
+    api.user = TESTRAIL_USER
+    api.password = TESTRAIL_PASSWORD
+    return api
@@ -0,0 +1,55 @@
+"""Concurrent transfer of TestRail attachments.
+
+Uploads and downloads are streamed by APIClient, so memory stays bounded by
+the chunk size per transfer, and run over the client's pooled session.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Union
+
+from .testrail import APIClient
+from config.constants import TESTRAIL_MAX_WORKERS
+
+
+def upload_attachments(api: APIClient, uploads: Iterable[Tuple[str, str]],
+                       max_workers: int = TESTRAIL_MAX_WORKERS) -> List[Union[Dict, Exception]]:
+    """Upload files concurrently.
+
+    Args:
+        api: Client used for the uploads.
+        uploads: (uri, path) pairs, e.g. ('add_attachment_to_result/42', 'run.log').
+        max_workers: Maximum number of uploads in flight.
+
+    Returns:
+        For each upload, in order, the API response or the exception raised.
+    """
+    return _run(lambda upload: api.send_post(upload[0], upload[1]), uploads, max_workers)
+
+
+def download_attachments(api: APIClient, downloads: Iterable[Tuple[int, str]],
+                         max_workers: int = TESTRAIL_MAX_WORKERS) -> List[Union[str, Exception]]:
+    """Download attachments concurrently.
+
+    Args:
+        api: Client used for the downloads.
+        downloads: (attachment_id, path) pairs.
+        max_workers: Maximum number of downloads in flight.
+
+    Returns:
+        For each download, in order, the path written or the exception raised.
+    """
+    return _run(
+        lambda download: api.send_get(f'get_attachment/{download[0]}', download[1]),
+        downloads, max_workers
+    )
+
+
+def _run(transfer, items, max_workers):
+    def attempt(item):
+        try:
+            return transfer(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return list(pool.map(attempt, items))
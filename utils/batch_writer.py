@@ -0,0 +1,184 @@
+"""Batched writes of test cases to TestRail.
+
+Updates that change the same fields to the same values are sent together
+through the bulk update_cases endpoint; the rest go through update_case.
+TestRail has no bulk create, so add_case calls are sent in chunks over a
+bounded thread pool. Every queued case gets a WriteResult, so a partial
+failure never hides which cases landed. With a SyncJournal every write is
+also recorded before and after it is sent, so a crashed run can be resumed.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .testrail import APIClient, APIError
+from .case_fetcher import CaseFetcher
+from .metrics import get_metrics
+from .sync_journal import SyncJournal
+from config.constants import (
+    TESTRAIL_PROJECT_ID,
+    TESTRAIL_BULK_CHUNK,
+    TESTRAIL_MAX_WORKERS
+)
+
+CREATE = 'create'
+UPDATE = 'update'
+
+
+class WriteResult:
+    def __init__(self, cm_id: str, action: str, case_id: Optional[int] = None,
+                 error: Optional[str] = None, fields: Optional[List[str]] = None):
+        self.cm_id = cm_id
+        self.action = action
+        self.case_id = case_id
+        self.error = error
+        self.fields = fields or []
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'error={self.error!r}'
+        return f'WriteResult({self.cm_id!r}, {self.action}, case_id={self.case_id}, {status})'
+
+
+class BatchWriter:
+    def __init__(self, api: APIClient, project_id: int = TESTRAIL_PROJECT_ID,
+                 suite_id: Optional[int] = None, chunk_size: int = TESTRAIL_BULK_CHUNK,
+                 max_workers: int = TESTRAIL_MAX_WORKERS, journal: Optional[SyncJournal] = None):
+        """
+        Args:
+            api: Client used for every write.
+            project_id: Project the cases belong to.
+            suite_id: Suite used for bulk updates of cases queued without
+                one; by default the project's first suite, which is the only
+                one in single-suite projects.
+            chunk_size: Maximum number of cases per bulk request or create batch.
+            max_workers: Maximum number of requests in flight.
+            journal: Journal recording each write as started, then as
+                completed or failed. A write whose request got no response
+                stays started, as it may or may not have landed.
+        """
+        self.api = api
+        self.project_id = project_id
+        self.suite_id = suite_id
+        self.chunk_size = chunk_size
+        self.max_workers = max(1, max_workers)
+        self.journal = journal
+        self._updates = []
+        self._creates = []
+
+    def __len__(self):
+        return len(self._updates) + len(self._creates)
+
+    def update(self, cm_id: str, case_id: int, fields: Dict, suite_id: Optional[int] = None):
+        """Queue changed fields of an existing case"""
+        self._updates.append((cm_id, case_id, fields, suite_id))
+
+    def create(self, cm_id: str, section_id: int, fields: Dict):
+        """Queue a new case for a section"""
+        self._creates.append((cm_id, section_id, fields))
+
+    def flush(self) -> List[WriteResult]:
+        """Send every queued write and return one result per case: updates, then creates"""
+        updates, creates = self._updates, self._creates
+        self._updates, self._creates = [], []
+        with get_metrics().span('write', updates=len(updates), creates=len(creates)):
+            return self._send(updates, creates)
+
+    def _send(self, updates, creates) -> List[WriteResult]:
+        bulk, single = self._plan_updates(updates)
+
+        results = [None] * (len(updates) + len(creates))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(self._send_bulk, suite_id, fields, batch)
+                for suite_id, fields, batch in bulk
+            ]
+            futures += [pool.submit(self._send_update, *update) for update in single]
+            for future in futures:
+                for idx, result in future.result():
+                    results[idx] = result
+
+            offset = len(updates)
+            for start in range(0, len(creates), self.chunk_size):
+                chunk = list(enumerate(creates[start:start + self.chunk_size], offset + start))
+                for idx, result in pool.map(lambda item: self._send_create(item[0], *item[1]), chunk):
+                    results[idx] = result
+
+        return results
+
+    def _plan_updates(self, updates):
+        """Split updates into bulk batches of identical changes and single updates"""
+        groups = {}
+        for idx, (cm_id, case_id, fields, suite_id) in enumerate(updates):
+            key = (suite_id, json.dumps(fields, sort_keys=True))
+            groups.setdefault(key, []).append((idx, cm_id, case_id, fields))
+
+        bulk, single = [], []
+        for (suite_id, _), members in groups.items():
+            if len(members) == 1:
+                single.extend(members)
+                continue
+            if suite_id is None:
+                try:
+                    suite_id = self._default_suite_id()
+                except Exception:
+                    # No suite for the bulk endpoint; update_case needs none
+                    single.extend(members)
+                    continue
+            for start in range(0, len(members), self.chunk_size):
+                bulk.append((suite_id, members[0][3], members[start:start + self.chunk_size]))
+        return bulk, single
+
+    def _default_suite_id(self) -> int:
+        if self.suite_id is None:
+            self.suite_id = CaseFetcher(self.api).get_suite_ids(self.project_id)[0]
+        return self.suite_id
+
+    def _send_bulk(self, suite_id: int, fields: Dict, batch: List):
+        payload = dict(fields, case_ids=[case_id for _, _, case_id, _ in batch])
+        for _, cm_id, case_id, _ in batch:
+            self._record('started', cm_id, UPDATE, fields, case_id)
+        try:
+            self.api.send_post(f'update_cases/{suite_id}', payload)
+        except Exception:
+            # Retry one by one, so the failure is pinned on the right cases
+            return [result for update in batch for result in self._send_update(*update)]
+        for _, cm_id, case_id, _ in batch:
+            self._record('completed', cm_id, UPDATE, fields, case_id)
+        return [(idx, WriteResult(cm_id, UPDATE, case_id, fields=list(fields)))
+                for idx, cm_id, case_id, _ in batch]
+
+    def _send_update(self, idx: int, cm_id: str, case_id: int, fields: Dict):
+        self._record('started', cm_id, UPDATE, fields, case_id)
+        try:
+            self.api.send_post(f'update_case/{case_id}', fields)
+        except Exception as e:
+            self._record_error(e, cm_id, UPDATE, fields, case_id)
+            return [(idx, WriteResult(cm_id, UPDATE, case_id, error=str(e), fields=list(fields)))]
+        self._record('completed', cm_id, UPDATE, fields, case_id)
+        return [(idx, WriteResult(cm_id, UPDATE, case_id, fields=list(fields)))]
+
+    def _send_create(self, idx: int, cm_id: str, section_id: int, fields: Dict):
+        self._record('started', cm_id, CREATE, fields)
+        try:
+            result = self.api.send_post(f'add_case/{section_id}', fields)
+        except Exception as e:
+            self._record_error(e, cm_id, CREATE, fields)
+            return idx, WriteResult(cm_id, CREATE, error=str(e), fields=list(fields))
+        self._record('completed', cm_id, CREATE, fields, result.get('id'))
+        return idx, WriteResult(cm_id, CREATE, result.get('id'), fields=list(fields))
+
+    def _record(self, event: str, cm_id: str, action: str, fields: Dict, case_id: Optional[int] = None):
+        if self.journal:
+            getattr(self.journal, event)(cm_id, action, fields, case_id=case_id)
+
+    def _record_error(self, error: Exception, cm_id: str, action: str, fields: Dict,
+                      case_id: Optional[int] = None):
+        # Only an error response proves the write did not land; after a
+        # connection error or timeout the journal keeps it as started
+        if self.journal and isinstance(error, APIError):
+            self.journal.failed(cm_id, action, fields, str(error), case_id=case_id)
@@ -0,0 +1,91 @@
+"""Field-level comparison of document test cases with TestRail cases.
+
+Values are normalized before comparing, so formatting differences that
+TestRail introduces or ignores never count as changes: \r\n versus \n line
+endings, surrounding and repeated whitespace, empty versus missing step
+fields, and dropdown values given as a label on one side and an ID on the
+other.
+"""
+
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+_MISSING = object()
+_SPACES = re.compile(r'[ \t ]+')
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Unify line endings and whitespace of a text field"""
+    if value is None:
+        return ''
+    lines = str(value).replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    lines = [_SPACES.sub(' ', line).strip() for line in lines]
+    return '\n'.join(line for line in lines if line)
+
+
+def normalize_steps(steps) -> Tuple:
+    """Reduce custom_tc_steps to comparable tuples, dropping empty steps"""
+    normalized = []
+    for step in steps or []:
+        step = tuple(
+            normalize_text(step.get(key))
+            for key in ('content', 'expected', 'additional_info', 'refs')
+        )
+        if any(step):
+            normalized.append(step)
+    return tuple(normalized)
+
+
+def normalize_value(field: str, value: Any, labels: Optional[Dict[str, Dict]] = None) -> Any:
+    """Normalize a single field value for comparison.
+
+    Args:
+        field: Name of the TestRail field.
+        value: Value taken from either side.
+        labels: Optional {field: {label: id}} maps for dropdown fields, used
+            to turn labels into the IDs TestRail returns.
+    """
+    if field == 'custom_tc_steps':
+        return normalize_steps(value)
+    if isinstance(value, str):
+        mapping = (labels or {}).get(field, {})
+        if value.strip() in mapping:
+            return mapping[value.strip()]
+        if value.strip().isdigit():
+            return int(value.strip())
+        return normalize_text(value)
+    if value is None:
+        return ''
+    return value
+
+
+def get_field(case: Any, field: str) -> Any:
+    """Read a field from a TestRail case given as a dict or a TestRailCase"""
+    if isinstance(case, dict):
+        return case.get(field, _MISSING)
+    return getattr(case, field, _MISSING)
+
+
+def diff_case(doc_case: Dict, testrail_case: Any, fields: Optional[Iterable[str]] = None,
+              labels: Optional[Dict[str, Dict]] = None) -> Dict[str, Tuple[Any, Any]]:
+    """Compare a document case with the existing TestRail case.
+
+    Args:
+        doc_case: Case extracted from the document.
+        testrail_case: The existing case, as a dict or a TestRailCase.
+        fields: Fields to compare; defaults to every field of doc_case.
+        labels: Label to ID maps of dropdown fields, see normalize_value.
+
+    Returns:
+        {field: (testrail_value, doc_value)} for every field that differs.
+        Fields the TestRail case does not carry count as changed.
+    """
+    changes = {}
+    for field in (doc_case if fields is None else fields):
+        new = doc_case.get(field)
+        old = get_field(testrail_case, field)
+        if old is _MISSING:
+            changes[field] = (None, new)
+        elif normalize_value(field, old, labels) != normalize_value(field, new, labels):
+            changes[field] = (old, new)
+    return changes
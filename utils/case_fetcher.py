@@ -0,0 +1,150 @@
+"""Paginated, concurrent retrieval of TestRail cases.
+
+TestRail (6.7 and later) returns `get_cases` in pages of at most 250 cases,
+together with `_links.next` when more are available. The API never reports
+the total, so once the first page of a suite tells us there is more to read
+the fetcher requests the following pages speculatively, one wave of
+`max_workers` pages at a time, until a short or final page is seen.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .testrail import APIClient
+from config.constants import TESTRAIL_PAGE_SIZE, TESTRAIL_MAX_WORKERS
+
+# TestRail suite modes, see get_project
+SINGLE_SUITE_MODES = (1, 2)
+MULTI_SUITE_MODE = 3
+
+
+def build_uri(method: str, filters: Optional[Dict] = None) -> str:
+    """Append filters to an API method, e.g. get_cases/1&suite_id=2&type_id=1,3.
+
+    None values are dropped and lists are sent comma separated, as TestRail
+    expects for its multi-value filters.
+    """
+    uri = method
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = ','.join(str(v) for v in value)
+        uri += f'&{key}={value}'
+    return uri
+
+
+class CaseFetcher:
+    def __init__(self, api: APIClient, page_size: int = TESTRAIL_PAGE_SIZE,
+                 max_workers: int = TESTRAIL_MAX_WORKERS):
+        self.api = api
+        self.page_size = page_size
+        self.max_workers = max(1, max_workers)
+
+    def get_suite_ids(self, project_id: int) -> List[int]:
+        """Get the IDs of every suite in a project"""
+        return [suite['id'] for suite in self.api.send_get(f'get_suites/{project_id}')]
+
+    def fetch_cases(self, project_id: int, suite_ids: Optional[Iterable[int]] = None,
+                    **filters) -> List[Dict]:
+        """Fetch every case of a project matching the given filters.
+
+        Args:
+            project_id: The TestRail project to read from.
+            suite_ids: Suites to fan out over. When omitted, the project's
+                suite mode decides: single-suite projects are read with one
+                query, multi-suite projects are read suite by suite.
+            **filters: Extra get_cases filters, e.g. milestone_id or
+                updated_after. TestRail takes a single section_id, so a list
+                of sections is fetched one section at a time.
+
+        Returns:
+            The cases in a stable order: by suite, then as paged by TestRail.
+        """
+        if suite_ids is None:
+            suite_ids = self.resolve_suite_ids(project_id)
+        suite_ids = list(suite_ids)
+        section_ids = filters.get('section_id')
+        if isinstance(section_ids, (list, tuple, set)):
+            return self._fetch_sections(project_id, suite_ids, section_ids, filters)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # First page of every suite, all in flight at once
+            firsts = list(pool.map(
+                lambda suite_id: self._fetch_page(project_id, suite_id, 0, filters),
+                suite_ids
+            ))
+            pages = {}
+            next_offsets = {}
+            for suite_id, (cases, has_next) in zip(suite_ids, firsts):
+                pages[(suite_id, 0)] = cases
+                if has_next:
+                    next_offsets[suite_id] = self.page_size
+
+            # Remaining pages, in waves spread over the suites still open
+            while next_offsets:
+                per_suite = max(1, self.max_workers // len(next_offsets))
+                wave = [
+                    (suite_id, offset + i * self.page_size)
+                    for suite_id, offset in next_offsets.items()
+                    for i in range(per_suite)
+                ]
+                results = pool.map(
+                    lambda page: self._fetch_page(project_id, page[0], page[1], filters),
+                    wave
+                )
+                finished = set()
+                for (suite_id, offset), (cases, has_next) in zip(wave, results):
+                    pages[(suite_id, offset)] = cases
+                    if not has_next:
+                        finished.add(suite_id)
+                next_offsets = {
+                    suite_id: offset + per_suite * self.page_size
+                    for suite_id, offset in next_offsets.items()
+                    if suite_id not in finished
+                }
+
+        order = {suite_id: idx for idx, suite_id in enumerate(suite_ids)}
+        cases = []
+        seen = set()
+        for key in sorted(pages, key=lambda page: (order[page[0]], page[1])):
+            for case in pages[key]:
+                # Pages can shift under concurrent edits; keep the first copy
+                if case.get('id') not in seen:
+                    seen.add(case.get('id'))
+                    cases.append(case)
+        return cases
+
+    def _fetch_sections(self, project_id: int, suite_ids: List[Optional[int]],
+                        section_ids: Iterable[int], filters: Dict) -> List[Dict]:
+        cases = []
+        seen = set()
+        for section_id in section_ids:
+            for case in self.fetch_cases(project_id, suite_ids, **dict(filters, section_id=section_id)):
+                if case.get('id') not in seen:
+                    seen.add(case.get('id'))
+                    cases.append(case)
+        return cases
+
+    def resolve_suite_ids(self, project_id: int) -> List[Optional[int]]:
+        """Suites fetch_cases fans out over by default; [None] for single-suite projects, read in one query"""
+        project = self.api.send_get(f'get_project/{project_id}')
+        if isinstance(project, dict) and project.get('suite_mode') == MULTI_SUITE_MODE:
+            return self.get_suite_ids(project_id)
+        return [None]
+
+    def _fetch_page(self, project_id: int, suite_id: Optional[int], offset: int,
+                    filters: Dict) -> Tuple[List[Dict], bool]:
+        query = dict(filters, suite_id=suite_id, limit=self.page_size, offset=offset)
+        response = self.api.send_get(build_uri(f'get_cases/{project_id}', query))
+
+        # TestRail before 6.7 returns a plain, unpaginated list
+        if isinstance(response, list):
+            return (response if offset == 0 else []), False
+
+        if not isinstance(response, dict):
+            return [], False
+        cases = response.get('cases', [])
+        links = response.get('_links') or {}
+        has_next = bool(links.get('next')) and len(cases) >= self.page_size
+        return cases, has_next
@@ -0,0 +1,180 @@
+"""On-disk cache of TestRail cases with delta sync bookkeeping.
+
+Every case is stored as the raw API payload, keyed by project and case ID,
+next to the time of the last successful sync of each fetch scope. A warm
+start only has to ask TestRail for cases with updated_after set to that
+time. TestRail does not report deleted cases through updated_after, so a
+full refresh is needed from time to time to drop them.
+
+The sections of each suite are cached as well, for SectionResolver, along
+with the default suite of each project, so offline runs read the sections
+from the same suite as online ones.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config.constants import CASE_STORE_PATH
+
+ALL_SUITES = '*'
+
+
+def scope_key(suite_ids: Optional[Iterable[int]] = None) -> str:
+    """Key under which the sync time of a set of suites is stored"""
+    if suite_ids is None:
+        return ALL_SUITES
+    return ','.join(str(suite_id) for suite_id in sorted(suite_ids))
+
+
+class CaseStore:
+    def __init__(self, path: Path = CASE_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS cases (
+                    project_id INTEGER NOT NULL,
+                    id INTEGER NOT NULL,
+                    suite_id INTEGER,
+                    updated_on INTEGER,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (project_id, id)
+                );
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    project_id INTEGER NOT NULL,
+                    scope TEXT NOT NULL,
+                    last_sync INTEGER NOT NULL,
+                    PRIMARY KEY (project_id, scope)
+                );
+                CREATE TABLE IF NOT EXISTS sections (
+                    project_id INTEGER NOT NULL,
+                    scope TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (project_id, scope, id)
+                );
+                CREATE TABLE IF NOT EXISTS default_suites (
+                    project_id INTEGER PRIMARY KEY,
+                    suite_id INTEGER NOT NULL
+                );
+            ''')
+
+    def close(self):
+        self._conn.close()
+
+    def last_sync(self, project_id: int, scope: str = ALL_SUITES) -> Optional[int]:
+        """Unix time of the last successful sync of a scope, or None if never synced"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT last_sync FROM sync_state WHERE project_id = ? AND scope = ?',
+                (project_id, scope)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_cases(self, project_id: int, cases: List[Dict], synced_at: int,
+                   scope: str = ALL_SUITES, replace: bool = False,
+                   suite_ids: Optional[Iterable[Optional[int]]] = None):
+        """Upsert fetched cases and record the sync time of their scope.
+
+        Args:
+            project_id: Project the cases belong to.
+            cases: Raw case payloads as returned by get_cases.
+            synced_at: Unix time the fetch started.
+            scope: Scope key of the fetch, see scope_key.
+            replace: Drop the cached cases of the queried suites first (full
+                refresh), so cases deleted in TestRail are dropped too.
+            suite_ids: Suites the fetch queried, None standing for a query
+                over the whole project; by default the suites of the scope,
+                or the whole project for the all-suites scope.
+        """
+        rows = [
+            (project_id, case['id'], case.get('suite_id'), case.get('updated_on'), json.dumps(case))
+            for case in cases
+        ]
+        with self._lock, self._conn:
+            if replace:
+                self._delete_scope(project_id, scope, suite_ids)
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO cases (project_id, id, suite_id, updated_on, data) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sync_state (project_id, scope, last_sync) VALUES (?, ?, ?)',
+                (project_id, scope, synced_at)
+            )
+
+    def load_cases(self, project_id: int, suite_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Load cached cases of a project, optionally limited to some suites"""
+        query = 'SELECT data FROM cases WHERE project_id = ?'
+        params = [project_id]
+        if suite_ids is not None:
+            suite_ids = list(suite_ids)
+            query += ' AND suite_id IN (%s)' % ','.join('?' * len(suite_ids))
+            params.extend(suite_ids)
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY suite_id, id', params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_sections(self, project_id: int, sections: List[Dict], scope: str = ALL_SUITES,
+                      replace: bool = True):
+        """Cache the sections of a suite, by default replacing the ones cached before"""
+        rows = [(project_id, scope, section['id'], json.dumps(section)) for section in sections]
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute('DELETE FROM sections WHERE project_id = ? AND scope = ?',
+                                   (project_id, scope))
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO sections (project_id, scope, id, data) VALUES (?, ?, ?, ?)',
+                rows
+            )
+
+    def load_sections(self, project_id: int, scope: str = ALL_SUITES) -> Optional[List[Dict]]:
+        """Cached sections of a suite, or None if they were never cached"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM sections WHERE project_id = ? AND scope = ? ORDER BY id',
+                (project_id, scope)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows] if rows else None
+
+    def save_default_suite(self, project_id: int, suite_id: int):
+        """Record the suite that holds a project's sections when none is given"""
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO default_suites (project_id, suite_id) VALUES (?, ?)',
+                               (project_id, suite_id))
+
+    def load_default_suite(self, project_id: int) -> Optional[int]:
+        """Default suite of a project, or None if it was never resolved online"""
+        with self._lock:
+            row = self._conn.execute('SELECT suite_id FROM default_suites WHERE project_id = ?',
+                                     (project_id,)).fetchone()
+        return row[0] if row else None
+
+    def clear(self, project_id: int):
+        """Forget every cached case, section and sync time of a project"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cases WHERE project_id = ?', (project_id,))
+            self._conn.execute('DELETE FROM sections WHERE project_id = ?', (project_id,))
+            self._conn.execute('DELETE FROM sync_state WHERE project_id = ?', (project_id,))
+            self._conn.execute('DELETE FROM default_suites WHERE project_id = ?', (project_id,))
+
+    def _delete_scope(self, project_id: int, scope: str, suite_ids: Optional[Iterable[Optional[int]]]):
+        if suite_ids is None and scope != ALL_SUITES:
+            suite_ids = [int(suite_id) for suite_id in scope.split(',')]
+        if suite_ids is None or None in suite_ids:
+            self._conn.execute('DELETE FROM cases WHERE project_id = ?', (project_id,))
+            return
+        suite_ids = sorted(suite_ids)
+        if scope == ALL_SUITES:
+            self._conn.execute('DELETE FROM cases WHERE project_id = ? AND suite_id IS NULL', (project_id,))
+        if suite_ids:
+            self._conn.execute(
+                'DELETE FROM cases WHERE project_id = ? AND suite_id IN (%s)' % ','.join('?' * len(suite_ids)),
+                [project_id] + suite_ids
+            )
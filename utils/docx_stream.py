@@ -0,0 +1,89 @@
+"""Streaming block-text extraction from .docx files.
+
+Reads word/document.xml straight out of the zip with lxml's iterparse and
+yields the same sequence of block texts as iter_block_items in
+testplan_to_testrail.py, without building python-docx objects. Each
+top-level paragraph or table is released as soon as its text has been
+yielded, so memory stays flat however long the document is.
+"""
+
+import zipfile
+from typing import Iterator, List
+
+from lxml import etree
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_BODY = W + 'body'
+W_P = W + 'p'
+W_TBL = W + 'tbl'
+W_TR = W + 'tr'
+W_TC = W + 'tc'
+W_R = W + 'r'
+W_HYPERLINK = W + 'hyperlink'
+
+_RUN_TEXT = {
+    W + 'tab': '\t',
+    W + 'ptab': '\t',
+    W + 'cr': '\n',
+    W + 'noBreakHyphen': '-',
+}
+
+
+def iter_block_texts(doc_path: str) -> Iterator[str]:
+    """Yield the text of every paragraph of a document, tables included."""
+    with zipfile.ZipFile(doc_path) as archive:
+        with archive.open('word/document.xml') as xml:
+            for _, elem in etree.iterparse(xml, events=('end',), tag=(W_P, W_TBL)):
+                parent = elem.getparent()
+                if parent is None or parent.tag != W_BODY:
+                    continue  # Nested in a table, handled with its table
+                if elem.tag == W_P:
+                    yield paragraph_text(elem)
+                else:
+                    yield from table_texts(elem)
+                # Drop everything parsed so far
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+
+def paragraph_text(p) -> str:
+    """Text of a w:p element, as python-docx's Paragraph.text"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(W_R))
+    return ''.join(parts)
+
+
+def cell_texts(tc) -> List[str]:
+    """Texts of the paragraphs of a w:tc element, including nested tables"""
+    texts = []
+    for child in tc:
+        if child.tag == W_P:
+            texts.append(paragraph_text(child))
+        elif child.tag == W_TBL:
+            texts.extend(table_texts(child))
+    return texts
+
+
+def table_texts(tbl) -> Iterator[str]:
+    """Texts of a w:tbl element, row by row, visiting each physical w:tc once"""
+    for tr in tbl.iterchildren(W_TR):
+        for tc in tr.iterchildren(W_TC):
+            yield from cell_texts(tc)
+
+
+def _run_text(r) -> str:
+    parts = []
+    for child in r:
+        if child.tag == W + 't':
+            parts.append(child.text or '')
+        elif child.tag == W + 'br':
+            if child.get(W + 'type', 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        else:
+            parts.append(_RUN_TEXT.get(child.tag, ''))
+    return ''.join(parts)
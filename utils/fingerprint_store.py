@@ -0,0 +1,107 @@
+"""Content fingerprints of test plan documents and synced test cases.
+
+Two kinds of entries are kept:
+
+* document hash -> parsed test case index, so an unchanged document is
+  never parsed twice;
+* CM ID -> hash of the normalized case and the TestRail case it was last
+  synced to, so an unchanged case is never compared or written again.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .case_diff import normalize_value
+from config.constants import FINGERPRINT_STORE_PATH
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_case(case: Dict) -> str:
+    """SHA-256 of a test case, insensitive to the formatting normalized by case_diff"""
+    normalized = {field: normalize_value(field, value) for field, value in case.items()}
+    return hashlib.sha256(
+        json.dumps(normalized, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+class FingerprintStore:
+    def __init__(self, path: Path = FINGERPRINT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.executescript('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_hash TEXT NOT NULL,
+                    milestone_id INTEGER NOT NULL,
+                    version TEXT NOT NULL,
+                    test_case_index TEXT NOT NULL,
+                    PRIMARY KEY (doc_hash, milestone_id, version)
+                );
+                CREATE TABLE IF NOT EXISTS synced_cases (
+                    project_id INTEGER NOT NULL,
+                    cm_id TEXT NOT NULL,
+                    case_hash TEXT NOT NULL,
+                    case_id INTEGER NOT NULL,
+                    synced_at INTEGER NOT NULL,
+                    PRIMARY KEY (project_id, cm_id)
+                );
+            ''')
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_index(self, doc_hash: str, milestone_id: int, version: str) -> Optional[Dict]:
+        """Parsed index of a document, if that exact content was parsed before"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT test_case_index FROM documents '
+                'WHERE doc_hash = ? AND milestone_id = ? AND version = ?',
+                (doc_hash, milestone_id, version)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_index(self, doc_hash: str, milestone_id: int, version: str, test_case_index: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO documents (doc_hash, milestone_id, version, test_case_index) '
+                'VALUES (?, ?, ?, ?)',
+                (doc_hash, milestone_id, version, json.dumps(test_case_index))
+            )
+
+    def synced_case(self, project_id: int, cm_id: str) -> Optional[Tuple[str, int]]:
+        """(case hash, TestRail case ID) of the last successful sync of a CM ID"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT case_hash, case_id FROM synced_cases WHERE project_id = ? AND cm_id = ?',
+                (project_id, cm_id)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def record_synced(self, project_id: int, cm_id: str, case_hash: str, case_id: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO synced_cases (project_id, cm_id, case_hash, case_id, synced_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (project_id, cm_id, case_hash, case_id, int(time.time()))
+            )
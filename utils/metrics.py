@@ -0,0 +1,195 @@
+"""Structured logging, timing spans and request metrics for TestRail syncs.
+
+Code that does measurable work wraps it in a span:
+
+    with get_metrics().span('fetch', suite_ids=suite_ids):
+        ...
+
+Every span duration lands in a per-name histogram and is logged at DEBUG
+level with its fields. APIClient records the count, status codes and
+latency of every request per endpoint (get_cases, update_case, ...), and
+Metrics.report prints both at the end of a run, optionally saving them as
+JSON for later comparison.
+"""
+
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Upper bounds of the latency buckets, in seconds; the last bucket is unbounded
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class Histogram:
+    """Count, total, maximum and bucketed distribution of durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def merge(self, other: 'Histogram'):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0 < q <= 1)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 6),
+            'mean_s': round(self.total / self.count, 6) if self.count else 0.0,
+            'p50_s': round(self.percentile(0.5), 6),
+            'p95_s': round(self.percentile(0.95), 6),
+            'max_s': round(self.max, 6),
+            'buckets': {
+                (f'le_{bound}' if i < len(BUCKETS) else 'inf'): count
+                for i, (bound, count) in enumerate(zip(BUCKETS + (None,), self.buckets))
+            }
+        }
+
+
+class Metrics:
+    """Thread-safe registry of span and per-endpoint request histograms"""
+
+    def __init__(self):
+        self.spans = {}
+        self.requests = {}
+        self.statuses = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('testrail_sync.metrics')
+
+    @contextmanager
+    def span(self, name: str, **fields) -> Iterator[Dict]:
+        """Time a block of work. Fields can be added to the yielded dict while it runs."""
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.spans.setdefault(name, Histogram()).observe(seconds)
+            self._logger.debug('span %s', name, extra=dict(fields, span=name, duration_s=round(seconds, 6)))
+
+    def observe_request(self, endpoint: str, seconds: float, status):
+        """Record one HTTP attempt; status is the HTTP status or the exception type name"""
+        with self._lock:
+            self.requests.setdefault(endpoint, Histogram()).observe(seconds)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def drain_spans(self) -> Dict[str, Histogram]:
+        """Remove and return the span histograms, e.g. to send them from a worker process"""
+        with self._lock:
+            spans, self.spans = self.spans, {}
+            return spans
+
+    def merge_spans(self, spans: Dict[str, Histogram]):
+        with self._lock:
+            for name, histogram in spans.items():
+                self.spans.setdefault(name, Histogram()).merge(histogram)
+
+    def reset(self):
+        with self._lock:
+            self.spans, self.requests, self.statuses = {}, {}, {}
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                'spans': {name: histogram.to_dict() for name, histogram in self.spans.items()},
+                'requests': {
+                    endpoint: dict(histogram.to_dict(), statuses=dict(self.statuses[endpoint]))
+                    for endpoint, histogram in sorted(self.requests.items())
+                }
+            }
+
+    def report(self, path: Optional[str] = None) -> Dict:
+        """Print the span and request tables, and save them as JSON when a path is given"""
+        summary = self.summary()
+        if summary['spans']:
+            print(f"\n{'phase':20} {'count':>6} {'total s':>9} {'mean s':>8} {'max s':>8}")
+            for name, stats in summary['spans'].items():
+                print(f"{name:20} {stats['count']:>6} {stats['total_s']:>9.3f} "
+                      f"{stats['mean_s']:>8.3f} {stats['max_s']:>8.3f}")
+        if summary['requests']:
+            print(f"\n{'endpoint':24} {'count':>6} {'p50 s':>7} {'p95 s':>7} {'max s':>7}  statuses")
+            for endpoint, stats in summary['requests'].items():
+                statuses = ', '.join(f'{status}: {count}' for status, count in stats['statuses'].items())
+                print(f"{endpoint:24} {stats['count']:>6} {stats['p50_s']:>7.3f} "
+                      f"{stats['p95_s']:>7.3f} {stats['max_s']:>7.3f}  {statuses}")
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(dict(summary, generated_at=int(time.time())), f, indent=2)
+            print(f'\nMetrics written to {path}')
+        return summary
+
+
+class StructuredFormatter(logging.Formatter):
+    """Render records as `level logger message key=value ...`, or as JSON lines"""
+
+    def __init__(self, json_lines: bool = False):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        if self.json_lines:
+            entry = dict(time=round(record.created, 3), level=record.levelname,
+                         logger=record.name, message=record.getMessage(), **fields)
+            return json.dumps(entry, default=str)
+        line = f'{record.levelname:7} {record.name} {record.getMessage()}'
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+def configure_logging(level: str = 'WARNING', json_lines: bool = False):
+    """Send the sync's log records to stderr at the given level"""
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(StructuredFormatter(json_lines))
+    logger = logging.getLogger('testrail_sync')
+    logger.handlers = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+
+_shared_metrics = None
+_shared_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide metrics registry"""
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = Metrics()
+        return _shared_metrics
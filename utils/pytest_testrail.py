@@ -0,0 +1,253 @@
+"""pytest plugin reporting test outcomes to a TestRail run.
+
+Enable it with --testrail-report. Collected items are mapped to TestRail
+case IDs through a `testrail(case_id=...)` marker or their `test_case_<id>`
+name. Results are queued as tests finish and posted in chunks through
+add_results_for_cases by a background thread, so tests never wait on
+HTTP; the run itself is created by that thread on the first post, unless
+--testrail-run-id names an existing one. Whatever cannot be posted is appended to RESULTS_SPILL_PATH and can
+be sent later with replay_spilled_results.
+"""
+
+import json
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+from .testrail import APIClient
+from .testrail_client import create_api_client
+from config.constants import (
+    TESTRAIL_PROJECT_ID,
+    TESTRAIL_STATUS_IDS,
+    RESULTS_SPILL_PATH
+)
+
+_CASE_NAME = re.compile(r'test_case_(\d+)')
+_STOP = object()
+
+
+def get_case_id(item) -> Optional[int]:
+    """TestRail case ID of a collected item, from its testrail marker or its name"""
+    marker = item.get_closest_marker('testrail')
+    if marker:
+        case_id = marker.kwargs.get('case_id', marker.args[0] if marker.args else None)
+        if case_id is not None:
+            return int(case_id)
+    match = _CASE_NAME.search(item.name)
+    return int(match.group(1)) if match else None
+
+
+class ResultReporter:
+    def __init__(self, api: APIClient, run_id: Optional[int] = None,
+                 create_run: Optional[Callable[[], int]] = None, chunk_size: int = 50,
+                 flush_interval: float = 5.0, spill_path: Path = RESULTS_SPILL_PATH):
+        """
+        Args:
+            api: Client used to post results.
+            run_id: TestRail run receiving the results.
+            create_run: Called once on the background thread to create the
+                run when run_id is None. Without a run, results are spilled.
+            chunk_size: Results per add_results_for_cases request.
+            flush_interval: Seconds a result may wait for its chunk to fill up.
+            spill_path: JSON lines file collecting results that could not be posted.
+        """
+        self.api = api
+        self.run_id = run_id
+        self._create_run = create_run
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self.posted = 0
+        self.spilled = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='testrail-reporter', daemon=True)
+        self._thread.start()
+
+    def add(self, result: Dict):
+        """Queue one result; never blocks on the network"""
+        self._queue.put(result)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush every queued result and stop the background thread"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                result = self._queue.get(timeout=wait)
+            except queue.Empty:
+                result = None
+            if result is _STOP:
+                self._post(batch)
+                return
+            if result is not None:
+                batch.append(result)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.chunk_size or (batch and time.monotonic() >= deadline):
+                self._post(batch)
+                batch = []
+                deadline = None
+
+    def _post(self, batch: List[Dict]):
+        if not batch:
+            return
+        if self.run_id is None and self._create_run:
+            create_run, self._create_run = self._create_run, None
+            try:
+                self.run_id = create_run()
+            except Exception as e:
+                print(f"\nError creating TestRail run, results will be spilled to disk: {str(e)}")
+        if self.run_id is not None:
+            try:
+                self.api.send_post(f'add_results_for_cases/{self.run_id}', {'results': batch})
+                self.posted += len(batch)
+                return
+            except Exception as e:
+                print(f"\nError posting {len(batch)} results to TestRail: {str(e)}")
+        self._spill(batch)
+
+    def _spill(self, batch: List[Dict]):
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'run_id': self.run_id, 'results': batch}) + '\n')
+        self.spilled += len(batch)
+
+
+def replay_spilled_results(api: APIClient, spill_path: Path = RESULTS_SPILL_PATH,
+                           run_id: Optional[int] = None) -> int:
+    """Post spilled results, to their original run unless run_id is given.
+
+    Lines that fail again are kept in the spill file. Returns the number of
+    results posted.
+    """
+    spill_path = Path(spill_path)
+    if not spill_path.exists():
+        return 0
+    posted = 0
+    remaining = []
+    for line in spill_path.read_text(encoding='utf-8').splitlines():
+        entry = json.loads(line)
+        target = run_id if run_id is not None else entry['run_id']
+        try:
+            if target is None:
+                raise ValueError("no run ID for spilled results")
+            api.send_post(f'add_results_for_cases/{target}', {'results': entry['results']})
+            posted += len(entry['results'])
+        except Exception:
+            remaining.append(line)
+    if remaining:
+        spill_path.write_text('\n'.join(remaining) + '\n', encoding='utf-8')
+    else:
+        spill_path.unlink()
+    return posted
+
+
+class TestRailPlugin:
+    __test__ = False
+
+    def __init__(self, config):
+        self.config = config
+        # Under pytest-xdist, workers only tag items; the controller reports
+        self.is_worker = hasattr(config, 'workerinput')
+        self.case_ids = set()
+        self.outcomes = {}
+        self.api = None
+        self.reporter = None
+        if not self.is_worker:
+            self.api = create_api_client()
+            self.reporter = ResultReporter(
+                self.api, config.option.testrail_run_id, create_run=self._create_run,
+                chunk_size=config.option.testrail_chunk_size
+            )
+
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            case_id = get_case_id(item)
+            if case_id is not None:
+                item.user_properties.append(('testrail_case_id', case_id))
+                self.case_ids.add(case_id)
+
+    def pytest_runtest_logreport(self, report):
+        case_id = dict(report.user_properties).get('testrail_case_id')
+        if self.reporter is None or case_id is None:
+            return
+        outcome = self.outcomes.setdefault(report.nodeid, {'status': 'passed', 'duration': 0.0, 'comment': ''})
+        outcome['duration'] += report.duration
+        if report.failed:
+            outcome['status'] = 'failed'
+            outcome['comment'] = report.longreprtext
+        elif report.skipped and outcome['status'] == 'passed':
+            outcome['status'] = 'blocked'
+            outcome['comment'] = report.longreprtext
+
+        if report.when == 'teardown':
+            outcome = self.outcomes.pop(report.nodeid)
+            self.reporter.add({
+                'case_id': case_id,
+                'status_id': TESTRAIL_STATUS_IDS[outcome['status']],
+                'elapsed': f"{max(1, round(outcome['duration']))}s",
+                'comment': outcome['comment'][-4000:]
+            })
+
+    def pytest_sessionfinish(self, session):
+        if self.reporter is None:
+            return
+        self.reporter.close()
+        if self.reporter.posted or self.reporter.spilled:
+            print(f"\nTestRail: {self.reporter.posted} results posted to run {self.reporter.run_id}, "
+                  f"{self.reporter.spilled} spilled to {self.reporter.spill_path}")
+        self.api.close()
+
+    def _create_run(self) -> int:
+        option = self.config.option
+        run = {
+            'name': option.testrail_run_name or f"Automated run {time.strftime('%Y-%m-%d %H:%M:%S')}"
+        }
+        if self.case_ids:
+            run.update(include_all=False, case_ids=sorted(self.case_ids))
+        else:
+            # The xdist controller does not collect, so it cannot list the cases
+            run.update(include_all=True)
+        if option.testrail_suite_id:
+            run['suite_id'] = option.testrail_suite_id
+        run_id = self.api.send_post(f'add_run/{TESTRAIL_PROJECT_ID}', run)['id']
+        print(f"\nTestRail: created run {run_id}")
+        return run_id
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('testrail')
+    group.addoption('--testrail-report', action='store_true',
+                    help='Report test results to TestRail')
+    group.addoption('--testrail-run-id', type=int,
+                    help='Existing TestRail run to report to; a new run is created otherwise')
+    group.addoption('--testrail-run-name',
+                    help='Name of the TestRail run to create')
+    group.addoption('--testrail-suite-id', type=int,
+                    help='Suite of the TestRail run to create (multi-suite projects)')
+    group.addoption('--testrail-chunk-size', type=int, default=50,
+                    help='Results per add_results_for_cases request (default: 50)')
+    group.addoption('--testrail-case-ids', type=_id_list,
+                    help='Comma separated TestRail case IDs to generate tests for')
+    group.addoption('--testrail-section-ids', type=_id_list,
+                    help='Comma separated TestRail section IDs to generate tests for')
+
+
+def _id_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    if config.option.testrail_report:
+        config.pluginmanager.register(TestRailPlugin(config), 'testrail-reporter')
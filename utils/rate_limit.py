@@ -0,0 +1,141 @@
+"""Client-side throttling and retry policy for TestRail API calls.
+
+TestRail Cloud enforces a per-minute request limit per instance and answers
+429 with a Retry-After header once it is exceeded. A single Throttle is meant
+to be shared by every client and thread in the process, so concurrent
+fetches and writes stay under the limit together.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from config.constants import (
+    TESTRAIL_RATE_LIMIT,
+    TESTRAIL_RATE_BURST,
+    TESTRAIL_MAX_RETRIES
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it.
+
+        Tokens may go negative: each caller is given its own slot in the
+        future instead of all waiters racing for the next refill.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        """Block until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds`, e.g. after a 429."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = now
+
+
+class Throttle:
+    """Rate limit, backoff policy and counters shared by TestRail clients."""
+
+    def __init__(self, requests_per_minute: float = TESTRAIL_RATE_LIMIT,
+                 burst: int = TESTRAIL_RATE_BURST, max_retries: int = TESTRAIL_MAX_RETRIES,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._counters = {'requests': 0, 'throttled': 0, 'retried': 0}
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for the right to send one request."""
+        self.bucket.acquire()
+        self._count('requests')
+
+    def reserve(self) -> float:
+        """Claim the right to send one request without blocking.
+
+        Returns the seconds to wait before sending; used by asyncio callers,
+        which must sleep on the event loop rather than block the thread.
+        """
+        wait = self.bucket.reserve()
+        self._count('requests')
+        return wait
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def throttled(self, retry_after: Optional[str], attempt: int) -> float:
+        """Record a 429 and pause every caller for Retry-After seconds."""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff(attempt)
+        self.bucket.pause(delay)
+        self._count('throttled')
+        return delay
+
+    def retried(self):
+        self._count('retried')
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of the request, throttled and retried counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_shared_throttle = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_throttle() -> Throttle:
+    """Get the process-wide throttle used by RailClient."""
+    global _shared_throttle
+    with _shared_lock:
+        if _shared_throttle is None:
+            _shared_throttle = Throttle()
+        return _shared_throttle
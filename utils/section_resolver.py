@@ -0,0 +1,144 @@
+"""Resolution of TestRail sections by name.
+
+Test plans name the section of each case (Business, Performance, ...)
+rather than its ID. The sections of the suite are loaded with get_sections
+once, cached in the CaseStore, and looked up by name from then on. The
+cache is only refreshed when a name is missing from it, and sections still
+missing after that are created together, before any case is written.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from .testrail import APIClient
+from .case_fetcher import CaseFetcher, build_uri
+from .case_store import CaseStore, scope_key
+from config.constants import TESTRAIL_PAGE_SIZE, TESTRAIL_MAX_WORKERS
+
+
+def normalize_name(name: str) -> str:
+    return ' '.join(name.split()).casefold()
+
+
+class SectionResolver:
+    def __init__(self, api: APIClient, project_id: int, suite_id: Optional[int] = None,
+                 store: Optional[CaseStore] = None, offline: bool = False,
+                 max_workers: int = TESTRAIL_MAX_WORKERS):
+        """
+        Args:
+            api: Client used to read and create sections.
+            project_id: Project the sections belong to.
+            suite_id: Suite holding the sections; by default the project's
+                first suite, which is the only one in single-suite projects.
+                Offline, the first suite recorded in the store by an online
+                run is used.
+            store: Case store caching the sections between runs.
+            offline: Only use the cached sections, never contact TestRail.
+            max_workers: Maximum number of sections created at once.
+        """
+        self.api = api
+        self.project_id = project_id
+        self.suite_id = suite_id
+        self.store = store
+        self.offline = offline
+        self.max_workers = max(1, max_workers)
+        self._sections = None
+        self._refreshed = False
+        # Held while resolving, so targets sharing the resolver never create a section twice
+        self._lock = threading.RLock()
+
+    def resolve(self, name: str) -> Optional[int]:
+        """ID of the section with this name, or None if the suite has none.
+
+        Top-level sections win over nested sections of the same name.
+        """
+        return self.resolve_all([name]).get(name)
+
+    def resolve_all(self, names: Iterable[str]) -> Dict[str, int]:
+        """Map every name that has a section to its ID; missing names are left out"""
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            by_name = self._by_name()
+            if any(normalize_name(name) not in by_name for name in names) and self._refresh():
+                by_name = self._by_name()
+        return {name: by_name[normalize_name(name)] for name in names if normalize_name(name) in by_name}
+
+    def ensure(self, names: Iterable[str]) -> Dict[str, int]:
+        """Resolve every name, first creating the top-level sections that are missing"""
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            resolved = self.resolve_all(names)
+            missing = [name for name in names if name not in resolved]
+            if not missing:
+                return resolved
+            if self.offline:
+                raise RuntimeError(f"Sections missing from the local cache: {', '.join(missing)}")
+
+            suite_id = self.get_suite_id()
+            # TestRail has no bulk add_section, so the whole batch is sent at once instead
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                created = list(pool.map(
+                    lambda name: self.api.send_post(
+                        f'add_section/{self.project_id}', {'name': name, 'suite_id': suite_id}
+                    ),
+                    missing
+                ))
+            self._sections.extend(created)
+            if self.store:
+                self.store.save_sections(self.project_id, created, self._scope(), replace=False)
+            resolved.update((name, section['id']) for name, section in zip(missing, created))
+            return resolved
+
+    def _by_name(self) -> Dict[str, int]:
+        if self._sections is None:
+            cached = self.store.load_sections(self.project_id, self._scope()) if self.store else None
+            if cached is not None:
+                self._sections = cached
+            elif not self._refresh():
+                self._sections = []
+        by_name = {}
+        # Deepest first, so top-level sections overwrite nested ones of the same name
+        for section in sorted(self._sections, key=lambda section: -(section.get('depth') or 0)):
+            by_name[normalize_name(section['name'])] = section['id']
+        return by_name
+
+    def _refresh(self) -> bool:
+        """Reload the sections from TestRail, at most once; False when that is not possible"""
+        if self.offline or self._refreshed:
+            return False
+        self._refreshed = True
+        self._sections = self._fetch_sections()
+        if self.store:
+            self.store.save_sections(self.project_id, self._sections, self._scope())
+        return True
+
+    def _fetch_sections(self) -> List[Dict]:
+        sections = []
+        offset = 0
+        while True:
+            query = {'suite_id': self.get_suite_id(), 'limit': TESTRAIL_PAGE_SIZE, 'offset': offset}
+            response = self.api.send_get(build_uri(f'get_sections/{self.project_id}', query))
+            # TestRail before 6.7 returns a plain, unpaginated list
+            if isinstance(response, list):
+                return response
+            page = response.get('sections', [])
+            sections.extend(page)
+            if not (response.get('_links') or {}).get('next') or len(page) < TESTRAIL_PAGE_SIZE:
+                return sections
+            offset += TESTRAIL_PAGE_SIZE
+
+    def get_suite_id(self) -> Optional[int]:
+        """Suite holding the sections, looked up on first use when none was given"""
+        if self.suite_id is None:
+            if self.offline:
+                self.suite_id = self.store.load_default_suite(self.project_id) if self.store else None
+            else:
+                self.suite_id = CaseFetcher(self.api).get_suite_ids(self.project_id)[0]
+                if self.store:
+                    self.store.save_default_suite(self.project_id, self.suite_id)
+        return self.suite_id
+
+    def _scope(self) -> str:
+        suite_id = self.get_suite_id()
+        return scope_key(None if suite_id is None else [suite_id])
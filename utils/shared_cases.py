@@ -0,0 +1,102 @@
+"""One TestRail case load per test run, shared by every pytest process.
+
+Within a process, load_shared_client always returns the same RailClient,
+so test modules and fixtures never fetch twice. Under pytest-xdist, the
+first worker to take the file lock fetches the cases and writes them to a
+snapshot tagged with the run's PYTEST_XDIST_TESTRUNUID; the other workers
+wait on the lock and then read that snapshot instead of calling TestRail.
+The shared client is closed when the process exits.
+"""
+
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from .testrail_client import RailClient
+from config.constants import CASE_SNAPSHOT_PATH
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+_client = None
+_client_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Exclusive lock on a file, held across processes"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == 'nt':
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def load_shared_client(snapshot_path: Path = CASE_SNAPSHOT_PATH) -> RailClient:
+    """Get the RailClient shared by this process, loading cases at most once per run"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            run_id = os.getenv('PYTEST_XDIST_TESTRUNUID')
+            if run_id:
+                _client = _load_from_snapshot(Path(snapshot_path), run_id)
+            else:
+                _client = RailClient()
+        return _client
+
+
+def close_shared_client():
+    """Close the RailClient shared by this process, if one was loaded"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+atexit.register(close_shared_client)
+
+
+def _load_from_snapshot(snapshot_path: Path, run_id: str) -> RailClient:
+    with file_lock(snapshot_path.with_name(snapshot_path.name + '.lock')):
+        cases = _read_snapshot(snapshot_path, run_id)
+        if cases is not None:
+            return RailClient(cases=cases)
+
+        client = RailClient()
+        if client.fetch_error is not None:
+            # The cached or mock cases served instead must not reach the other workers as real ones
+            client.close()
+            raise client.fetch_error
+        tmp_path = snapshot_path.with_name(snapshot_path.name + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'run_id': run_id, 'cases': client.testrail_data['cases']}, f)
+        os.replace(tmp_path, snapshot_path)
+        return client
+
+
+def _read_snapshot(snapshot_path: Path, run_id: str) -> Optional[list]:
+    try:
+        with open(snapshot_path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if snapshot.get('run_id') != run_id:
+        return None
+    return snapshot['cases']
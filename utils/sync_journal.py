@@ -0,0 +1,118 @@
+"""Append-only journal of the writes of a sync run.
+
+Every add_case/update_case is recorded as `started` before it is sent and
+as `completed` (with the TestRail case ID) or `failed` once the response
+arrives, keyed by CM ID and a hash of the payload. After a crash the journal
+tells which writes landed: completed ones can be skipped, and a create that
+was started but never completed may or may not exist in TestRail, so it is
+reconciled by looking its CM ID up before being sent again.
+
+Records are JSON lines flushed as they are written, so a killed process
+loses at most the record being written; a torn last line is ignored.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .fingerprint_store import hash_case
+from config.constants import SYNC_JOURNAL_PATH
+
+STARTED = 'started'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+def journal_key(cm_id: str, action: str, payload_hash: str) -> str:
+    return f'{action}:{cm_id}:{payload_hash}'
+
+
+class SyncJournal:
+    def __init__(self, path: Path = SYNC_JOURNAL_PATH, resume: bool = False):
+        """
+        Args:
+            path: JSON lines file holding the journal.
+            resume: Keep the records of the previous run and append to them;
+                otherwise the journal starts empty.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._state = self._load(self.path) if resume else {}
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() and not self._ends_with_newline():
+            # Terminate the torn line of a crashed run, so it stays a single bad record
+            self._file.write('\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @classmethod
+    def unfinished(cls, path: Path = SYNC_JOURNAL_PATH) -> int:
+        """Number of writes a journal on disk records as started but never completed or failed"""
+        return sum(1 for record in cls._load(Path(path)).values() if record['event'] == STARTED)
+
+    @staticmethod
+    def payload_hash(fields: Dict) -> str:
+        return hash_case(fields)
+
+    def state(self, cm_id: str, action: str, fields: Dict) -> Optional[Dict]:
+        """Last record of a write, or None when it was never started"""
+        return self._state.get(journal_key(cm_id, action, self.payload_hash(fields)))
+
+    def in_flight(self, action: Optional[str] = None) -> List[Dict]:
+        """Writes started but neither completed nor failed, i.e. with an unknown outcome"""
+        return [
+            record for record in self._state.values()
+            if record['event'] == STARTED and (action is None or record['action'] == action)
+        ]
+
+    def started(self, cm_id: str, action: str, fields: Dict, case_id: Optional[int] = None):
+        self._append(STARTED, cm_id, action, fields, case_id=case_id)
+
+    def completed(self, cm_id: str, action: str, fields: Dict, case_id: Optional[int],
+                  reconciled: bool = False):
+        extra = {'reconciled': True} if reconciled else {}
+        self._append(COMPLETED, cm_id, action, fields, case_id=case_id, **extra)
+
+    def failed(self, cm_id: str, action: str, fields: Dict, error: str,
+               case_id: Optional[int] = None):
+        self._append(FAILED, cm_id, action, fields, case_id=case_id, error=error)
+
+    def _append(self, event: str, cm_id: str, action: str, fields: Dict, **extra):
+        record = dict(event=event, cm_id=cm_id, action=action,
+                      payload_hash=self.payload_hash(fields), at=round(time.time(), 3), **extra)
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._state[journal_key(cm_id, action, record['payload_hash'])] = record
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    @staticmethod
+    def _load(path: Path) -> Dict[str, Dict]:
+        state = {}
+        if not os.path.exists(path):
+            return state
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:  # Torn write of a crashed run
+                    continue
+                state[journal_key(record['cm_id'], record['action'], record['payload_hash'])] = record
+        return state
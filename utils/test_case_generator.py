@@ -1,41 +1,57 @@
-from typing import List, Dict, Any
+from typing import Iterable, List, Optional
 import pytest
 from .testrail_client import TestRailCase
 
 class TestCaseGenerator:
-    def generate_test_function(self, test_case):
-        def test_func():
-            # Log complete test case information
-            print("\n=== Test Case Details ===")
-            print(f"ID: {test_case.id}")
-            print(f"Title: {test_case.title}")
-            print(f"Section ID: {test_case.section_id}")
-            print(f"CM ID: {test_case.custom_cm_id}")
-            print(f"Summary: {test_case.custom_summary}")
-            print(f"Steps: {test_case.custom_steps}")
-            print("\nExpected Results:")
-            for i, expected in enumerate(test_case.custom_expected, 1):
-                print(f"  {i}. {expected}")
-            print("=====================")
-            
-            # Basic assertions
-            assert test_case.id is not None, "Test case ID should not be None"
-            assert test_case.title, "Test case should have a title"
-            assert test_case.custom_expected, "Test case should have expected results"
-            assert test_case.custom_steps, "Test case should have steps"
-            
-            # Aquí iría la implementación real del test
-            assert False, "Test implementation pending"
-        
-        test_name = f"test_case_{test_case.id}"
-        return {test_name: test_func}
+    __test__ = False
 
-    @classmethod
-    def generate_test_module(cls, test_cases: List[TestRailCase]) -> Dict[str, Any]:
-        test_functions = {}
-        generator = cls()
-        
+    @staticmethod
+    def build_params(test_cases: Iterable[TestRailCase], case_ids: Optional[Iterable[int]] = None,
+                     section_ids: Optional[Iterable[int]] = None) -> List:
+        """
+        Turn TestRail cases into pytest parameters with the case ID as param ID.
+        Cases are filtered by case and section IDs before any parameter is
+        built; -k is left to pytest.
+        """
+        case_ids = set(case_ids) if case_ids else None
+        section_ids = set(section_ids) if section_ids else None
+
+        params = []
         for test_case in test_cases:
-            test_functions.update(generator.generate_test_function(test_case))
-        
-        return test_functions 
\ No newline at end of file
+            if case_ids is not None and test_case.id not in case_ids:
+                continue
+            if section_ids is not None and test_case.section_id not in section_ids:
+                continue
+            params.append(pytest.param(
+                test_case,
+                id=str(test_case.id),
+                marks=pytest.mark.testrail(case_id=test_case.id)
+            ))
+        return params
+
+    @staticmethod
+    def run_test_case(test_case: TestRailCase):
+        steps = [step.get("content", "") for step in test_case.custom_tc_steps or []]
+        expected = [step.get("expected", "") for step in test_case.custom_tc_steps or []]
+
+        # Log complete test case information
+        print("\n=== Test Case Details ===")
+        print(f"ID: {test_case.id}")
+        print(f"Title: {test_case.title}")
+        print(f"Section ID: {test_case.section_id}")
+        print(f"CM ID: {test_case.custom_cm_id}")
+        print(f"Summary: {test_case.custom_summary}")
+        print(f"Steps: {steps}")
+        print("\nExpected Results:")
+        for i, result in enumerate(expected, 1):
+            print(f"  {i}. {result}")
+        print("=====================")
+
+        # Basic assertions
+        assert test_case.id is not None, "Test case ID should not be None"
+        assert test_case.title, "Test case should have a title"
+        assert any(expected), "Test case should have expected results"
+        assert any(steps), "Test case should have steps"
+
+        # Aquí iría la implementación real del test
+        assert False, "Test implementation pending"
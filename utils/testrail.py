@@ -14,18 +14,80 @@ Copyright Gurock Software GmbH. See license.md for details.
 
 import base64
 import json
+import os
+import time
+import uuid
 
 import requests
+from requests.adapters import HTTPAdapter
 
+CHUNK_SIZE = 1024 * 1024     # Bytes read or written at a time for attachments
 
 
 class APIClient:
-    def __init__(self, base_url):
-        self.user = ''
-        self.password = ''
+    def __init__(self, base_url, pool_size=10, timeout=(10, 60), keep_alive=True,
+                 throttle=None, metrics=None):
+        """Create a client bound to one TestRail instance.
+
+        Args:
+            base_url: The TestRail URL, e.g. https://example.testrail.io.
+            pool_size: Number of connections kept open per host; should be at
+                least the number of threads sharing this client.
+            timeout: Seconds to wait for the server, either a single value or
+                a (connect, read) tuple.
+            keep_alive: Reuse connections between requests. When False every
+                request asks the server to close its connection.
+            throttle: Optional utils.rate_limit.Throttle, usually shared by
+                every client of the process. When set, requests are rate
+                limited, 429 responses are retried after Retry-After, and
+                GETs are retried with backoff on 5xx and connection errors.
+            metrics: Optional utils.metrics.Metrics recording the count,
+                status and latency of every request per API method.
+        """
+        self.__user = ''
+        self.__password = ''
+        self.__auth = None
         if not base_url.endswith('/'):
             base_url += '/'
         self.__url = base_url + 'index.php?/api/v2/'
+        self.timeout = timeout
+        self.throttle = throttle
+        self.metrics = metrics
+
+        self.__session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.__session.mount('https://', adapter)
+        self.__session.mount('http://', adapter)
+        if not keep_alive:
+            self.__session.headers['Connection'] = 'close'
+
+    @property
+    def user(self):
+        return self.__user
+
+    @user.setter
+    def user(self, value):
+        self.__user = value
+        self.__auth = None
+
+    @property
+    def password(self):
+        return self.__password
+
+    @password.setter
+    def password(self, value):
+        self.__password = value
+        self.__auth = None
+
+    def close(self):
+        """Close every pooled connection held by the client."""
+        self.__session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def send_get(self, uri, filepath=None):
         """Issue a GET request (read) against the API.
@@ -57,26 +119,41 @@ class APIClient:
     def __send_request(self, method, uri, data):
         url = self.__url + uri
 
-        auth = str(
-            base64.b64encode(
-                bytes('%s:%s' % (self.user, self.password), 'utf-8')
-            ),
-            'ascii'
-        ).strip()
-        headers = {'Authorization': 'Basic ' + auth}
+        if self.__auth is None:
+            self.__auth = 'Basic ' + str(
+                base64.b64encode(
+                    bytes('%s:%s' % (self.user, self.password), 'utf-8')
+                ),
+                'ascii'
+            ).strip()
+        headers = {'Authorization': self.__auth}
 
-        if method == 'POST':
-            if uri[:14] == 'add_attachment':    # add_attachment API method
-                files = {'attachment': (open(data, 'rb'))}
-                response = requests.post(url, headers=headers, files=files)
-                files['attachment'].close()
+        attempt = 0
+        while True:
+            if self.throttle:
+                self.throttle.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.__send_once(method, uri, url, dict(headers), data)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.__observe(uri, start, type(e).__name__)
+                if method != 'GET' or not self.__can_retry(attempt):
+                    raise
+                time.sleep(self.throttle.backoff(attempt))
             else:
-                headers['Content-Type'] = 'application/json'
-                payload = bytes(json.dumps(data), 'utf-8')
-                response = requests.post(url, headers=headers, data=payload)
-        else:
-            headers['Content-Type'] = 'application/json'
-            response = requests.get(url, headers=headers)
+                self.__observe(uri, start, response.status_code)
+                if response.status_code == 429 and self.__can_retry(attempt):
+                    # Rejected before processing, so retrying a POST is safe too
+                    response.close()
+                    self.throttle.throttled(response.headers.get('Retry-After'), attempt)
+                elif (response.status_code >= 500 and method == 'GET'
+                      and self.__can_retry(attempt)):
+                    response.close()
+                    time.sleep(self.throttle.backoff(attempt))
+                else:
+                    break
+            self.throttle.retried()
+            attempt += 1
 
         if response.status_code > 201:
             try:
@@ -87,16 +164,112 @@ class APIClient:
         else:
             if uri[:15] == 'get_attachment/':   # Expecting file, not JSON
                 try:
-                    open(data, 'wb').write(response.content)
+                    with open(data, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            f.write(chunk)
                     return (data)
                 except:
                     return ("Error saving attachment.")
+                finally:
+                    response.close()
             else:
                 try:
                     return response.json()
                 except: # Nothing to return
                     return {}
 
+    def __can_retry(self, attempt):
+        return self.throttle is not None and attempt < self.throttle.max_retries
+
+    def __observe(self, uri, start, status):
+        if self.metrics:
+            self.metrics.observe_request(api_method(uri), time.perf_counter() - start, status)
+
+    def __send_once(self, method, uri, url, headers, data):
+        if method == 'POST':
+            if uri[:14] == 'add_attachment':    # add_attachment API method
+                with MultipartFile(data) as body:
+                    headers['Content-Type'] = body.content_type
+                    response = self.__session.post(url, headers=headers, data=body,
+                                                   timeout=self.timeout)
+            else:
+                headers['Content-Type'] = 'application/json'
+                payload = bytes(json.dumps(data), 'utf-8')
+                response = self.__session.post(url, headers=headers, data=payload,
+                                               timeout=self.timeout)
+        else:
+            headers['Content-Type'] = 'application/json'
+            response = self.__session.get(url, headers=headers, timeout=self.timeout,
+                                          stream=uri[:15] == 'get_attachment/')
+        return response
+
+
+
+class MultipartFile:
+    """A multipart/form-data body holding one file, streamed from disk.
+
+    Exposes its total length, so the request carries a Content-Length and
+    the file is sent chunk by chunk instead of being read into memory.
+    """
+
+    def __init__(self, path, field='attachment'):
+        boundary = uuid.uuid4().hex
+        filename = os.path.basename(path).replace('"', '')
+        self.content_type = 'multipart/form-data; boundary=%s' % boundary
+        self.__head = bytes(
+            '--%s\r\nContent-Disposition: form-data; name="%s"; filename="%s"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n' % (boundary, field, filename),
+            'utf-8'
+        )
+        self.__tail = bytes('\r\n--%s--\r\n' % boundary, 'utf-8')
+        self.__length = len(self.__head) + os.path.getsize(path) + len(self.__tail)
+        self.__file = open(path, 'rb')
+        self.__parts = [self.__head, self.__file, self.__tail]
+
+    def __len__(self):
+        return self.__length
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        chunks = []
+        while self.__parts and (size < 0 or size > 0):
+            part = self.__parts[0]
+            if isinstance(part, bytes):
+                chunk = part if size < 0 else part[:size]
+                if len(chunk) == len(part):
+                    self.__parts.pop(0)
+                else:
+                    self.__parts[0] = part[len(chunk):]
+            else:
+                chunk = part.read(size)
+                if not chunk or size < 0 or len(chunk) < size:
+                    self.__parts.pop(0)
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+
+def api_method(uri):
+    """The API method of a request URI, e.g. get_cases for get_cases/4&limit=250."""
+    return uri.split('&', 1)[0].split('/', 1)[0]
+
 
 
 class APIError(Exception):
@@ -1,65 +1,166 @@
-from typing import Dict, List
+import json
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
 from .testrail import APIClient
+from .case_fetcher import CaseFetcher
+from .case_store import CaseStore, scope_key
+from .section_resolver import SectionResolver
+from .rate_limit import get_shared_throttle
+from .metrics import get_metrics
 from config.constants import (
     TESTRAIL_URL,
     TESTRAIL_USER,
     TESTRAIL_PASSWORD,
-    TESTRAIL_PROJECT_ID
+    TESTRAIL_PROJECT_ID,
+    TESTRAIL_POOL_SIZE,
+    TESTRAIL_TIMEOUT,
+    TESTRAIL_OFFLINE,
+    TESTRAIL_SYNC_SKEW
 )
 
+AUTOMATED_TYPE_ID = 3
+
+logger = logging.getLogger('testrail_sync.client')
+
+def create_api_client(pool_size: int = TESTRAIL_POOL_SIZE) -> APIClient:
+    """Create an APIClient for the configured TestRail instance, sharing the process-wide throttle and metrics"""
+    api = APIClient(
+        TESTRAIL_URL,
+        pool_size=pool_size,
+        timeout=TESTRAIL_TIMEOUT,
+        throttle=get_shared_throttle(),
+        metrics=get_metrics()
+    )
+    api.user = TESTRAIL_USER
+    api.password = TESTRAIL_PASSWORD
+    return api
+
 class TestRailCase:
+    """
+    Compact view of a TestRail case. Only the fields listed in FIELDS are
+    kept, in slots rather than a per-instance dict; every other field of
+    the API payload is dropped. custom_tc_steps is held as its JSON text
+    until first read, then decoded once and kept, so a case costs a few
+    strings until its steps are needed and in-place edits of the steps
+    stick. custom_summary is plain text in the payload, with nothing to
+    decode, and is kept as is.
+    """
+    __test__ = False
+
+    FIELDS = (
+        'id', 'title', 'section_id', 'suite_id', 'type_id', 'template_id', 'priority_id',
+        'milestone_id', 'custom_cm_id', 'custom_summary', 'custom_tc_steps', 'custom_preconds',
+        'custom_test_set', 'custom_testing_type', 'custom_parent_requirements'
+    )
+    __slots__ = tuple(field for field in FIELDS if field != 'custom_tc_steps') + ('_custom_tc_steps',)
+
     def __init__(self, case_data: Dict):
-        self.id = case_data.get('id')
-        self.title = case_data.get('title')
-        self.section_id = case_data.get('section_id')
-        self.type_id = case_data.get('type_id')
-        self.custom_cm_id = case_data.get('custom_cm_id')
-        self.custom_summary = case_data.get('custom_summary')
-        self.custom_tc_steps = case_data.get('custom_tc_steps', [])
-        self.custom_preconds = case_data.get('custom_preconds')
-        self.custom_test_set = case_data.get('custom_test_set')
-        self.custom_testing_type = case_data.get('custom_testing_type')
-        self.custom_parent_requirements = case_data.get('custom_parent_requirements')
+        for field in self.FIELDS:
+            setattr(self, field, case_data.get(field))
+
+    @property
+    def custom_tc_steps(self) -> List[Dict]:
+        if isinstance(self._custom_tc_steps, str):
+            self._custom_tc_steps = json.loads(self._custom_tc_steps)
+        elif self._custom_tc_steps is None:
+            self._custom_tc_steps = []
+        return self._custom_tc_steps
+
+    @custom_tc_steps.setter
+    def custom_tc_steps(self, steps: Optional[List[Dict]]):
+        self._custom_tc_steps = json.dumps(steps, separators=(',', ':')) if steps else None
+
+    def to_dict(self) -> Dict:
+        """The kept fields as an API-style case payload"""
+        payload = {field: getattr(self, field) for field in self.FIELDS if field != 'custom_tc_steps'}
+        # Decoded for the payload only, so steps that were never read stay encoded
+        steps = self._custom_tc_steps
+        payload['custom_tc_steps'] = json.loads(steps) if isinstance(steps, str) else (steps or [])
+        return payload
+
 class RailClient:
-    def __init__(self):
-        self.api = APIClient(TESTRAIL_URL)
-        self.api.user = TESTRAIL_USER
-        self.api.password = TESTRAIL_PASSWORD
-        self.testrail_data = self._fetch_from_testrail()
-        self.test_cases = self._load_test_cases()
+    def __init__(self, suite_ids: Optional[Iterable[int]] = None, use_cache: bool = True,
+                 offline: bool = TESTRAIL_OFFLINE, full_refresh: bool = False,
+                 cases: Optional[List[Dict]] = None, project_id: int = TESTRAIL_PROJECT_ID,
+                 api: Optional[APIClient] = None, store: Optional[CaseStore] = None):
+        """
+        Args:
+            suite_ids: Suites to load; by default the whole project
+            use_cache: Keep cases in the local CaseStore and only download
+                cases updated since the last sync. Full downloads only ask
+                TestRail for automated cases; delta syncs fetch every updated
+                case, so a case that stops being automated is noticed.
+            offline: Serve cases from the local CaseStore without contacting TestRail
+            full_refresh: Download every case again, dropping cached cases
+                that were deleted in TestRail
+            cases: Automated cases already loaded elsewhere, e.g. from a
+                shared snapshot; nothing is fetched when given
+            project_id: Project to sync
+            api: Client shared with other RailClients, e.g. one per project;
+                a new one is created by default. Shared clients and stores
+                are left open by close().
+            store: Case cache shared with other RailClients
+        """
+        if offline and not use_cache:
+            raise ValueError("Offline mode needs the local case cache")
+        self.project_id = project_id
+        self.api = api or create_api_client()
+        self._owns_api = api is None
+        self.suite_ids = suite_ids
+        self.fetcher = CaseFetcher(self.api)
+        self.store = (store or CaseStore()) if use_cache else None
+        self._owns_store = store is None
+        self.offline = offline
+        self.full_refresh = full_refresh
+        self._case_queries = {}
+        # SectionResolvers by suite ID; None holds the default suite's
+        self._sections = {}
+        self._sections_lock = threading.Lock()
+        # Set when the cases could not be fetched and cached or mock cases were served instead
+        self.fetch_error = None
+        # Only the compact cases are kept; the raw payloads are released here
+        raw_cases = cases if cases is not None else self._fetch_from_testrail()['cases']
+        self.test_cases = self._load_test_cases(raw_cases)
+
+    def close(self):
+        """Release the pooled TestRail connections and the case cache"""
+        if self._owns_api:
+            self.api.close()
+        if self.store and self._owns_store:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def _fetch_from_testrail(self) -> Dict:
         """Fetch test cases from TestRail"""
         try:
-            print(f"\nDebug information:")
-            print(f"Base URL: {TESTRAIL_URL}")
-            print(f"Project ID: {TESTRAIL_PROJECT_ID}")
-            print(f"User: {TESTRAIL_USER}")
+            logger.debug('Fetching cases', extra={'url': TESTRAIL_URL, 'project_id': self.project_id,
+                                                  'user': TESTRAIL_USER})
             
-            # Obtener todos los casos de prueba del proyecto
-            response = self.api.send_get(f'get_cases/{TESTRAIL_PROJECT_ID}')
-            print(f"Response type: {type(response)}")
-            print(f"Response keys: {response.keys() if isinstance(response, dict) else 'Not a dict'}")
-            
-            # Extraer los casos del diccionario de respuesta
-            cases = response.get('cases', []) if isinstance(response, dict) else []
-            print(f"Successfully retrieved {len(cases)} cases")
-            
-            # Update filter to use type_id instead of custom_automation
-            automated_cases = [
-                case for case in cases
-                if isinstance(case, dict) and case.get('type_id') == 3
-            ]
-            print(f"Found {len(automated_cases)} automated cases")
-            print(f"First case example: {automated_cases[0] if automated_cases else 'No cases found'}")
+            # Obtener todos los casos de prueba del proyecto, página por página
+            with get_metrics().span('fetch', source='project') as span:
+                cases = self._sync_cases()
+                automated_cases = self._automated(cases)
+                span.update(cases=len(cases), automated=len(automated_cases))
+            logger.info('Retrieved cases', extra={'cases': len(cases), 'automated': len(automated_cases)})
             
             return {'cases': automated_cases}
             
         except Exception as e:
-            print(f"\nError fetching from TestRail:")
-            print(f"Error type: {type(e).__name__}")
-            print(f"Error message: {str(e)}")
-            print(f"Full URL being used: {self.api._APIClient__url}")
+            self.fetch_error = e
+            logger.warning('Error fetching from TestRail',
+                           extra={'error_type': type(e).__name__, 'error': str(e), 'url': TESTRAIL_URL})
+            cached = self.store.load_cases(self.project_id, self.suite_ids) if self.store else []
+            if cached:
+                logger.warning('Serving cached cases', extra={'cases': len(cached)})
+                return {'cases': self._automated(cached)}
+            logger.warning('Serving the mock case')
             return {
                 'cases': [
                     {
@@ -85,14 +186,158 @@ class RailClient:
                 ]
             }
 
-    def _load_test_cases(self) -> List[TestRailCase]:
+    def _sync_cases(self) -> List[Dict]:
+        """Bring the local cache up to date and return every cached case"""
+        if not self.store:
+            return self.fetcher.fetch_cases(self.project_id, suite_ids=self.suite_ids, type_id=AUTOMATED_TYPE_ID)
+        if self.offline:
+            logger.info('Offline mode: serving cases from the local cache')
+            return self.store.load_cases(self.project_id, self.suite_ids)
+
+        scope = scope_key(self.suite_ids)
+        last_sync = None if self.full_refresh else self.store.last_sync(self.project_id, scope)
+        if last_sync is not None:
+            filters = {'updated_after': last_sync - TESTRAIL_SYNC_SKEW}
+        else:
+            # Only automated cases are synced; the whole project need not cross the network
+            filters = {'type_id': AUTOMATED_TYPE_ID}
+
+        started = int(time.time())
+        # Resolved here, so a full refresh drops exactly the suites that were queried
+        suite_ids = self.suite_ids if self.suite_ids is not None else self.fetcher.resolve_suite_ids(self.project_id)
+        fresh = self.fetcher.fetch_cases(self.project_id, suite_ids=suite_ids, **filters)
+        logger.info('Downloaded cases', extra={'cases': len(fresh), 'delta': last_sync is not None})
+        self.store.save_cases(self.project_id, fresh, started, scope, replace=last_sync is None,
+                              suite_ids=suite_ids)
+        return self.store.load_cases(self.project_id, self.suite_ids)
+
+    @property
+    def sections(self) -> SectionResolver:
+        """Resolver of the default suite's sections by name, cached alongside the cases"""
+        return self.sections_for(None)
+
+    def sections_for(self, suite_id: Optional[int]) -> SectionResolver:
+        """
+        Resolver of the sections of a suite by name. A case can only be filed
+        into a section of its own suite, so cases of a multi-suite project are
+        resolved against their suite; None gives the default suite, which
+        new cases are created in.
+        """
+        with self._sections_lock:
+            default = self._sections.get(None)
+            if default is None:
+                default = self._sections[None] = self._section_resolver(
+                    list(self.suite_ids)[0] if self.suite_ids else None
+                )
+            if suite_id is None or suite_id == default.get_suite_id():
+                return default
+            if suite_id not in self._sections:
+                self._sections[suite_id] = self._section_resolver(suite_id)
+            return self._sections[suite_id]
+
+    def _section_resolver(self, suite_id: Optional[int]) -> SectionResolver:
+        return SectionResolver(self.api, self.project_id, suite_id, store=self.store, offline=self.offline)
+
+    @staticmethod
+    def _automated(cases: List[Dict]) -> List[Dict]:
+        # Update filter to use type_id instead of custom_automation
+        return [
+            case for case in cases
+            if isinstance(case, dict) and case.get('type_id') == AUTOMATED_TYPE_ID
+        ]
+
+    @property
+    def testrail_data(self) -> Dict:
+        """Loaded cases as API-style payloads, limited to the fields TestRailCase keeps"""
+        return {'cases': [case.to_dict() for case in self.test_cases]}
+
+    def _load_test_cases(self, cases: List[Dict]) -> List[TestRailCase]:
         """Load test cases from testrail data"""
-        return [TestRailCase(case) for case in self.testrail_data['cases']]
+        return [TestRailCase(case) for case in cases]
 
     def get_test_cases(self) -> List[TestRailCase]:
         """Get all test cases"""
         return self.test_cases
 
-    def get_cases(self, project_id=None, milestone_id=None) -> List[TestRailCase]:
-        """Get test cases with optional filtering by project and milestone"""
-        return self.test_cases
\ No newline at end of file
+    def cases_by_cm_id(self) -> Dict[str, TestRailCase]:
+        """
+        Every loaded automated case by CM ID, whatever its milestone, for
+        matching document cases: a case filed under another milestone (or
+        none) is updated rather than created again. Raises the error that
+        stopped the cases from loading, as planning against cached or mock
+        cases would create every missing case twice.
+        """
+        if self.fetch_error is not None:
+            raise self.fetch_error
+        return {case.custom_cm_id: case for case in self.test_cases if case.custom_cm_id}
+
+    def get_cases(self, project_id=None, milestone_id=None, suite_id=None, section_id=None,
+                  type_id=AUTOMATED_TYPE_ID, priority_id=None, strict=False) -> List[TestRailCase]:
+        """
+        Get test cases with optional filtering by project, suite, section,
+        milestone, type and priority. Filters accept a single ID or a list of
+        IDs and are sent to TestRail, so only matching cases are downloaded;
+        lists of suites or sections, which TestRail takes one at a time, are
+        queried one by one. Meant for ad-hoc queries: plan, apply, watch and
+        sync match document cases against every automated case loaded at
+        construction, whatever its milestone (see cases_by_cm_id), so they do
+        not filter by milestone.
+        Results are memoized per filter combination.
+
+        When TestRail cannot be reached, the loaded cases are filtered
+        instead; that fallback is never memoized. Pass strict=True to get the
+        error instead, wherever the result decides what gets written.
+        """
+        filters = {
+            'section_id': section_id,
+            'milestone_id': milestone_id,
+            'type_id': type_id,
+            'priority_id': priority_id
+        }
+        project_id = project_id or self.project_id
+        key = (project_id, _freeze(suite_id)) + tuple(_freeze(value) for value in filters.values())
+        if key in self._case_queries:
+            return self._case_queries[key]
+
+        suite_ids = None
+        if suite_id is not None:
+            suite_ids = suite_id if isinstance(suite_id, (list, tuple, set)) else [suite_id]
+
+        fallback = False
+        if self.offline:
+            cases = self.store.load_cases(project_id, suite_ids)
+        else:
+            try:
+                with get_metrics().span('fetch', source='query') as span:
+                    cases = self.fetcher.fetch_cases(project_id, suite_ids=suite_ids, **filters)
+                    span['cases'] = len(cases)
+            except Exception as e:
+                if strict:
+                    raise
+                logger.warning('Error fetching filtered cases, filtering loaded cases instead',
+                               extra={'error': str(e)})
+                cases = self.testrail_data['cases']
+                fallback = True
+        # Filter locally as well, for offline and fallback results
+        filters['suite_id'] = suite_id
+        cases = [TestRailCase(case) for case in cases if _matches(case, filters)]
+
+        if not fallback:
+            self._case_queries[key] = cases
+        return cases
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(value))
+    return value
+
+def _matches(case: Dict, filters: Dict) -> bool:
+    for field, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            if case.get(field) not in value:
+                return False
+        elif case.get(field) != value:
+            return False
+    return True
\ No newline at end of file